@@ -0,0 +1,405 @@
+"""
+In-memory stand-ins for Supabase and the Telegram Bot API.
+
+FakeSupabase implements the slice of the supabase-py query builder the
+services use, on plain lists of dicts. Every execute() is one database round
+trip: it is counted and can be slowed down with injected latency.
+
+FakeBot answers Bot API calls locally, counting them per method, with optional
+injected latency.
+"""
+import asyncio
+import itertools
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from telegram.ext import ExtBot
+
+from bot.services.shuffle_service import get_shuffled_tasks
+
+# Column defaults the real schema fills in on insert
+TABLE_DEFAULTS = {
+    "users": {"settings": {}},
+    "tasks": {
+        "category": "someday",
+        "telegram_message_id": None,
+        "completed_at": None,
+        "shown_count": 0,
+        "last_shown_at": None,
+    },
+}
+
+
+class FakeResponse:
+    """What execute() returns: rows in .data, exact count in .count."""
+
+    def __init__(self, data: list, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Chainable query on one table, mirroring the postgrest builder."""
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.count = None
+        self.values = None
+        self.on_conflict = None
+        self.ignore_duplicates = False
+        self.filters = []
+        self.orders = []
+        self.row_limit = None
+        self.row_offset = 0
+        self._negate = False
+
+    # Operations
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "FakeQuery":
+        self.columns = columns
+        self.count = count
+        return self
+
+    def insert(self, rows) -> "FakeQuery":
+        self.operation = "insert"
+        self.values = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", ignore_duplicates: bool = False) -> "FakeQuery":
+        self.operation = "upsert"
+        self.ignore_duplicates = ignore_duplicates
+        self.values = rows if isinstance(rows, list) else [rows]
+        self.on_conflict = [column for column in on_conflict.split(",") if column]
+        return self
+
+    def update(self, values: dict) -> "FakeQuery":
+        self.operation = "update"
+        self.values = values
+        return self
+
+    def delete(self) -> "FakeQuery":
+        self.operation = "delete"
+        return self
+
+    # Filters
+
+    @property
+    def not_(self) -> "FakeQuery":
+        self._negate = True
+        return self
+
+    def _filter(self, column: str, test) -> "FakeQuery":
+        negate, self._negate = self._negate, False
+        self.filters.append((column, test, negate))
+        return self
+
+    def eq(self, column: str, value) -> "FakeQuery":
+        return self._filter(column, lambda v: v is not None and str(v) == str(value))
+
+    def neq(self, column: str, value) -> "FakeQuery":
+        return self._filter(column, lambda v: v is not None and str(v) != str(value))
+
+    def in_(self, column: str, values) -> "FakeQuery":
+        wanted = {str(value) for value in values}
+        return self._filter(column, lambda v: v is not None and str(v) in wanted)
+
+    def is_(self, column: str, value) -> "FakeQuery":
+        return self._filter(column, _is_test(value))
+
+    def or_(self, filters: str) -> "FakeQuery":
+        """PostgREST logic tree: comma-separated column.operator.value conditions, and(...) / or(...) groups."""
+        tests = [_parse_condition(condition) for condition in _split_conditions(filters)]
+        return self._filter(None, lambda row: any(test(row) for test in tests))
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None) -> "FakeQuery":
+        # Postgres puts NULLs last ascending and first descending by default
+        self.orders.append((column, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, count: int) -> "FakeQuery":
+        self.row_limit = count
+        return self
+
+    def offset(self, count: int) -> "FakeQuery":
+        self.row_offset = count
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self.row_offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    def execute(self) -> FakeResponse:
+        return self.db.execute(self)
+
+    def matches(self, row: dict) -> bool:
+        # Logic trees (column None) test the whole row
+        return all(test(row if column is None else row.get(column)) != negate for column, test, negate in self.filters)
+
+
+def _is_test(value):
+    """Test for is_: null, true or false."""
+    if value in ("null", None):
+        return lambda v: v is None
+    if value in ("true", True):
+        return lambda v: v is True
+    if value in ("false", False):
+        return lambda v: v is False
+    raise ValueError(f"is_ takes null, true or false, not {value!r}")
+
+
+def _coerce(v, value: str):
+    """Convert a filter value from a logic tree to the type of the column value."""
+    if isinstance(v, bool):
+        return value == "true"
+    if isinstance(v, (int, float)):
+        return float(value)
+    return value
+
+
+# Comparison operators of logic tree conditions
+_OPERATORS = {
+    "eq": lambda v, value: v == value,
+    "neq": lambda v, value: v != value,
+    "gt": lambda v, value: v > value,
+    "gte": lambda v, value: v >= value,
+    "lt": lambda v, value: v < value,
+    "lte": lambda v, value: v <= value,
+}
+
+
+def _split_conditions(text: str) -> list:
+    """Split a logic tree on its top-level commas, leaving groups and quoted values whole."""
+    parts = []
+    depth = 0
+    quoted = False
+    start = 0
+    for i, char in enumerate(text):
+        if char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _parse_condition(condition: str):
+    """Turn one logic tree condition into a test on a row."""
+    for group, combine in (("and(", all), ("or(", any)):
+        if condition.startswith(group) and condition.endswith(")"):
+            tests = [_parse_condition(part) for part in _split_conditions(condition[len(group):-1])]
+            return lambda row: combine(test(row) for test in tests)
+
+    column, operator, value = condition.split(".", 2)
+    if len(value) >= 2 and value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    if operator == "is":
+        test = _is_test(value)
+        return lambda row: test(row.get(column))
+    if operator not in _OPERATORS:
+        raise ValueError(f"Unsupported operator {operator!r} in {condition!r}")
+    compare = _OPERATORS[operator]
+
+    def test(row):
+        v = row.get(column)
+        if v is None:
+            return False
+        if not isinstance(v, (bool, int, float)):
+            v = str(v)
+        return compare(v, _coerce(v, value))
+
+    return test
+
+
+class FakeRpc:
+    """Pending database function call."""
+
+    def __init__(self, db: "FakeSupabase", name: str, params: dict):
+        self.db = db
+        self.table = "rpc"
+        self.operation = name
+        self.params = params
+
+    def execute(self) -> FakeResponse:
+        return self.db.execute(self)
+
+
+class FakeSupabase:
+    """
+    In-memory Supabase client.
+
+    Args:
+        latency: Seconds every round trip blocks for, like the real (synchronous) client
+        jitter: Extra random latency, up to this many seconds
+        seed: Seed for the jitter and the shuffle function
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.tables = {"users": [], "tasks": []}
+        self.functions = {"shuffle_now_tasks": _shuffle_now_tasks}
+        self.round_trips = 0
+        self.calls = Counter()  # (table, operation) -> round trips
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.round_trips = 0
+            self.calls.clear()
+
+    def seed_row(self, table: str, **values) -> dict:
+        """Insert a row directly, without counting a round trip."""
+        with self._lock:
+            return dict(self._insert(table, values))
+
+    def execute(self, query) -> FakeResponse:
+        delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        with self._lock:
+            self.round_trips += 1
+            self.calls[(query.table, query.operation)] += 1
+            if isinstance(query, FakeRpc):
+                return FakeResponse(self.functions[query.operation](self, query.params))
+            return self._run(query)
+
+    def _run(self, query: FakeQuery) -> FakeResponse:
+        rows = self.tables[query.table]
+
+        if query.operation in ("insert", "upsert"):
+            inserted = []
+            for values in query.values:
+                existing = self._find_conflict(query, values)
+                if existing is None:
+                    inserted.append(self._insert(query.table, values))
+                elif not query.ignore_duplicates:
+                    existing.update(values)
+                    inserted.append(existing)
+            return FakeResponse([dict(row) for row in inserted])
+
+        matched = [row for row in rows if query.matches(row)]
+
+        if query.operation == "update":
+            for row in matched:
+                row.update(query.values)
+            return FakeResponse([dict(row) for row in matched])
+
+        if query.operation == "delete":
+            self.tables[query.table] = [row for row in rows if not query.matches(row)]
+            return FakeResponse([dict(row) for row in matched])
+
+        count = len(matched) if query.count else None
+        for column, desc, nullsfirst in reversed(query.orders):
+            present = [row for row in matched if row.get(column) is not None]
+            present.sort(key=lambda row: row[column], reverse=desc)
+            nulls = [row for row in matched if row.get(column) is None]
+            matched = nulls + present if nullsfirst else present + nulls
+        end = None if query.row_limit is None else query.row_offset + query.row_limit
+        matched = matched[query.row_offset:end]
+
+        if query.columns.replace(" ", "") == "*":
+            data = [dict(row) for row in matched]
+        else:
+            columns = [column.strip() for column in query.columns.split(",")]
+            data = [{column: row.get(column) for column in columns} for row in matched]
+        return FakeResponse(data, count)
+
+    def _find_conflict(self, query: FakeQuery, values: dict) -> Optional[dict]:
+        if not query.on_conflict:
+            return None
+        key = [values.get(column) for column in query.on_conflict]
+        if any(value is None for value in key):
+            return None
+        for row in self.tables[query.table]:
+            if [row.get(column) for column in query.on_conflict] == key:
+                return row
+        return None
+
+    def _insert(self, table: str, values: dict) -> dict:
+        row = {
+            "id": str(uuid.uuid4()),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **TABLE_DEFAULTS.get(table, {}),
+            **values,
+        }
+        self.tables[table].append(row)
+        return row
+
+
+def _shuffle_now_tasks(db: FakeSupabase, params: dict) -> list:
+    """Python version of the shuffle_now_tasks database function."""
+    tasks = [
+        row for row in db.tables["tasks"]
+        if row["user_id"] == params["p_user_id"] and row["category"] == "now" and row["completed_at"] is None
+    ]
+    picked = get_shuffled_tasks(tasks, params["p_limit"], currently_displayed=params["p_exclude"], rng=db._rng)
+    if params["p_record_shown"]:
+        shown_at = datetime.now(timezone.utc).isoformat()
+        for row in picked:
+            row["shown_count"] = (row["shown_count"] or 0) + 1
+            row["last_shown_at"] = shown_at
+    return [dict(row) for row in picked]
+
+
+class FakeBot(ExtBot):
+    """
+    Bot that answers Bot API calls locally instead of over HTTP.
+
+    Args:
+        latency: Seconds every API call waits for (without blocking the event loop)
+    """
+
+    BOT_USER = {"id": 1, "is_bot": True, "first_name": "Someday", "username": "someday_bench_bot"}
+
+    def __init__(self, token: str = "123456:benchmark", latency: float = 0.0):
+        super().__init__(token)
+        with self._unfrozen():
+            self.latency = latency
+            self.api_calls = Counter()  # method -> calls
+            self._message_ids = itertools.count(100000)
+
+    def reset_counters(self) -> None:
+        self.api_calls.clear()
+
+    async def _do_post(self, endpoint: str, data: dict, **kwargs):
+        self.api_calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if endpoint == "getMe":
+            return self.BOT_USER
+        if endpoint in ("sendMessage", "sendDocument", "editMessageText", "editMessageReplyMarkup"):
+            return {
+                "message_id": data.get("message_id") or next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": data.get("chat_id", 0), "type": "private"},
+                "from": self.BOT_USER,
+                "text": data.get("text", ""),
+            }
+        return True
@@ -0,0 +1,251 @@
+"""
+End-to-end handler benchmark against a fake Supabase and a fake Bot API.
+
+Each scenario feeds real Update objects through Application.process_update,
+so dedup, handler dispatch, services, formatting and background writes all
+run as in production - only the network is replaced. No network is needed.
+
+For every scenario it reports latency percentiles, database round trips and
+Telegram API calls per update.
+
+Usage:
+    python -m benchmarks.handlers
+    python -m benchmarks.handlers --iterations 500 --db-latency 20 --api-latency 40
+    python -m benchmarks.handlers --scenarios shuffle,complete_task --json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+
+# The settings module reads these at import, none of them is ever contacted
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+# Never replay a previous run's writes, nor leave a journal file behind
+os.environ.setdefault("JOURNAL_PATH", ":memory:")
+
+from telegram import Update  # noqa: E402
+from telegram.ext import Application  # noqa: E402
+
+from benchmarks.fakes import FakeBot, FakeSupabase  # noqa: E402
+from benchmarks.shuffle_sim import _percentiles  # noqa: E402
+from bot.db.supabase_client import set_client  # noqa: E402
+from bot.handlers import callbacks, register_all_handlers  # noqa: E402
+from bot.utils.background import wait_for_pending  # noqa: E402
+from bot.utils.screens import warm_settings_screens  # noqa: E402
+from bot.utils.tracing import TracedApplication  # noqa: E402
+
+TELEGRAM_ID = 424242
+CHAT = {"id": TELEGRAM_ID, "type": "private"}
+FROM_USER = {"id": TELEGRAM_ID, "is_bot": False, "first_name": "Bench"}
+
+
+class Session:
+    """One user's state across a benchmark run."""
+
+    def __init__(self, db: FakeSupabase, bot: FakeBot, user: dict):
+        self.db = db
+        self.bot = bot
+        self.user = user
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.iteration = 0
+
+    def message(self, text: str, **extra) -> dict:
+        return {
+            "message_id": extra.pop("message_id", None) or next(self.message_ids),
+            "date": int(time.time()),
+            "chat": CHAT,
+            "from": FROM_USER,
+            "text": text,
+            **extra,
+        }
+
+    def update(self, **payload) -> Update:
+        return Update.de_json({"update_id": next(self.update_ids), **payload}, self.bot)
+
+    def callback(self, data: str) -> Update:
+        return self.update(callback_query={
+            "id": str(self.iteration),
+            "from": FROM_USER,
+            "chat_instance": "benchmark",
+            "data": data,
+            "message": self.message("menu", message_id=1),
+        })
+
+    def add_task(self, category: str, **values) -> dict:
+        return self.db.seed_row("tasks", user_id=self.user["id"], content=f"Task {self.iteration}", category=category, **values)
+
+
+# Scenario name -> function building the next update. Setup writes go straight
+# into the fake store and are not counted.
+
+def _open_now(session: Session) -> Update:
+    return session.update(message=session.message("/now", entities=[{"type": "bot_command", "offset": 0, "length": 4}]))
+
+
+def _shuffle(session: Session) -> Update:
+    return session.callback("shuffle")
+
+
+def _page_someday(session: Session) -> Update:
+    return session.callback(f"page_someday_{session.iteration % 3}")
+
+
+def _complete_task(session: Session) -> Update:
+    task = session.add_task("now")
+    return session.callback(f"complete_{task['id']}")
+
+
+def _brain_dump(session: Session) -> Update:
+    return session.update(message=session.message(f"Idea number {session.iteration}"))
+
+
+def _edit_task(session: Session) -> Update:
+    message_id = 1_000_000 + session.iteration
+    session.add_task("someday", telegram_message_id=message_id)
+    edited = session.message(f"Edited idea {session.iteration} !soon", message_id=message_id, edit_date=int(time.time()))
+    return session.update(edited_message=edited)
+
+
+SCENARIOS = {
+    "open_now": _open_now,
+    "shuffle": _shuffle,
+    "page_someday": _page_someday,
+    "complete_task": _complete_task,
+    "brain_dump": _brain_dump,
+    "edit_task": _edit_task,
+}
+
+
+def seed_data(db: FakeSupabase, tasks_per_category: int, telegram_id: int = TELEGRAM_ID) -> dict:
+    """Create a benchmark user and their tasks."""
+    user = db.seed_row("users", telegram_id=telegram_id, settings={"now_display_limit": 3})
+    for category in ("now", "soon", "someday"):
+        for i in range(tasks_per_category):
+            db.seed_row("tasks", user_id=user["id"], content=f"{category} task {i}", category=category)
+    return user
+
+
+async def run_scenario(application: Application, session: Session, name: str, iterations: int, errors: list) -> dict:
+    """Run one scenario and summarize it."""
+    build_update = SCENARIOS[name]
+    latencies = []
+    round_trips = []
+    api_calls = []
+    errors_before = len(errors)
+
+    for iteration in range(iterations):
+        session.iteration = iteration
+        update = build_update(session)
+        session.db.reset_counters()
+        session.bot.reset_counters()
+
+        start = time.perf_counter()
+        await application.process_update(update)
+        # Optimistic writes finish in the background, they are part of the cost
+        await wait_for_pending(session.user["id"])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        round_trips.append(session.db.round_trips)
+        api_calls.append(sum(session.bot.api_calls.values()))
+
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "latency_ms": _percentiles(latencies),
+        "db_round_trips": sum(round_trips) / iterations,
+        "db_round_trips_max": max(round_trips),
+        "api_calls": sum(api_calls) / iterations,
+        "api_calls_max": max(api_calls),
+        "errors": len(errors) - errors_before,
+    }
+
+
+def build_application(db: FakeSupabase, bot: FakeBot, errors: list, concurrent_updates=1) -> Application:
+    """
+    Set up the bot like create_application, on the fakes. Handler errors are appended to errors as (update, error).
+
+    concurrent_updates is a number of updates or an update processor.
+    """
+    set_client(db)
+    if isinstance(concurrent_updates, int):
+        concurrent_updates = concurrent_updates if concurrent_updates > 1 else False
+    application = (
+        Application.builder()
+        .bot(bot)
+        .updater(None)
+        .application_class(TracedApplication)
+        .concurrent_updates(concurrent_updates)
+        .build()
+    )
+    register_all_handlers(application)
+    warm_settings_screens()
+
+    async def record_error(update, context):
+        errors.append((update, context.error))
+
+    application.add_error_handler(record_error)
+    return application
+
+
+async def run(args) -> list:
+    db = FakeSupabase(latency=args.db_latency / 1000, jitter=args.db_jitter / 1000, seed=args.seed)
+    bot = FakeBot(latency=args.api_latency / 1000)
+    callbacks.CELEBRATION_SECONDS = 0
+
+    errors = []
+    application = build_application(db, bot, errors)
+    session = Session(db, bot, seed_data(db, args.tasks))
+    results = []
+    async with application:
+        for name in args.scenarios.split(","):
+            results.append(await run_scenario(application, session, name, args.iterations, errors))
+
+    for _, error in errors[:3]:
+        print(f"error: {error!r}")
+    return results
+
+
+HEADER = (
+    f"{'scenario':<15}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    f"{'db/upd':>8}{'db max':>7}{'api/upd':>8}{'errors':>7}"
+)
+
+
+def _format_row(result: dict) -> str:
+    latency = result["latency_ms"]
+    return (
+        f"{result['scenario']:<15}{latency['p50']:>9}{latency['p95']:>9}{latency['p99']:>9}{latency['max']:>9}"
+        f"{result['db_round_trips']:>8.1f}{result['db_round_trips_max']:>7}{result['api_calls']:>8.1f}{result['errors']:>7}"
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the update handlers against a fake Supabase and Bot API.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios")
+    parser.add_argument("--iterations", type=int, default=200, help="Updates per scenario")
+    parser.add_argument("--tasks", type=int, default=30, help="Tasks per category for the benchmark user")
+    parser.add_argument("--db-latency", type=float, default=0, help="Milliseconds per database round trip")
+    parser.add_argument("--db-jitter", type=float, default=0, help="Extra random milliseconds per round trip")
+    parser.add_argument("--api-latency", type=float, default=0, help="Milliseconds per Bot API call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per scenario")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args))
+    if not args.json:
+        print(HEADER)
+    for result in results:
+        print(json.dumps(result) if args.json else _format_row(result))
+
+
+if __name__ == "__main__":
+    main()
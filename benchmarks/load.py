@@ -0,0 +1,405 @@
+"""
+Load generator: push synthetic or recorded traffic through the bot at a target rate.
+
+Traffic sources:
+- synthetic: N simulated users sending messages, edits and button taps in a
+  weighted mix (see MIXES)
+- replay: an anonymized update log recorded with UPDATE_LOG, at its original
+  pace (scaled by --speed) or at --rate. Recorded task IDs don't exist in the
+  fake store, so task taps replay as "Task not found".
+
+Targets:
+- app: an in-process Application on the fake Supabase and Bot API, updates
+  go through its update queue like polling. Latency is enqueue to handled.
+- webhook: POST to a running webhook server. Latency is the HTTP round trip
+  (the server answers once the update is queued, handler latency is on its
+  /metrics). Point this at a staging bot: the bot will call the Bot API for
+  the simulated users and those calls fail.
+
+Sending is open loop: updates go out on schedule whether or not earlier ones
+are done, so an overloaded bot shows up as growing latency, not a lower rate.
+
+Usage:
+    python -m benchmarks.load --users 50 --rate 20 --duration 30
+    python -m benchmarks.load --mix browse --concurrent 8 --db-latency 30
+    python -m benchmarks.load --mix capture --rate 200 --workers 8 --queue-limit 100 --db-latency 30
+    python -m benchmarks.load --replay updates.jsonl --speed 5
+    python -m benchmarks.load --target webhook --url http://localhost:8080/webhook --secret s3cret
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter, defaultdict
+
+from telegram import Update
+
+from benchmarks.fakes import FakeBot, FakeSupabase
+from benchmarks.handlers import build_application, seed_data
+from benchmarks.shuffle_sim import _percentiles
+from bot.handlers import callbacks
+from bot.utils.background import create_executor
+from bot.utils.scheduler import PriorityUpdateProcessor
+from bot.utils.tracing import KIND_SERVER, add_span_listener
+from config.settings import settings
+
+# Update kind -> weight. Kinds in TASK_KINDS tap a task, they need its ID.
+MIXES = {
+    "default": {
+        "message": 20, "edit": 3, "now_command": 4,
+        "view_now": 14, "shuffle": 14, "view_soon": 8, "view_someday": 8, "page_someday": 6,
+        "task": 10, "complete": 7, "move": 4, "settings": 2,
+    },
+    # Mostly looking around
+    "browse": {
+        "message": 5, "now_command": 5,
+        "view_now": 20, "shuffle": 25, "view_soon": 12, "view_someday": 12, "page_someday": 10,
+        "task": 10, "settings": 1,
+    },
+    # Brain dumps
+    "capture": {"message": 70, "edit": 15, "view_someday": 10, "complete": 5},
+}
+
+TASK_KINDS = {"task", "complete", "move"}
+
+STATIC_CALLBACKS = {
+    "view_now": "view_now",
+    "shuffle": "shuffle",
+    "view_soon": "view_soon",
+    "view_someday": "view_someday",
+    "settings": "settings",
+}
+
+WORDS = ("call", "email", "buy", "fix", "plan", "read", "write", "book", "clean", "review", "mom", "dentist", "taxes", "bike")
+
+
+class SyntheticTraffic:
+    """
+    Builds updates for simulated users.
+
+    Args:
+        users: Number of users
+        mix: Update kind -> weight
+        first_telegram_id: Telegram ID of the first user, the others follow
+        task_ids: Function (telegram_id) -> list of active task IDs, None when
+            they are unknown (webhook target): task taps are left out of the mix
+    """
+
+    def __init__(self, users: int, mix: dict, first_telegram_id: int = 500000, task_ids=None, seed: int = 1):
+        self.telegram_ids = [first_telegram_id + i for i in range(users)]
+        self.task_ids = task_ids
+        if task_ids is None:
+            mix = {kind: weight for kind, weight in mix.items() if kind not in TASK_KINDS}
+        self.kinds = list(mix)
+        self.weights = list(mix.values())
+        self.rng = random.Random(seed)
+        self.message_ids = itertools.count(1)
+        self.sent_messages = defaultdict(list)  # telegram_id -> message IDs of task messages
+
+    def next_update(self) -> tuple[str, dict]:
+        """Get (kind, update dict without update_id)."""
+        telegram_id = self.rng.choice(self.telegram_ids)
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+
+        if kind == "edit" and not self.sent_messages[telegram_id]:
+            kind = "message"
+        if kind in TASK_KINDS:
+            ids = self.task_ids(telegram_id)
+            if not ids:
+                kind = "message"
+
+        if kind == "message":
+            message_id = next(self.message_ids)
+            self.sent_messages[telegram_id].append(message_id)
+            text = " ".join(self.rng.choices(WORDS, k=self.rng.randint(1, 6)))
+            if self.rng.random() < 0.15:
+                text += self.rng.choice((" !now", " !soon"))
+            return kind, {"message": self._message(telegram_id, text, message_id)}
+        if kind == "edit":
+            message_id = self.rng.choice(self.sent_messages[telegram_id])
+            text = " ".join(self.rng.choices(WORDS, k=3))
+            return kind, {"edited_message": self._message(telegram_id, text, message_id, edit_date=int(time.time()))}
+        if kind == "now_command":
+            message = self._message(telegram_id, "/now", next(self.message_ids))
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": 4}]
+            return kind, {"message": message}
+
+        if kind in TASK_KINDS:
+            task_id = self.rng.choice(ids)
+            data = {
+                "task": f"task_{task_id}",
+                "complete": f"complete_{task_id}",
+                "move": f"move_{task_id}_{self.rng.choice(('now', 'soon', 'someday'))}",
+            }[kind]
+        elif kind == "page_someday":
+            data = f"page_someday_{self.rng.randint(0, 2)}"
+        else:
+            data = STATIC_CALLBACKS[kind]
+        return kind, {"callback_query": {
+            "id": str(next(self.message_ids)),
+            "from": _user(telegram_id),
+            "chat_instance": str(telegram_id),
+            "data": data,
+            "message": self._message(telegram_id, "menu", 1),
+        }}
+
+    def _message(self, telegram_id: int, text: str, message_id: int, **extra) -> dict:
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": telegram_id, "type": "private"},
+            "from": _user(telegram_id),
+            "text": text,
+            **extra,
+        }
+
+
+def _user(telegram_id: int) -> dict:
+    return {"id": telegram_id, "is_bot": False, "first_name": "Load"}
+
+
+def load_update_log(path: str) -> list:
+    """Read a recorded update log as [(offset seconds, kind, update dict)]."""
+    records = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                update = record["update"]
+                update.pop("update_id", None)
+                kind = next((key for key in ("callback_query", "edited_message", "message") if key in update), "other")
+                records.append((record["t"], kind, update))
+    if records:
+        start = records[0][0]
+        records = [(t - start, kind, update) for t, kind, update in records]
+    return records
+
+
+def schedule(args, traffic) -> list:
+    """Get the (send offset seconds, kind, update dict) to send, in order."""
+    if args.replay:
+        records = load_update_log(args.replay)
+        if args.rate:
+            return [(i / args.rate, kind, update) for i, (_, kind, update) in enumerate(records)]
+        return [(t / args.speed, kind, update) for t, kind, update in records]
+
+    count = int(args.rate * args.duration)
+    return [(i / args.rate, *traffic.next_update()) for i in range(count)]
+
+
+class Results:
+    """Latencies and errors by update kind."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.sent = Counter()
+        self.shed = Counter()
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        done = sum(len(values) for values in self.latencies.values())
+        sent = sum(self.sent.values())
+        kinds = {}
+        for kind in sorted(self.sent):
+            kinds[kind] = {
+                "sent": self.sent[kind],
+                "errors": self.errors[kind],
+                "shed": self.shed[kind],
+                "latency_ms": _percentiles(self.latencies[kind]),
+            }
+        return {
+            "sent": sent,
+            "completed": done,
+            "errors": sum(self.errors.values()),
+            "error_rate": sum(self.errors.values()) / sent if sent else 0.0,
+            "shed": sum(self.shed.values()),
+            "elapsed_s": round(elapsed, 2),
+            "throughput_per_s": round(done / elapsed, 1) if elapsed else 0.0,
+            "latency_ms": _percentiles([value for values in self.latencies.values() for value in values]),
+            "by_kind": kinds,
+        }
+
+
+async def _pace(start: float, offset: float) -> None:
+    delay = start + offset - time.perf_counter()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+async def run_app(args) -> dict:
+    """Drive an in-process Application through its update queue."""
+    if args.celebration is not None:
+        callbacks.CELEBRATION_SECONDS = args.celebration
+
+    db = FakeSupabase(latency=args.db_latency / 1000, jitter=args.db_jitter / 1000, seed=args.seed)
+    bot = FakeBot(latency=args.api_latency / 1000)
+    handler_errors = []
+    if args.workers:
+        # Like production: prioritized, one update per user at a time, shedding past the limit
+        concurrent = PriorityUpdateProcessor(
+            args.workers,
+            args.queue_limit,
+            args.callback_timeout_ms / 1000,
+            update_deadline=settings.UPDATE_DEADLINE_MS / 1000,
+        )
+    else:
+        concurrent = args.concurrent
+    asyncio.get_running_loop().set_default_executor(create_executor(args.workers or args.concurrent))
+    application = build_application(db, bot, handler_errors, concurrent_updates=concurrent)
+
+    users = {}
+    for i in range(args.users):
+        telegram_id = 500000 + i
+        users[telegram_id] = seed_data(db, args.tasks, telegram_id=telegram_id)["id"]
+
+    def task_ids(telegram_id):
+        user_id = users.get(telegram_id)
+        return [row["id"] for row in db.tables["tasks"] if row["user_id"] == user_id and row["completed_at"] is None]
+
+    traffic = SyntheticTraffic(args.users, MIXES[args.mix], task_ids=task_ids, seed=args.seed)
+    plan = schedule(args, traffic)
+
+    results = Results()
+    pending = {}  # update_id -> (kind, enqueued at)
+
+    def on_span(finished):
+        if finished.kind != KIND_SERVER:
+            return
+        update_id = finished.attributes.get("update.id")
+        entry = pending.pop(update_id, None)
+        if entry:
+            kind, enqueued = entry
+            results.latencies[kind].append((time.perf_counter() - enqueued) * 1000)
+            # Handler exceptions are caught by the application and land in handler_errors
+            if any(update.update_id == update_id for update, _ in handler_errors):
+                results.errors[kind] += 1
+
+    add_span_listener(on_span)
+    update_ids = itertools.count(1)
+
+    async with application:
+        await application.start()
+        start = time.perf_counter()
+        results.started = start
+        for offset, kind, payload in plan:
+            await _pace(start, offset)
+            update_id = next(update_ids)
+            update = Update.de_json({"update_id": update_id, **payload}, application.bot)
+            pending[update_id] = (kind, time.perf_counter())
+            results.sent[kind] += 1
+            await application.update_queue.put(update)
+        # Every update is marked done once handled or shed
+        try:
+            await asyncio.wait_for(application.update_queue.join(), timeout=args.drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"{len(pending)} updates still pending after {args.drain_timeout}s")
+        else:
+            # Handled updates closed a span, the rest were turned away
+            for kind, _ in pending.values():
+                results.shed[kind] += 1
+        results.finished = time.perf_counter()
+        await application.stop()
+
+    for _, error in handler_errors[:3]:
+        print(f"error: {error!r}")
+    return results.summary()
+
+
+async def run_webhook(args) -> dict:
+    """POST updates to a webhook server."""
+    import httpx
+
+    traffic = SyntheticTraffic(args.users, MIXES[args.mix], seed=args.seed)
+    plan = schedule(args, traffic)
+    headers = {"X-Telegram-Bot-Api-Secret-Token": args.secret} if args.secret else {}
+    # Fresh IDs well above anything Telegram sent, so dedup never drops them
+    update_ids = itertools.count(int(time.time() * 1000))
+
+    results = Results()
+    limits = httpx.Limits(max_connections=args.connections)
+
+    async with httpx.AsyncClient(limits=limits, timeout=args.drain_timeout, headers=headers) as client:
+        async def send(kind, payload):
+            sent_at = time.perf_counter()
+            try:
+                response = await client.post(args.url, json={"update_id": next(update_ids), **payload})
+                if response.status_code >= 400:
+                    results.errors[kind] += 1
+                    return
+            except httpx.HTTPError:
+                results.errors[kind] += 1
+                return
+            results.latencies[kind].append((time.perf_counter() - sent_at) * 1000)
+
+        tasks = []
+        start = time.perf_counter()
+        results.started = start
+        for offset, kind, payload in plan:
+            await _pace(start, offset)
+            results.sent[kind] += 1
+            tasks.append(asyncio.create_task(send(kind, payload)))
+        await asyncio.gather(*tasks)
+        results.finished = time.perf_counter()
+
+    return results.summary()
+
+
+def print_summary(summary: dict) -> None:
+    latency = summary["latency_ms"] or {}
+    print(
+        f"sent {summary['sent']}, completed {summary['completed']} in {summary['elapsed_s']}s "
+        f"({summary['throughput_per_s']}/s), errors {summary['errors']} ({summary['error_rate']:.1%}), shed {summary['shed']}"
+    )
+    print(f"latency ms: p50 {latency.get('p50')}  p95 {latency.get('p95')}  p99 {latency.get('p99')}  max {latency.get('max')}")
+    print(f"{'kind':<16}{'sent':>7}{'errors':>8}{'shed':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for kind, stats in summary["by_kind"].items():
+        kind_latency = stats["latency_ms"] or {}
+        print(
+            f"{kind:<16}{stats['sent']:>7}{stats['errors']:>8}{stats['shed']:>7}"
+            f"{kind_latency.get('p50', '-'):>9}{kind_latency.get('p95', '-'):>9}{kind_latency.get('p99', '-'):>9}"
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Push synthetic or recorded traffic through the bot.")
+    parser.add_argument("--target", choices=("app", "webhook"), default="app")
+    parser.add_argument("--url", default="http://localhost:8080/webhook", help="Webhook URL (webhook target)")
+    parser.add_argument("--secret", default="", help="WEBHOOK_SECRET of the server (webhook target)")
+    parser.add_argument("--connections", type=int, default=50, help="Max open connections (webhook target)")
+    parser.add_argument("--replay", default="", help="Replay this UPDATE_LOG file instead of synthetic traffic")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up factor (ignored with --rate)")
+    parser.add_argument("--users", type=int, default=20, help="Simulated users")
+    parser.add_argument("--mix", choices=tuple(MIXES), default="default")
+    parser.add_argument("--rate", type=float, default=None, help="Updates per second (default 10, replays keep their pace)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of synthetic traffic")
+    parser.add_argument("--tasks", type=int, default=20, help="Tasks per category per user (app target)")
+    parser.add_argument("--concurrent", type=int, default=1, help="Updates handled concurrently (app target)")
+    parser.add_argument("--workers", type=int, default=0, help="Use the priority scheduler with this many workers instead (app target)")
+    parser.add_argument("--queue-limit", type=int, default=500, help="Updates the scheduler lets wait (with --workers)")
+    parser.add_argument("--callback-timeout-ms", type=float, default=5000, help="Taps waiting longer get a busy toast (with --workers)")
+    parser.add_argument("--db-latency", type=float, default=0, help="Milliseconds per database round trip (app target)")
+    parser.add_argument("--db-jitter", type=float, default=0, help="Extra random milliseconds per round trip (app target)")
+    parser.add_argument("--api-latency", type=float, default=0, help="Milliseconds per Bot API call (app target)")
+    parser.add_argument("--celebration", type=float, default=None, help="Override the completion celebration seconds (app target)")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="Seconds to wait for outstanding updates")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.rate is None and not args.replay:
+        args.rate = 10.0
+
+    summary = asyncio.run(run_app(args) if args.target == "app" else run_webhook(args))
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
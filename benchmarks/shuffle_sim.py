@@ -0,0 +1,192 @@
+"""
+Offline shuffle simulator: fairness and cost of the NOW selection.
+
+Runs many rounds of the NOW selection over synthetic task pools, feeding the
+shown stats back the same way the bot does, and reports:
+
+- coverage: share of tasks shown at least once, and the round it reached 100%
+- max gap: longest stretch (in rounds) a task went without being shown
+- repeat rate: share of reappearances sooner than a perfect rotation (n / limit rounds)
+- back-to-back: share of picks that were already on the previous screen
+- latency: per-call percentiles
+- allocations: peak memory allocated per call (tracemalloc, on a sample of calls)
+
+Usage:
+    python -m benchmarks.shuffle_sim
+    python -m benchmarks.shuffle_sim --pools 20,500,5000 --limits 3 --rounds 5000 --mode both
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from bot.services.shuffle_service import get_rotation_tasks, get_shuffled_tasks
+
+MODES = ("score", "rotation")
+
+
+def make_pool(size: int) -> list:
+    """Synthetic NOW list, nothing shown yet."""
+    return [
+        {"id": f"task-{i:05d}", "content": f"Task {i}", "shown_count": 0, "last_shown_at": None}
+        for i in range(size)
+    ]
+
+
+def simulate(pool_size: int, limit: int, rounds: int, mode: str = "score", seed: int = 1,
+             interval_minutes: int = 30, alloc_samples: int = 50) -> dict:
+    """
+    Run one simulation and collect its metrics.
+
+    Args:
+        pool_size: Number of NOW tasks
+        limit: Tasks displayed per round (the user's NOW limit)
+        rounds: Number of shuffles
+        mode: "score" (get_shuffled_tasks) or "rotation" (get_rotation_tasks)
+        seed: Seed for the shuffle RNG, runs are reproducible
+        interval_minutes: Simulated time between two shuffles
+        alloc_samples: Calls measured with tracemalloc (slower, kept separate from latency)
+    """
+    tasks = make_pool(pool_size)
+    rng = random.Random(seed)
+    clock = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    step = timedelta(minutes=interval_minutes)
+
+    current_display = []
+    cursor = None
+    last_round = {}
+    first_round_all_shown = None
+    gaps = []
+    max_gap = 0
+    back_to_back = 0
+    picks = 0
+    latencies = []
+    alloc_peaks = []
+    alloc_every = max(1, rounds // alloc_samples) if alloc_samples else 0
+
+    for round_number in range(rounds):
+        measure_alloc = alloc_every and round_number % alloc_every == 0
+        if measure_alloc:
+            tracemalloc.start()
+
+        start = time.perf_counter_ns()
+        if mode == "rotation":
+            shown, cursor = get_rotation_tasks(tasks, limit, seed=str(seed), cursor=cursor)
+        else:
+            shown = get_shuffled_tasks(tasks, limit, currently_displayed=current_display, rng=rng, now=clock)
+        elapsed = time.perf_counter_ns() - start
+
+        if measure_alloc:
+            alloc_peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        else:
+            latencies.append(elapsed)
+
+        shown_ids = [task["id"] for task in shown]
+        back_to_back += len(set(shown_ids) & set(current_display))
+        picks += len(shown_ids)
+
+        for task in shown:
+            previous = last_round.get(task["id"])
+            if previous is not None:
+                gaps.append(round_number - previous)
+            last_round[task["id"]] = round_number
+            if mode == "score":
+                # What update_task_shown does after every display
+                task["shown_count"] += 1
+                task["last_shown_at"] = clock.isoformat()
+
+        if first_round_all_shown is None and len(last_round) == pool_size:
+            first_round_all_shown = round_number + 1
+
+        current_display = shown_ids
+        clock += step
+
+    # Tasks still waiting at the end count as an open gap
+    for task in tasks:
+        max_gap = max(max_gap, rounds - last_round.get(task["id"], -1) - 1)
+    max_gap = max([max_gap, *gaps]) if gaps else max_gap
+
+    ideal_gap = max(1, pool_size // limit)
+    early = sum(1 for gap in gaps if gap < ideal_gap)
+
+    return {
+        "mode": mode,
+        "pool": pool_size,
+        "limit": limit,
+        "rounds": rounds,
+        "coverage": len(last_round) / pool_size,
+        "full_coverage_round": first_round_all_shown,
+        "ideal_gap": ideal_gap,
+        "max_gap": max_gap,
+        "repeat_rate": early / len(gaps) if gaps else 0.0,
+        "back_to_back_rate": back_to_back / picks if picks else 0.0,
+        "latency_us": _percentiles([ns / 1000 for ns in latencies]),
+        "alloc_peak_kib": _percentiles([size / 1024 for size in alloc_peaks]),
+    }
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def pick(q):
+        return round(values[min(len(values) - 1, int(q * len(values)))], 1)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(values[-1], 1)}
+
+
+def _format_row(result: dict) -> str:
+    latency = result["latency_us"]
+    alloc = result["alloc_peak_kib"]
+    full = result["full_coverage_round"] or "-"
+    return (
+        f"{result['mode']:<9}{result['pool']:>6}{result['limit']:>4}"
+        f"{result['coverage']:>8.0%}{full:>7}"
+        f"{result['max_gap']:>7}{result['ideal_gap']:>6}"
+        f"{result['repeat_rate']:>8.1%}{result['back_to_back_rate']:>7.1%}"
+        f"{latency.get('p50', 0):>9}{latency.get('p99', 0):>9}"
+        f"{alloc.get('p50', 0):>9}"
+    )
+
+
+HEADER = (
+    f"{'mode':<9}{'pool':>6}{'lim':>4}{'cover':>8}{'full@':>7}"
+    f"{'maxgap':>7}{'ideal':>6}{'repeat':>8}{'b2b':>7}"
+    f"{'p50 us':>9}{'p99 us':>9}{'KiB p50':>9}"
+)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate NOW shuffles and report fairness and cost.")
+    parser.add_argument("--pools", default="5,20,100,1000,5000", help="Comma-separated pool sizes")
+    parser.add_argument("--limits", default="1,3,5", help="Comma-separated NOW limits")
+    parser.add_argument("--rounds", type=int, default=2000, help="Shuffles per simulation")
+    parser.add_argument("--mode", choices=(*MODES, "both"), default="score")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--interval", type=int, default=30, help="Simulated minutes between shuffles")
+    parser.add_argument("--alloc-samples", type=int, default=50, help="Calls measured with tracemalloc (0 to skip)")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per simulation")
+    args = parser.parse_args(argv)
+
+    modes = MODES if args.mode == "both" else (args.mode,)
+    pools = [int(value) for value in args.pools.split(",")]
+    limits = [int(value) for value in args.limits.split(",")]
+
+    if not args.json:
+        print(HEADER)
+    for mode in modes:
+        for pool_size in pools:
+            for limit in limits:
+                result = simulate(
+                    pool_size, limit, args.rounds, mode=mode, seed=args.seed,
+                    interval_minutes=args.interval, alloc_samples=args.alloc_samples,
+                )
+                print(json.dumps(result) if args.json else _format_row(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Startup time report: how long a fresh process takes until it can handle updates.
+
+Every run is a new interpreter (imports are cached within a process). Phases:
+    import: `import bot.main` (python -X importtime breaks it down per module)
+    create_application: settings, handlers, settings screens
+    supabase_client: the first get_client(), which imports supabase (no request is made)
+
+Reports the median of each phase, the slowest imports of the last run and
+whether the startup budget (import + create_application) was met. Exits
+with status 1 when it was not, so it can run in CI.
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --budget-ms 500 --top 30
+    python -m benchmarks.startup --json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Timed in the child process, prints one JSON line of milliseconds
+CHILD = """
+import json, time
+start = time.perf_counter()
+import bot.main
+imported = time.perf_counter()
+bot.main.create_application()
+created = time.perf_counter()
+from bot.db.supabase_client import get_client
+get_client()
+connected = time.perf_counter()
+print(json.dumps({
+    "import": (imported - start) * 1000,
+    "create_application": (created - imported) * 1000,
+    "supabase_client": (connected - created) * 1000,
+}))
+"""
+
+PHASES = ("import", "create_application", "supabase_client")
+
+# "import time:  self [us] | cumulative | imported package"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once() -> tuple:
+    """Start the bot in a fresh interpreter. Returns (phase timings, import lines)."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # The settings module reads these at import, none of them is ever contacted
+    env.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark")
+    env.setdefault("SUPABASE_URL", "http://localhost:54321")
+    env.setdefault("SUPABASE_KEY", "benchmark")
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"startup failed:\n{process.stderr[-2000:]}")
+    timings = json.loads(process.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(process.stderr)
+
+
+def parse_importtime(output: str) -> list:
+    """Parse -X importtime output into (module, self ms, cumulative ms, depth)."""
+    imports = []
+    for line in output.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us) / 1000, int(cumulative_us) / 1000, len(indent) // 2))
+    return imports
+
+
+def by_package(imports: list) -> dict:
+    """Sum the self time of imports per top-level package."""
+    totals = {}
+    for module, self_ms, _, _ in imports:
+        package = module.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_ms
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure bot startup time and report the slowest imports.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to start")
+    parser.add_argument("--budget-ms", type=float, default=1000, help="Budget for import + create_application")
+    parser.add_argument("--top", type=int, default=20, help="Slowest imports and packages to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as one JSON object")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for _ in range(args.runs):
+        timings, imports = run_once()
+        runs.append(timings)
+
+    medians = {phase: round(statistics.median(run[phase] for run in runs), 1) for phase in PHASES}
+    ready_ms = round(medians["import"] + medians["create_application"], 1)
+    slowest = sorted(imports, key=lambda item: -item[1])[:args.top]
+    packages = list(by_package(imports).items())[:args.top]
+    report = {
+        "runs": args.runs,
+        "median_ms": medians,
+        "ready_ms": ready_ms,
+        "budget_ms": args.budget_ms,
+        "within_budget": ready_ms <= args.budget_ms,
+        "slowest_imports": [{"module": module, "self_ms": self_ms, "cumulative_ms": cumulative_ms} for module, self_ms, cumulative_ms, _ in slowest],
+        "packages": [{"package": package, "self_ms": round(total, 1)} for package, total in packages],
+    }
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for phase in PHASES:
+            print(f"{phase:<20} {medians[phase]:>8.1f} ms")
+        status = "OK" if report["within_budget"] else "OVER BUDGET"
+        print(f"{'ready':<20} {ready_ms:>8.1f} ms  (budget {args.budget_ms:.0f} ms, {status})")
+        print(f"\nSlowest imports (self time, last run):")
+        for module, self_ms, cumulative_ms, _ in slowest:
+            print(f"  {self_ms:>8.1f} ms  {cumulative_ms:>8.1f} ms cumulative  {module}")
+        print(f"\nImport time by package:")
+        for package, total in packages:
+            print(f"  {total:>8.1f} ms  {package}")
+
+    if not report["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+
+import httpx
+
+from bot.db.retries import DeadlineExceeded
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class DatabaseUnavailable(httpx.TransportError):
+    """Supabase could not be reached, or the circuit breaker is open."""
+
+
+class CircuitOpen(DatabaseUnavailable):
+    """The circuit breaker kept the request from Supabase."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling the database after repeated failures.
+
+    Closed: requests pass, failures and slow calls are counted.
+    Open: requests fail right away, until reset_seconds have passed.
+    Half open: one probe request passes, its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, slow_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.slow_seconds = slow_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a request may go to the database now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.warning("Database is back, closing the circuit")
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                if self.state == CLOSED:
+                    logger.warning("Database failed %d times in a row, opening the circuit", self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the bot is running degraded (open or probing)."""
+        return self.state != CLOSED
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+    slow_seconds=settings.CIRCUIT_SLOW_MS / 1000,
+)
+
+
+class CircuitBreakerTransport(httpx.BaseTransport):
+    """
+    httpx transport failing fast while the circuit is open.
+
+    Connection errors, timeouts and 5xx responses are raised as
+    DatabaseUnavailable. They and calls slower than CIRCUIT_SLOW_MS count as
+    failures, a slow response is still returned. An update running out of
+    its budget (DeadlineExceeded) passes through uncounted.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, circuit: CircuitBreaker = breaker):
+        self._transport = transport
+        self._circuit = circuit
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._circuit.allow_request():
+            raise CircuitOpen("Circuit breaker is open", request=request)
+
+        start = time.monotonic()
+        try:
+            response = self._transport.handle_request(request)
+        except DeadlineExceeded:
+            # The update ran out of time, the database didn't fail
+            raise
+        except httpx.TransportError as error:
+            self._circuit.record_failure()
+            raise DatabaseUnavailable(str(error) or type(error).__name__, request=request) from error
+
+        if response.status_code >= 500:
+            self._circuit.record_failure()
+            response.close()
+            raise DatabaseUnavailable(f"Database answered {response.status_code}", request=request)
+        if time.monotonic() - start > self._circuit.slow_seconds:
+            self._circuit.record_failure()
+        else:
+            self._circuit.record_success()
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
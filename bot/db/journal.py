@@ -0,0 +1,169 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from bot.db.circuit_breaker import DatabaseUnavailable
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Journaled write functions by name, called again on replay
+_operations = {}
+
+# Set inside a journaled call or a replay: nested journaled writes run
+# directly, only the outermost one is journaled
+_direct = contextvars.ContextVar("journal_direct", default=False)
+
+# Called with (operation, arguments by name) for every journaled write
+_listeners = []
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+class Journal:
+    """
+    Durable FIFO of writes the database could not take, in a local SQLite file.
+
+    WAL with synchronous=NORMAL: an append survives the process crashing,
+    only losing power can drop the last ones.
+    """
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS writes ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " operation TEXT NOT NULL,"
+            " args TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._pending = self._connection.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+
+    def append(self, operation: str, args: list, kwargs: dict) -> int:
+        """Add a write at the end of the journal. Returns its ID."""
+        data = json.dumps({"args": args, "kwargs": kwargs})
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO writes (operation, args, created_at) VALUES (?, ?, ?)",
+                (operation, data, time.time()),
+            )
+            self._pending += 1
+            return cursor.lastrowid
+
+    def peek(self, limit: int = 100) -> list:
+        """Get the oldest writes as (id, operation, args, kwargs)."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, operation, args FROM writes ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        writes = []
+        for row_id, operation, data in rows:
+            data = json.loads(data)
+            writes.append((row_id, operation, data["args"], data["kwargs"]))
+        return writes
+
+    def remove(self, write_id: int) -> None:
+        with self._lock:
+            if self._connection.execute("DELETE FROM writes WHERE id = ?", (write_id,)).rowcount:
+                self._pending -= 1
+
+    def __len__(self) -> int:
+        return self._pending
+
+
+def get_journal() -> Journal:
+    """Get the journal, opening JOURNAL_PATH on first use."""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = Journal(settings.JOURNAL_PATH)
+                if len(_journal):
+                    logger.warning("Journal %s holds %d writes to replay", settings.JOURNAL_PATH, len(_journal))
+    return _journal
+
+
+def journaled(func: Callable) -> Callable:
+    """
+    Journal a write instead of failing when the database is unavailable.
+
+    The write is also journaled while earlier writes wait for replay, so
+    writes always reach the database in order. A journaled call returns None,
+    listeners (add_journal_listener) show the write in cached views meanwhile.
+    Arguments must be JSON serializable, and the write idempotent: a replay
+    interrupted by a crash repeats the last write.
+    """
+    _operations[func.__name__] = func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _direct.get():
+            return func(*args, **kwargs)
+
+        journal = get_journal()
+        if not len(journal):
+            token = _direct.set(True)
+            try:
+                return func(*args, **kwargs)
+            except DatabaseUnavailable:
+                pass
+            finally:
+                _direct.reset(token)
+
+        journal.append(func.__name__, list(args), kwargs)
+        logger.warning("Database unavailable, journaled %s (%d waiting)", func.__name__, len(journal))
+        arguments = inspect.signature(func).bind(*args, **kwargs).arguments
+        for listener in _listeners:
+            try:
+                listener(func.__name__, arguments)
+            except Exception:
+                logger.exception("Journal listener failed")
+        return None
+
+    return wrapper
+
+
+def add_journal_listener(listener: Callable[[str, dict], None]) -> None:
+    """Call listener with (operation, arguments by name) of every write journaled."""
+    _listeners.append(listener)
+
+
+def replay_journal(limit: int = 100) -> Optional[int]:
+    """
+    Apply journaled writes oldest first. Blocking, run it in a worker thread.
+
+    Stops at the first write the database is unavailable for. A write failing
+    for another reason (rejected by the database) is dropped, it would block
+    every later one.
+
+    Returns:
+        int: Writes replayed, None if the database is still unavailable
+    """
+    journal = get_journal()
+    replayed = 0
+    token = _direct.set(True)
+    try:
+        for write_id, operation, args, kwargs in journal.peek(limit):
+            try:
+                _operations[operation](*args, **kwargs)
+            except DatabaseUnavailable:
+                return None
+            except Exception:
+                logger.exception("Dropping journaled write %s%s", operation, tuple(args))
+            journal.remove(write_id)
+            replayed += 1
+    finally:
+        _direct.reset(token)
+    if replayed:
+        logger.info("Replayed %d journaled writes, %d waiting", replayed, len(journal))
+    return replayed
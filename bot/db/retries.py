@@ -0,0 +1,200 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import httpx
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Monotonic time by which the current update must be done with the database
+_deadline = contextvars.ContextVar("db_deadline", default=None)
+
+# Set around hot reads that may be hedged
+_hedge = contextvars.ContextVar("db_hedge", default=False)
+
+# Set around writes that may be sent again after a failure
+_idempotent = contextvars.ContextVar("db_idempotent", default=False)
+
+# Second copies of slow hedged reads run here
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="db-hedge")
+
+# The request never reached the server, so resending it can't apply a write twice
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Reads are always safe to repeat, writes only when marked with idempotent()
+_READ_METHODS = {"GET", "HEAD"}
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """The update ran out of its database time budget, see deadline()."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Give the database calls inside this many seconds in total, None for no limit.
+
+    Replaces the enclosing budget instead of nesting in it, so a long handler
+    (import, export) can scope a budget of its own over part of its work.
+    """
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left of the current budget, None without one."""
+    end = _deadline.get()
+    return None if end is None else end - time.monotonic()
+
+
+@contextmanager
+def hedged() -> Iterator[None]:
+    """Mark the reads inside as hot: a read slower than HEDGE_AFTER_MS is sent a second time."""
+    token = _hedge.set(True)
+    try:
+        yield
+    finally:
+        _hedge.reset(token)
+
+
+@contextmanager
+def idempotent() -> Iterator[None]:
+    """
+    Mark the writes inside as safe to send again when an attempt fails.
+
+    Only for writes whose repeat changes nothing: absolute values that don't
+    depend on an earlier read, deletes, guarded updates, ignoring upserts.
+    Also works as a decorator.
+    """
+    token = _idempotent.set(True)
+    try:
+        yield
+    finally:
+        _idempotent.reset(token)
+
+
+def _on_event_loop() -> bool:
+    # The services are blocking: called from a handler they run on the event
+    # loop thread, called from asyncio.to_thread they don't
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    httpx transport bounding every database call by time.
+
+    A call gets DB_CALL_DEADLINE_MS in total, cut to what is left of the
+    update's budget (deadline()), each attempt the smaller of DB_TIMEOUT_MS
+    and what is left of that. Once the update's budget is spent calls fail
+    with DeadlineExceeded. Failed attempts (connection errors, timeouts, 5xx
+    answers) are retried up to DB_RETRIES times with full-jitter exponential
+    backoff when it is safe: the request never reached the server, it is a
+    read, or it was marked with idempotent(). Hedged GETs are sent a second
+    time when the first hasn't answered after HEDGE_AFTER_MS, the first
+    answer wins.
+
+    Handlers make their calls in worker threads (asyncio.to_thread). A call
+    made on the event loop thread itself never sleeps or waits on other
+    threads, a pause there would stall every update: only requests that
+    never reached the server are resent, right away, and reads are not hedged.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        now = time.monotonic()
+        end = now + settings.DB_CALL_DEADLINE_MS / 1000
+        update_end = _deadline.get()
+        if update_end is not None:
+            if update_end <= now:
+                raise DeadlineExceeded("Update deadline exceeded", request=request)
+            end = min(end, update_end)
+        on_loop = _on_event_loop()
+        hedge = _hedge.get() and not on_loop and request.method == "GET" and settings.HEDGE_AFTER_MS > 0
+        attempt = 0
+        while True:
+            attempt += 1
+            timeout = min(settings.DB_TIMEOUT_MS / 1000, end - time.monotonic())
+            request.extensions["timeout"] = {"connect": timeout, "read": timeout, "write": timeout, "pool": timeout}
+
+            try:
+                response = self._send_hedged(request) if hedge else self._transport.handle_request(request)
+            except httpx.TransportError as error:
+                if update_end is not None and isinstance(error, httpx.TimeoutException) and time.monotonic() >= update_end:
+                    # Cut short by the update's budget, not a sign the database is down
+                    raise DeadlineExceeded("Update deadline exceeded", request=request) from error
+                delay = self._retry_delay(request, attempt, end, not isinstance(error, _NOT_SENT), on_loop)
+                if delay is None:
+                    raise
+                failure = str(error) or type(error).__name__
+            else:
+                if response.status_code < 500:
+                    return response
+                delay = self._retry_delay(request, attempt, end, True, on_loop)
+                if delay is None:
+                    return response
+                response.close()
+                failure = f"status {response.status_code}"
+
+            logger.info("Retrying %s %s in %.0f ms: %s", request.method, request.url.path, delay * 1000, failure)
+            if delay:
+                time.sleep(delay)
+
+    def _retry_delay(self, request: httpx.Request, attempt: int, end: float, sent: bool, on_loop: bool) -> Optional[float]:
+        """Seconds to wait before the next attempt, None if the call must not be retried."""
+        if attempt > settings.DB_RETRIES:
+            return None
+        if sent and request.method not in _READ_METHODS and not _idempotent.get():
+            return None
+        if on_loop:
+            return None if sent else 0.0
+        delay = random.uniform(0, min(settings.DB_RETRY_MAX_BACKOFF_MS, settings.DB_RETRY_BACKOFF_MS * 2 ** (attempt - 1)) / 1000)
+        if time.monotonic() + delay >= end:
+            return None
+        return delay
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        response = self._transport.handle_request(request)
+        # Read here, so the winner is complete and the loser can be closed
+        response.read()
+        return response
+
+    def _send_hedged(self, request: httpx.Request) -> httpx.Response:
+        context = contextvars.copy_context()
+        first = _hedge_pool.submit(context.run, self._send, request)
+        done, _ = wait([first], timeout=settings.HEDGE_AFTER_MS / 1000)
+        if done:
+            return first.result()
+
+        second = _hedge_pool.submit(contextvars.copy_context().run, self._send, request)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        other = second if winner is first else first
+        if winner.exception() is not None:
+            # The other copy is the only chance left
+            return other.result()
+        other.add_done_callback(_close_response)
+        return winner.result()
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def _close_response(future) -> None:
+    if future.exception() is None:
+        future.result().close()
@@ -1,11 +1,56 @@
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING, Optional
+
 from config.settings import settings
 
-# Initialize Supabase client with service_role key
-# This bypasses RLS for bot operations
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Created on first use: importing supabase takes about a second (storage,
+# realtime, ...), and tooling importing the bot must not need credentials
+_client: Optional["Client"] = None
+_client_lock = threading.Lock()
+
+
+def _create_client() -> "Client":
+    import httpx
+    from supabase import create_client
+    from supabase.lib.client_options import SyncClientOptions
+
+    from bot.db.circuit_breaker import CircuitBreakerTransport
+    from bot.db.retries import RetryTransport
+    from bot.utils.tracing import TracingTransport
+
+    # Every database call goes through the tracing transport, so it shows up as
+    # a span of the update that made it, then the circuit breaker, which counts
+    # one outcome per call, and the retries and time limits of its attempts
+    http_client = httpx.Client(
+        transport=TracingTransport(CircuitBreakerTransport(RetryTransport(httpx.HTTPTransport(http2=True)))),
+        timeout=120,
+        follow_redirects=True,
+    )
+
+    # Initialize Supabase client with service_role key
+    # This bypasses RLS for bot operations
+    return create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY,
+        options=SyncClientOptions(httpx_client=http_client),
+    )
+
+
+def get_client() -> "Client":
+    """Get the Supabase client instance, creating it on first use."""
+    global _client
+    if _client is None:
+        # Worker threads may ask at the same time, only one creates it
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
 
 
-def get_client() -> Client:
-    """Get the Supabase client instance."""
-    return supabase
+def set_client(client) -> None:
+    """Replace the Supabase client (benchmarks swap in an in-memory fake)."""
+    global _client
+    _client = client
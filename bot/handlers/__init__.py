@@ -1,10 +1,18 @@
+from bot.handlers.recorder import register_recorder_handler
+from bot.handlers.dedup import register_dedup_handler
 from bot.handlers.commands import register_command_handlers
 from bot.handlers.messages import register_message_handlers
 from bot.handlers.callbacks import register_callback_handlers
+from bot.handlers.admin import register_admin_handlers
+from bot.handlers.errors import register_error_handler
 
 
 def register_all_handlers(application):
     """Register all handlers with the application."""
+    register_recorder_handler(application)
+    register_dedup_handler(application)
     register_command_handlers(application)
     register_message_handlers(application)
     register_callback_handlers(application)
+    register_admin_handlers(application)
+    register_error_handler(application)
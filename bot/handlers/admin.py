@@ -0,0 +1,94 @@
+from telegram import Update
+from telegram.ext import ContextTypes, CommandHandler
+
+from bot.utils import memory
+from bot.utils.profiling import configure_profiling, get_profiling_status
+from config.settings import settings
+
+PROFILE_USAGE = """Usage:
+/profile - show status
+/profile 0.05 - profile 5% of updates (or 5%)
+/profile 0.05 500 - ...and save those slower than 500 ms
+/profile off - stop profiling"""
+
+MEMORY_USAGE = """Usage:
+/memory - RSS, object counts, cache sizes (and top allocations when tracing)
+/memory start [frames] - start tracing allocations
+/memory snapshot - remember current allocations
+/memory diff - growth since the snapshot
+/memory stop - stop tracing"""
+
+# Telegram rejects longer messages
+MAX_MESSAGE_LENGTH = 4096
+
+
+def is_admin(update: Update) -> bool:
+    """Check whether the update comes from a user listed in ADMIN_TELEGRAM_IDS."""
+    return bool(update.effective_user) and update.effective_user.id in settings.ADMIN_TELEGRAM_IDS
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /profile [rate|off] [threshold_ms] - control the sampling profiler (admins only)."""
+    if not is_admin(update):
+        return
+    
+    args = context.args or []
+    try:
+        if args and args[0].lower() == "off":
+            status = configure_profiling(sample_rate=0)
+        elif args:
+            rate = float(args[0].rstrip("%")) / (100 if args[0].endswith("%") else 1)
+            threshold_ms = int(args[1]) if len(args) > 1 else None
+            status = configure_profiling(sample_rate=rate, threshold_ms=threshold_ms)
+        else:
+            status = get_profiling_status()
+    except ValueError:
+        await update.message.reply_text(PROFILE_USAGE)
+        return
+    
+    state = f"sampling {status['sample_rate']:.1%} of updates" if status["sample_rate"] else "off"
+    await update.message.reply_text(
+        f"Profiler: {state}\n"
+        f"Saving updates slower than {status['threshold_ms']} ms to {status['directory']}/\n"
+        f"Profiled {status['profiled']}, saved {status['saved']} since start"
+    )
+
+
+async def memory_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /memory [start|snapshot|diff|stop] - memory diagnostics (admins only)."""
+    if not is_admin(update):
+        return
+    
+    args = context.args or []
+    action = args[0].lower() if args else ""
+    try:
+        if not action:
+            text = memory.memory_report(context.application)
+        elif action == "start":
+            memory.start_tracing(int(args[1]) if len(args) > 1 else 1)
+            memory.take_baseline()
+            text = "Tracing allocations, snapshot taken. Use /memory diff later."
+        elif action == "snapshot":
+            if not memory.is_tracing():
+                text = "Allocation tracing is off (/memory start)"
+            else:
+                memory.take_baseline()
+                text = "Snapshot taken. Use /memory diff later."
+        elif action == "diff":
+            diff = memory.diff_since_baseline() if memory.is_tracing() else None
+            text = "Growth since snapshot:\n" + memory.format_diff(diff) if diff is not None else "No snapshot (/memory start)"
+        elif action == "stop":
+            memory.stop_tracing()
+            text = "Stopped tracing allocations."
+        else:
+            text = MEMORY_USAGE
+    except ValueError:
+        text = MEMORY_USAGE
+    
+    await update.message.reply_text(text[:MAX_MESSAGE_LENGTH])
+
+
+def register_admin_handlers(application) -> None:
+    """Register admin-only commands."""
+    application.add_handler(CommandHandler("profile", profile_command))
+    application.add_handler(CommandHandler("memory", memory_command))
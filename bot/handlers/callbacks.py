@@ -1,3 +1,5 @@
+import asyncio
+from typing import Optional
 from telegram import Update
 from telegram.ext import ContextTypes, CallbackQueryHandler
 
@@ -10,27 +12,72 @@ from bot.services.task_service import (
     complete_task,
     delete_task,
     update_task_shown,
+    shuffle_now_tasks,
     get_completed_tasks,
     get_completed_task_count,
+    update_tasks_category,
+    complete_tasks,
+    delete_tasks,
 )
-from bot.services.shuffle_service import get_shuffled_tasks
-from bot.utils.formatters import format_task_list, format_task_detail, format_settings, format_settings_now_limit, format_settings_theme, format_completed_list, format_settings_show_completed
-from bot.utils.keyboards import get_main_keyboard, get_task_keyboard, get_settings_keyboard, get_task_list_keyboard, get_settings_now_limit_keyboard, get_settings_theme_keyboard, get_completed_list_keyboard, get_settings_show_completed_keyboard
+from bot.services.shuffle_service import get_shuffled_tasks, get_rotation_tasks
+from bot.services.version_service import get_data_version
+from bot.utils.background import run_in_background, wait_for_pending
+from bot.utils.cache import TTLCache, register_cache
+from bot.utils.formatters import format_task_list, format_task_detail, format_completed_list
+from bot.utils.keyboards import get_main_keyboard, get_task_keyboard, get_task_list_keyboard, get_completed_list_keyboard, get_selection_keyboard
+from bot.utils.screens import get_settings_screen, normalize_theme, get_rendered_view, set_rendered_view
 from config.settings import settings
 
 
 # Track currently displayed tasks per user for shuffle diversity
 _user_current_display = {}
 
+# Multi-select state per user: {"category", "page", "task_ids", "selected"}
+_user_selection = TTLCache(maxsize=1000, ttl=1800)
+
+# Recently rendered state, so task actions can update the screen optimistically
+_recent_tasks = TTLCache(maxsize=5000, ttl=300)  # (user_id, task_id) -> task
+_user_last_list = TTLCache(maxsize=1000, ttl=300)  # user_id -> last rendered list
+
+# Prefetched rows, keyed by the data version they were read at: after a list
+# the user usually opens one of its tasks or the next page
+_prefetched_tasks = TTLCache(maxsize=10000, ttl=120)  # (user_id, version, task_id) -> task
+_prefetched_pages = TTLCache(maxsize=2000, ttl=120)  # (user_id, version, category, page) -> tasks
+_prefetching = {}  # (user_id, version, category, page) -> fetch in progress
+
+# Rotation mode position per user, persisted to the settings only when it wraps
+_rotation_cursors = TTLCache(maxsize=10000, ttl=86400)  # user_id -> (cursor, saved_at)
+
+# Small NOW lists wrap every few views, save their rotation at most this often (seconds)
+ROTATION_SAVE_INTERVAL = 3600
+
+register_cache("user_current_display", _user_current_display)
+register_cache("user_selection", _user_selection)
+register_cache("recent_tasks", _recent_tasks)
+register_cache("user_last_list", _user_last_list)
+register_cache("rotation_cursors", _rotation_cursors)
+register_cache("prefetched_tasks", _prefetched_tasks)
+register_cache("prefetched_pages", _prefetched_pages)
+
+# Seconds the completion celebration stays on screen
+CELEBRATION_SECONDS = 2
+
+NOTICE_SAVE_FAILED = "⚠️ Couldn't save that change. Please try again."
+
 
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle all inline button callbacks."""
     query = update.callback_query
-    await query.answer()
+    data = query.data
+    # Bulk actions answer themselves, with a toast when nothing is selected
+    if not data.startswith("bulk_"):
+        await query.answer()
     
     telegram_id = update.effective_user.id
-    user = get_or_create_user(telegram_id)
-    data = query.data
+    user = await asyncio.to_thread(get_or_create_user, telegram_id)
+    
+    # Read-your-writes: let any optimistic write from a previous tap land first
+    await wait_for_pending(user["id"])
     
     # View navigation
     if data == "view_now":
@@ -63,6 +110,24 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         task_id = data.replace("delete_", "")
         await handle_delete_task(query, user, task_id)
     
+    # Multi-select mode
+    elif data.startswith("select_"):
+        # Format: select_{category}_{page}
+        _, category, page = data.split("_")
+        await show_select_mode(query, user, category, int(page))
+    elif data == "sel_all":
+        await handle_toggle_selection(query, user, None)
+    elif data.startswith("sel_"):
+        task_id = data.replace("sel_", "")
+        await handle_toggle_selection(query, user, task_id)
+    elif data == "bulk_complete":
+        await handle_bulk_action(query, user, "complete")
+    elif data == "bulk_delete":
+        await handle_bulk_action(query, user, "delete")
+    elif data.startswith("bulk_move_"):
+        target_category = data.replace("bulk_move_", "")
+        await handle_bulk_action(query, user, "move", target_category)
+    
     # Settings
     elif data == "settings":
         await show_settings(query, user)
@@ -101,7 +166,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         pass
 
 
-async def show_category_view(query, user: dict, category: str, shuffle: bool = False, page: int = 0) -> None:
+async def show_category_view(query, user: dict, category: str, shuffle: bool = False, page: int = 0, notice: Optional[str] = None) -> None:
     """Show tasks for a specific category.
     
     Args:
@@ -110,56 +175,120 @@ async def show_category_view(query, user: dict, category: str, shuffle: bool = F
         category: Task category (now, soon, someday)
         shuffle: Whether to shuffle NOW tasks
         page: Page number for pagination (0-indexed, for soon/someday)
+        notice: Optional line shown above the list (e.g. a failed save)
     """
-    now_limit = get_user_setting(user, "now_display_limit", settings.DEFAULT_NOW_LIMIT)
-    theme = get_user_theme(user)
-    show_completed = bool(get_user_setting(user, "show_completed_button", False))
+    # Read before fetching, anything cached under it is what this version held
+    version = get_data_version(user["id"])
     
-    counts = get_task_counts(user["id"])
+    # Soon/Someday pages only change when the user's data does, NOW is reshuffled every time
+    if category != "now":
+        cached = get_rendered_view(user["id"], version, category, page, get_user_theme(user))
+        if cached:
+            _prefetch(user["id"], version, category, cached["page"], cached["tasks"], cached["counts"].get(category, 0))
+            await _show_rendered_list(query, user, cached, notice=notice)
+            return
     
     # Apply shuffle for NOW tasks
     if category == "now":
-        tasks = get_tasks_by_category(user["id"], category)
-        # Get current display tracking for this user
-        current_display = _user_current_display.get(user["id"], [])
-        
-        if shuffle:
-            # Use enhanced shuffle with current display exclusion
-            display_tasks = get_shuffled_tasks(
-                tasks, 
-                now_limit or settings.DEFAULT_NOW_LIMIT, 
-                currently_displayed=current_display
-            )
+        # Shuffle excludes what is on screen, the initial view starts fresh.
+        # The pick doesn't depend on the counts, read both side by side.
+        counts, display_tasks = await asyncio.gather(
+            asyncio.to_thread(get_task_counts, user["id"]),
+            asyncio.to_thread(select_now_tasks, user, reshuffle=shuffle, exclude_current=shuffle),
+        )
+    else:
+        # For soon/someday, use pagination (clamped in case tasks were removed)
+        counts = await asyncio.to_thread(get_task_counts, user["id"])
+        total_count = counts.get(category, 0)
+        page = min(page, max(0, (total_count - 1) // settings.DEFAULT_PAGE_SIZE))
+        display_tasks = await _get_page(user["id"], version, category, page)
+    
+    # Started before the screen update, so the next page loads while Telegram answers
+    _prefetch(user["id"], version, category, page, display_tasks, counts.get(category, 0))
+    await _render_task_list(query, user, category, display_tasks, counts, page=page, notice=notice,
+                            version=None if category == "now" else version)
+
+
+def select_now_tasks(user: dict, reshuffle: bool = False, exclude_current: bool = False, record_shown: bool = True) -> list:
+    """Pick the NOW tasks to display and remember them for the next shuffle.
+    
+    Blocking, run it in a worker thread.
+    
+    Args:
+        user: User dict
+        reshuffle: Shuffle even when all tasks fit on screen
+        exclude_current: Avoid the tasks currently on screen if possible
+        record_shown: Update shown stats of the picked tasks
+    """
+    now_limit = get_user_setting(user, "now_display_limit", settings.DEFAULT_NOW_LIMIT) or settings.DEFAULT_NOW_LIMIT
+    current_display = _user_current_display.get(user["id"], []) if exclude_current else []
+    
+    if get_user_setting(user, "shuffle_mode") == "rotation":
+        # Walks a fixed per-user order instead, no shown stats to write
+        tasks = get_tasks_by_category(user["id"], "now")
+        display_tasks = _next_rotation_tasks(user, tasks, now_limit)
+    elif settings.SERVER_SIDE_SHUFFLE:
+        # Selection and shown stats in one round trip, only picked rows come back
+        display_tasks = shuffle_now_tasks(user["id"], now_limit, exclude=current_display, record_shown=record_shown)
+    else:
+        tasks = get_tasks_by_category(user["id"], "now")
+        if reshuffle or len(tasks) > now_limit:
+            display_tasks = get_shuffled_tasks(tasks, now_limit, currently_displayed=current_display)
         else:
-            # For initial view, use basic shuffle or take first tasks
-            if len(tasks) > now_limit:
-                display_tasks = get_shuffled_tasks(
-                    tasks, 
-                    now_limit or settings.DEFAULT_NOW_LIMIT, 
-                    currently_displayed=[]
-                )
-            else:
-                display_tasks = tasks[:now_limit or settings.DEFAULT_NOW_LIMIT]
+            display_tasks = tasks[:now_limit]
         
         # Update shown stats for displayed tasks
-        for task in display_tasks:
-            update_task_shown(task["id"])
-        
-        # Store current display for next shuffle
-        _user_current_display[user["id"]] = [t["id"] for t in display_tasks]
-        limit = now_limit
-        total_count = counts.get(category, 0)
-    else:
-        # For soon/someday, use pagination
-        offset = page * settings.DEFAULT_PAGE_SIZE
-        display_tasks = get_tasks_by_category(
-            user["id"], 
-            category, 
-            limit=settings.DEFAULT_PAGE_SIZE, 
-            offset=offset
-        )
-        limit = None
-        total_count = counts.get(category, 0)
+        if record_shown:
+            for task in display_tasks:
+                update_task_shown(task["id"])
+    
+    # Store current display for next shuffle
+    _user_current_display[user["id"]] = [t["id"] for t in display_tasks]
+    return display_tasks
+
+
+def _next_rotation_tasks(user: dict, tasks: list, limit: int) -> list:
+    """Advance the user's rotation and return the tasks to display."""
+    import time
+    
+    user_settings = user.get("settings", {}) or {}
+    cursor, saved_at = _rotation_cursors.get(user["id"]) or (user_settings.get("rotation_cursor"), None)
+    
+    display_tasks, new_cursor = get_rotation_tasks(tasks, limit, seed=user["id"], cursor=cursor)
+    
+    # Only a wrap is persisted, every other view stays a pure read. After a
+    # restart the rotation resumes from the last saved wrap.
+    wrapped = new_cursor["epoch"] != (cursor or {}).get("epoch", 0)
+    if wrapped and (saved_at is None or time.monotonic() - saved_at >= ROTATION_SAVE_INTERVAL):
+        user_settings = {**user_settings, "rotation_cursor": new_cursor}
+        update_user_settings(user["id"], user_settings)
+        user["settings"] = user_settings
+        saved_at = time.monotonic()
+    
+    _rotation_cursors.set(user["id"], (new_cursor, saved_at))
+    return display_tasks
+
+
+async def _render_task_list(query, user: dict, category: str, display_tasks: list, counts: dict, page: int = 0, notice: Optional[str] = None, version: Optional[int] = None) -> None:
+    """Render an already-fetched task list and remember it for optimistic updates.
+    
+    Pass the data version read before fetching to cache the rendered page.
+    """
+    now_limit = get_user_setting(user, "now_display_limit", settings.DEFAULT_NOW_LIMIT)
+    theme = get_user_theme(user)
+    show_completed = bool(get_user_setting(user, "show_completed_button", False))
+    
+    limit = now_limit if category == "now" else None
+    total_count = counts.get(category, 0)
+    
+    # Keep what is on screen so actions on it can render without a read
+    _remember_tasks(user["id"], display_tasks)
+    _user_last_list.set(user["id"], {
+        "category": category,
+        "page": page,
+        "tasks": display_tasks,
+        "counts": counts,
+    })
     
     message, parse_mode = format_task_list(display_tasks, category, counts, limit=limit, theme=theme, page=page)
     keyboard = get_task_list_keyboard(
@@ -173,37 +302,163 @@ async def show_category_view(query, user: dict, category: str, shuffle: bool = F
         page_size=settings.DEFAULT_PAGE_SIZE
     )
     
+    if version is not None:
+        set_rendered_view(user["id"], version, category, page, theme, {
+            "category": category,
+            "page": page,
+            "tasks": display_tasks,
+            "counts": counts,
+            "message": message,
+            "parse_mode": parse_mode,
+            "keyboard": keyboard,
+        })
+    
+    if notice:
+        message = f"{notice}\n\n{message}"
+    
     await query.edit_message_text(message, reply_markup=keyboard, parse_mode=parse_mode)
 
 
-async def show_task_detail(query, user: dict, task_id: str) -> None:
+async def _show_rendered_list(query, user: dict, view: dict, notice: Optional[str] = None) -> None:
+    """Show a cached list page, restoring the state a fresh render would leave."""
+    _remember_tasks(user["id"], view["tasks"])
+    _user_last_list.set(user["id"], {
+        "category": view["category"],
+        "page": view["page"],
+        "tasks": view["tasks"],
+        "counts": view["counts"],
+    })
+    
+    message = view["message"]
+    if notice:
+        message = f"{notice}\n\n{message}"
+    
+    await query.edit_message_text(message, reply_markup=view["keyboard"], parse_mode=view["parse_mode"])
+
+
+async def show_task_detail(query, user: dict, task_id: str, notice: Optional[str] = None) -> None:
     """Show detail view for a specific task."""
-    task = get_task_by_id(task_id)
-    theme = get_user_theme(user)
+    task = _prefetched_tasks.get((user["id"], get_data_version(user["id"]), task_id))
+    if task is None:
+        task = await asyncio.to_thread(get_task_by_id, task_id)
     
     if not task:
         await query.edit_message_text("Task not found.")
         return
     
+    _remember_tasks(user["id"], [task])
+    await _render_task_detail(query, user, task, notice=notice)
+
+
+async def _render_task_detail(query, user: dict, task: dict, notice: Optional[str] = None) -> None:
+    """Render the detail view for an already-fetched task."""
+    theme = get_user_theme(user)
+    
     message, parse_mode = format_task_detail(task, theme=theme)
-    keyboard = get_task_keyboard(task_id, task["category"])
+    keyboard = get_task_keyboard(task["id"], task["category"])
+    
+    if notice:
+        message = f"{notice}\n\n{message}"
     
     await query.edit_message_text(message, reply_markup=keyboard, parse_mode=parse_mode)
 
 
+def _prefetch(user_id: str, version: int, category: str, page: int, tasks: list, total_count: int) -> None:
+    """Keep the rows of a rendered list for detail views and start fetching its next page.
+    
+    Args:
+        user_id: Owner of the tasks
+        version: Data version read before the list was fetched
+        category: now, soon, someday or completed
+        page: Page on screen
+        tasks: Rows on screen
+        total_count: Tasks in the list, to know whether there is a next page
+    """
+    for task in tasks:
+        _prefetched_tasks.set((user_id, version, task["id"]), task)
+    
+    next_page = page + 1
+    key = (user_id, version, category, next_page)
+    if (
+        not settings.PREFETCH_NEXT_PAGE
+        or category == "now"
+        or next_page * settings.DEFAULT_PAGE_SIZE >= total_count
+        or key in _prefetching
+        or key in _prefetched_pages
+    ):
+        return
+    
+    fetch = asyncio.create_task(asyncio.to_thread(_fetch_page, user_id, category, next_page))
+    _prefetching[key] = fetch
+    fetch.add_done_callback(lambda done: _store_prefetched(key, done))
+
+
+def _store_prefetched(key: tuple, fetch) -> None:
+    del _prefetching[key]
+    if not fetch.cancelled() and fetch.exception() is None:
+        _prefetched_pages.set(key, fetch.result())
+
+
+def _fetch_page(user_id: str, category: str, page: int) -> list:
+    offset = page * settings.DEFAULT_PAGE_SIZE
+    if category == "completed":
+        return get_completed_tasks(user_id, limit=settings.DEFAULT_PAGE_SIZE, offset=offset)
+    return get_tasks_by_category(user_id, category, limit=settings.DEFAULT_PAGE_SIZE, offset=offset)
+
+
+async def _get_page(user_id: str, version: int, category: str, page: int) -> list:
+    """Get a list page, prefetched if possible (waiting for a prefetch in progress)."""
+    key = (user_id, version, category, page)
+    fetch = _prefetching.get(key)
+    if fetch:
+        try:
+            return list(await asyncio.shield(fetch))
+        except Exception:
+            pass  # Fetched again below
+    
+    prefetched = _prefetched_pages.get(key)
+    if prefetched is not None:
+        return list(prefetched)
+    return await asyncio.to_thread(_fetch_page, user_id, category, page)
+
+
+def _remember_tasks(user_id: str, tasks: list) -> None:
+    """Cache full task rows the user has just seen."""
+    for task in tasks:
+        _recent_tasks.set((user_id, task["id"]), task)
+
+
+def forget_recent_task(user_id: str, task_id: str) -> None:
+    """Drop a task the user has seen, after a change the cached row doesn't show."""
+    _recent_tasks.pop((user_id, task_id))
+
+
+def _get_optimistic_task(user_id: str, task_id: str) -> Optional[dict]:
+    """Get a recently seen task for an optimistic update, or None to take the normal path."""
+    if not settings.OPTIMISTIC_UI:
+        return None
+    return _recent_tasks.get((user_id, task_id))
+
+
 async def handle_complete_task(query, user: dict, task_id: str) -> None:
     """Mark a task as completed with playful celebration."""
-    import asyncio
     import random
     
-    task = get_task_by_id(task_id)
-    if not task:
-        await query.edit_message_text("Task not found.")
-        return
-    
+    task = _get_optimistic_task(user["id"], task_id)
+    if task:
+        # Optimistic: celebrate right away and save while the celebration is on screen
+        write = run_in_background(user["id"], complete_task, user["id"], task_id)
+    else:
+        task = await asyncio.to_thread(get_task_by_id, task_id)
+        if not task:
+            await query.edit_message_text("Task not found.")
+            return
+        await asyncio.to_thread(complete_task, user["id"], task_id)
+        write = None
+    
+    _recent_tasks.pop((user["id"], task_id))
     category = task["category"]
     task_content = task["content"]
-    complete_task(task_id)
     
     # Playful celebration messages
     celebrations = [
@@ -222,73 +477,203 @@ async def handle_complete_task(query, user: dict, task_id: str) -> None:
     await query.edit_message_text(f"✨ {celebration}\n📝 {task_content}")
     
     # Wait 2 seconds then return to category view
-    await asyncio.sleep(2)
+    await asyncio.sleep(CELEBRATION_SECONDS)
+    if write is not None and not await write:
+        await show_category_view(query, user, category, notice=NOTICE_SAVE_FAILED)
+        return
     await show_category_view(query, user, category)
 
 
 async def handle_move_task(query, user: dict, task_id: str, target_category: str) -> None:
     """Move a task to a specific category."""
-    task = get_task_by_id(task_id)
+    task = _get_optimistic_task(user["id"], task_id)
+    if task and target_category in ("now", "soon", "someday"):
+        # Optimistic: show the moved task right away, save in the background
+        moved_task = {**task, "category": target_category}
+        _remember_tasks(user["id"], [moved_task])
+        await _render_task_detail(query, user, moved_task)
+        
+        async def reconcile():
+            _recent_tasks.pop((user["id"], task_id))
+            await show_task_detail(query, user, task_id, notice=NOTICE_SAVE_FAILED)
+        
+        run_in_background(user["id"], update_task_category, user["id"], task_id, target_category, on_error=reconcile)
+        return
+    
+    task = await asyncio.to_thread(get_task_by_id, task_id)
     if not task:
         await query.edit_message_text("Task not found.")
         return
     
     if target_category in ("now", "soon", "someday"):
-        update_task_category(task_id, target_category)
+        await asyncio.to_thread(update_task_category, user["id"], task_id, target_category)
         await show_task_detail(query, user, task_id)
 
 
 async def handle_delete_task(query, user: dict, task_id: str) -> None:
     """Delete a task permanently."""
-    task = get_task_by_id(task_id)
+    task = _get_optimistic_task(user["id"], task_id)
+    last_list = _user_last_list.get(user["id"])
+    if task and last_list and last_list["category"] == task["category"]:
+        # Optimistic: re-render the last list without the task, delete in the background
+        category = task["category"]
+        display_tasks = [t for t in last_list["tasks"] if t["id"] != task_id]
+        counts = dict(last_list["counts"])
+        counts[category] = max(0, counts.get(category, 0) - 1)
+        
+        _recent_tasks.pop((user["id"], task_id))
+        if category == "now":
+            _user_current_display[user["id"]] = [t["id"] for t in display_tasks]
+        await _render_task_list(query, user, category, display_tasks, counts, page=last_list["page"])
+        
+        async def reconcile():
+            await show_category_view(query, user, category, page=last_list["page"], notice=NOTICE_SAVE_FAILED)
+        
+        run_in_background(user["id"], delete_task, user["id"], task_id, on_error=reconcile)
+        return
+    
+    task = await asyncio.to_thread(get_task_by_id, task_id)
     if not task:
         await query.edit_message_text("Task not found.")
         return
     
     category = task["category"]
-    delete_task(task_id)
+    await asyncio.to_thread(delete_task, user["id"], task_id)
     
     # Return to category view
     await show_category_view(query, user, category)
 
 
+async def show_select_mode(query, user: dict, category: str, page: int) -> None:
+    """Switch a Soon/Someday/Completed list page into multi-select mode."""
+    offset = page * settings.DEFAULT_PAGE_SIZE
+    
+    if category == "completed":
+        # Completed list text has no numbers, re-render it numbered
+        theme = get_user_theme(user)
+        total_count, tasks = await asyncio.gather(
+            asyncio.to_thread(get_completed_task_count, user["id"]),
+            asyncio.to_thread(get_completed_tasks, user["id"], limit=settings.DEFAULT_PAGE_SIZE, offset=offset),
+        )
+        message, parse_mode = format_completed_list(tasks, total_count, theme=theme, page=page, numbered=True)
+    elif category in ("soon", "someday"):
+        # List text already numbers the tasks, only the keyboard changes
+        tasks = await asyncio.to_thread(get_tasks_by_category, user["id"], category, limit=settings.DEFAULT_PAGE_SIZE, offset=offset)
+        message = None
+    else:
+        return
+    
+    task_ids = [t["id"] for t in tasks]
+    _user_selection[user["id"]] = {
+        "category": category,
+        "page": page,
+        "task_ids": task_ids,
+        "selected": set(),
+    }
+    keyboard = get_selection_keyboard(task_ids, category, set(), page=page)
+    
+    if message is None:
+        await query.edit_message_reply_markup(reply_markup=keyboard)
+    else:
+        await query.edit_message_text(message, reply_markup=keyboard, parse_mode=parse_mode)
+
+
+async def handle_toggle_selection(query, user: dict, task_id: Optional[str]) -> None:
+    """Toggle one task (or all tasks when task_id is None) in multi-select mode.
+    
+    Only the keyboard is re-rendered, so toggling never touches the database.
+    """
+    selection = _user_selection.get(user["id"])
+    if not selection:
+        return
+    
+    selected = selection["selected"]
+    if task_id is None:
+        if len(selected) == len(selection["task_ids"]):
+            selected.clear()
+        else:
+            selected.update(selection["task_ids"])
+    elif task_id in selected:
+        selected.discard(task_id)
+    elif task_id in selection["task_ids"]:
+        selected.add(task_id)
+    else:
+        return
+    
+    keyboard = get_selection_keyboard(
+        selection["task_ids"],
+        selection["category"],
+        selected,
+        page=selection["page"]
+    )
+    await query.edit_message_reply_markup(reply_markup=keyboard)
+
+
+async def handle_bulk_action(query, user: dict, action: str, target_category: Optional[str] = None) -> None:
+    """Apply complete/move/delete to all selected tasks with a single write."""
+    selection = _user_selection.get(user["id"])
+    if not selection or not selection["selected"]:
+        await query.answer("Nothing selected")
+        return
+    await query.answer()
+    
+    category = selection["category"]
+    task_ids = [t for t in selection["task_ids"] if t in selection["selected"]]
+    
+    if action == "complete" and category != "completed":
+        await asyncio.to_thread(complete_tasks, user["id"], task_ids)
+    elif action == "move" and category != "completed" and target_category in ("now", "soon", "someday"):
+        await asyncio.to_thread(update_tasks_category, user["id"], task_ids, target_category)
+    elif action == "delete":
+        await asyncio.to_thread(delete_tasks, user["id"], task_ids)
+    else:
+        return
+    
+    _user_selection.pop(user["id"])
+    for task_id in task_ids:
+        _recent_tasks.pop((user["id"], task_id))
+    
+    # Return to the same page of the list
+    if category == "completed":
+        await show_completed_list(query, user, page=selection["page"])
+    else:
+        await show_category_view(query, user, category, page=selection["page"])
+
+
 async def show_settings(query, user: dict) -> None:
     """Show settings main menu with category selection."""
-    theme = get_user_theme(user)
-    message, parse_mode = format_settings(user, theme=theme)
-    keyboard = get_settings_keyboard()
+    message, parse_mode, keyboard = get_settings_screen("settings", get_user_theme(user))
     
     await query.edit_message_text(message, reply_markup=keyboard, parse_mode=parse_mode)
 
 
 async def show_settings_now_limit(query, user: dict) -> None:
     """Show NOW display limit settings view."""
-    theme = get_user_theme(user)
     now_limit = get_user_setting(user, "now_display_limit", settings.DEFAULT_NOW_LIMIT)
     
-    message, parse_mode = format_settings_now_limit(user, theme=theme)
-    keyboard = get_settings_now_limit_keyboard(now_limit or settings.DEFAULT_NOW_LIMIT)
+    message, parse_mode, keyboard = get_settings_screen(
+        "now_limit", get_user_theme(user), now_limit or settings.DEFAULT_NOW_LIMIT
+    )
     
     await query.edit_message_text(message, reply_markup=keyboard, parse_mode=parse_mode)
 
 
 async def show_settings_theme(query, user: dict) -> None:
     """Show theme selection settings view."""
-    theme = get_user_theme(user)
+    theme = normalize_theme(get_user_theme(user))
     
-    message, parse_mode = format_settings_theme(theme, theme=theme)
-    keyboard = get_settings_theme_keyboard(theme)
+    message, parse_mode, keyboard = get_settings_screen("theme", theme, theme)
     
     await query.edit_message_text(message, reply_markup=keyboard, parse_mode=parse_mode)
 
 
 async def show_settings_show_completed(query, user: dict) -> None:
     """Show the show completed button settings view."""
-    theme = get_user_theme(user)
     is_enabled = get_user_setting(user, "show_completed_button", False)
     
-    message, parse_mode = format_settings_show_completed(bool(is_enabled), theme=theme)
-    keyboard = get_settings_show_completed_keyboard(bool(is_enabled))
+    message, parse_mode, keyboard = get_settings_screen(
+        "show_completed", get_user_theme(user), bool(is_enabled)
+    )
     
     await query.edit_message_text(message, reply_markup=keyboard, parse_mode=parse_mode)
 
@@ -302,19 +687,22 @@ async def show_completed_list(query, user: dict, page: int = 0) -> None:
         page: Page number for pagination (0-indexed)
     """
     theme = get_user_theme(user)
+    version = get_data_version(user["id"])
     
     # Get total count first
-    total_count = get_completed_task_count(user["id"])
+    total_count = await asyncio.to_thread(get_completed_task_count, user["id"])
+    page = min(page, max(0, (total_count - 1) // settings.DEFAULT_PAGE_SIZE))
     
     # Get completed tasks for this page (most recent first)
-    offset = page * settings.DEFAULT_PAGE_SIZE
-    tasks = get_completed_tasks(user["id"], limit=settings.DEFAULT_PAGE_SIZE, offset=offset)
+    tasks = await _get_page(user["id"], version, "completed", page)
+    _prefetch(user["id"], version, "completed", page, tasks, total_count)
     
     message, parse_mode = format_completed_list(tasks, total_count, theme=theme, page=page)
     keyboard = get_completed_list_keyboard(
         page=page,
         total_count=total_count,
-        page_size=settings.DEFAULT_PAGE_SIZE
+        page_size=settings.DEFAULT_PAGE_SIZE,
+        selectable=bool(tasks)
     )
     
     await query.edit_message_text(message, reply_markup=keyboard, parse_mode=parse_mode)
@@ -322,10 +710,10 @@ async def show_completed_list(query, user: dict, page: int = 0) -> None:
 
 async def handle_set_limit(query, user: dict, limit: int) -> None:
     """Update NOW display limit setting."""
-    current_settings = user.get("settings", {}) or {}
+    current_settings = dict(user.get("settings") or {})
     current_settings["now_display_limit"] = limit
     
-    update_user_settings(user["id"], current_settings)
+    await asyncio.to_thread(update_user_settings, user["id"], current_settings)
     
     # Refresh user data and show updated NOW limit settings
     user["settings"] = current_settings
@@ -334,10 +722,10 @@ async def handle_set_limit(query, user: dict, limit: int) -> None:
 
 async def handle_set_theme(query, user: dict, theme_id: str) -> None:
     """Update theme setting."""
-    current_settings = user.get("settings", {}) or {}
+    current_settings = dict(user.get("settings") or {})
     current_settings["theme"] = theme_id
     
-    update_user_settings(user["id"], current_settings)
+    await asyncio.to_thread(update_user_settings, user["id"], current_settings)
     
     # Refresh user data and show updated theme settings
     user["settings"] = current_settings
@@ -346,10 +734,10 @@ async def handle_set_theme(query, user: dict, theme_id: str) -> None:
 
 async def handle_set_show_completed(query, user: dict, is_enabled: bool) -> None:
     """Update show completed button setting."""
-    current_settings = user.get("settings", {}) or {}
+    current_settings = dict(user.get("settings") or {})
     current_settings["show_completed_button"] = is_enabled
     
-    update_user_settings(user["id"], current_settings)
+    await asyncio.to_thread(update_user_settings, user["id"], current_settings)
     
     # Refresh user data and show updated settings
     user["settings"] = current_settings
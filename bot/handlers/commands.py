@@ -1,16 +1,23 @@
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timezone
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
 
 from bot.services.user_service import get_or_create_user, get_user_setting, get_user_theme
-from bot.services.task_service import get_tasks_by_category, get_task_counts
-from bot.services.shuffle_service import get_shuffled_tasks
+from bot.services.task_service import get_task_counts
+from bot.services.export_service import EXPORT_FORMATS, export_tasks
+from bot.db.retries import DeadlineExceeded, deadline
 from bot.utils.formatters import format_task_list
 from bot.utils.keyboards import get_main_keyboard, get_task_list_keyboard
 from config.settings import settings
 
 
-# Import current display tracking from callbacks
-from bot.handlers.callbacks import _user_current_display
+NOTICE_EXPORT_TIMEOUT = "⏳ Your export took too long and was stopped. Please try again in a moment."
+
+# NOW selection is shared with the inline views
+from bot.handlers.callbacks import select_now_tasks
 
 
 WELCOME_MESSAGE = """🎯 Someday
@@ -27,8 +34,11 @@ How it works:
 
 COMMANDS
 /now · View your tasks
+/export · Download all tasks (csv or json)
 /start · Show this help
 
+Send a .txt, .csv or .json file to import tasks.
+
 Send me your first task to begin.
 """
 
@@ -38,7 +48,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     telegram_id = update.effective_user.id
     
     # Ensure user exists in database
-    get_or_create_user(telegram_id)
+    await asyncio.to_thread(get_or_create_user, telegram_id)
     
     await update.message.reply_text(WELCOME_MESSAGE)
 
@@ -47,7 +57,7 @@ async def now_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     """Handle /now command - show NOW tasks with navigation."""
     telegram_id = update.effective_user.id
     chat_id = update.effective_chat.id
-    user = get_or_create_user(telegram_id)
+    user = await asyncio.to_thread(get_or_create_user, telegram_id)
     
     # Delete previous /now message to prevent clutter
     if context.user_data.get("last_now_message_id"):
@@ -65,23 +75,11 @@ async def now_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     theme = get_user_theme(user)
     show_completed = bool(get_user_setting(user, "show_completed_button", False))
     
-    # Get tasks and counts
-    now_tasks = get_tasks_by_category(user["id"], "now")
-    counts = get_task_counts(user["id"])
-    
-    # Apply enhanced shuffle with current display tracking
-    current_display = _user_current_display.get(user["id"], [])
-    if len(now_tasks) > now_limit:
-        shuffled_tasks = get_shuffled_tasks(
-            now_tasks, 
-            now_limit or settings.DEFAULT_NOW_LIMIT, 
-            currently_displayed=current_display
-        )
-    else:
-        shuffled_tasks = now_tasks[:now_limit or settings.DEFAULT_NOW_LIMIT]
-    
-    # Store current display for tracking
-    _user_current_display[user["id"]] = [t["id"] for t in shuffled_tasks]
+    # Get tasks and counts side by side, avoiding the tasks shown last time
+    shuffled_tasks, counts = await asyncio.gather(
+        asyncio.to_thread(select_now_tasks, user, exclude_current=True, record_shown=False),
+        asyncio.to_thread(get_task_counts, user["id"]),
+    )
     
     # Format message with theme
     message, parse_mode = format_task_list(shuffled_tasks, "now", counts, limit=now_limit, theme=theme)
@@ -94,8 +92,44 @@ async def now_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     context.user_data["last_now_message_id"] = sent_message.message_id
 
 
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /export [csv|json] - send all active and completed tasks as a file."""
+    telegram_id = update.effective_user.id
+    user = await asyncio.to_thread(get_or_create_user, telegram_id)
+    
+    export_format = (context.args[0].lower() if context.args else "csv").lstrip(".")
+    if export_format not in EXPORT_FORMATS:
+        await update.message.reply_text("Usage: /export csv or /export json")
+        return
+    
+    date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    filename = f"someday-tasks-{date}.{export_format}"
+    
+    # Stream pages straight into a temp file off the loop, then upload it from disk.
+    # A long history gets its own budget instead of the per-update one.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, filename)
+        try:
+            with deadline(settings.EXPORT_DEADLINE_MS / 1000):
+                count = await asyncio.to_thread(
+                    export_tasks, path, user["id"], export_format, settings.EXPORT_PAGE_SIZE
+                )
+        except DeadlineExceeded:
+            await update.message.reply_text(NOTICE_EXPORT_TIMEOUT)
+            return
+        
+        task_text = "task" if count == 1 else "tasks"
+        with open(path, "rb") as f:
+            await update.message.reply_document(
+                document=f,
+                filename=filename,
+                caption=f"📤 {count} {task_text} exported"
+            )
+
+
 def register_command_handlers(application) -> None:
     """Register all command handlers."""
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("help", start_command))  # Undocumented fallback
     application.add_handler(CommandHandler("now", now_command))
+    application.add_handler(CommandHandler("export", export_command))
@@ -0,0 +1,35 @@
+import logging
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes, TypeHandler
+
+from bot.utils.cache import TTLCache, register_cache
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# update_ids being handled or handled recently. Telegram redelivers an update
+# when the webhook is slow to answer, and a retry must not create or complete
+# anything twice. An update whose handling failed is forgotten again (see
+# forget_update), so its redelivery gets another try.
+_seen_updates = TTLCache(maxsize=settings.UPDATE_DEDUP_WINDOW, ttl=3600)
+register_cache("seen_updates", _seen_updates)
+
+
+async def drop_duplicate_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Stop processing updates that are being or have already been handled."""
+    if update.update_id in _seen_updates:
+        logger.info("Dropping duplicate update %s", update.update_id)
+        raise ApplicationHandlerStop
+    
+    _seen_updates.set(update.update_id, True)
+
+
+def forget_update(update: object) -> None:
+    """Let a redelivery of an update whose handling failed be handled again."""
+    if isinstance(update, Update):
+        _seen_updates.pop(update.update_id)
+
+
+def register_dedup_handler(application) -> None:
+    """Register the duplicate update filter ahead of all other handlers."""
+    application.add_handler(TypeHandler(Update, drop_duplicate_update), group=-1)
@@ -0,0 +1,38 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.db.circuit_breaker import DatabaseUnavailable
+from bot.db.retries import DeadlineExceeded
+from bot.handlers.dedup import forget_update
+
+logger = logging.getLogger(__name__)
+
+NOTICE_DATABASE_UNAVAILABLE = "⚠️ Can't reach your tasks right now. New tasks are still saved, please try again in a minute."
+NOTICE_DEADLINE_EXCEEDED = "⏳ That took too long and didn't finish. Please try again in a moment."
+
+
+async def handle_error(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Tell the user when the database is unavailable or too slow, log everything else."""
+    forget_update(update)
+    
+    if isinstance(context.error, DatabaseUnavailable):
+        logger.warning("Database unavailable while handling update %s: %s", getattr(update, "update_id", None), context.error)
+        notice = NOTICE_DATABASE_UNAVAILABLE
+    elif isinstance(context.error, DeadlineExceeded):
+        logger.warning("Update %s ran out of time for the database", getattr(update, "update_id", None))
+        notice = NOTICE_DEADLINE_EXCEEDED
+    else:
+        logger.error("Handling update %s failed", getattr(update, "update_id", None), exc_info=context.error)
+        return
+    
+    if isinstance(update, Update) and update.effective_chat:
+        try:
+            await context.bot.send_message(update.effective_chat.id, notice)
+        except Exception:
+            logger.exception("Sending the notice failed")
+
+
+def register_error_handler(application) -> None:
+    """Register the error handler."""
+    application.add_error_handler(handle_error)
@@ -1,15 +1,27 @@
+import asyncio
 import logging
+import os
+import tempfile
+import time
+import uuid
 from telegram import Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes, MessageHandler, filters
 
+from bot.db.circuit_breaker import DatabaseUnavailable
+from bot.db.retries import deadline
 from bot.services.user_service import get_or_create_user
 from bot.services.task_service import (
-    create_task,
+    capture_task,
     get_task_by_message_id,
     update_task_content,
     get_task_counts,
     update_task_category,
+    parse_category_tag,
 )
+from bot.services.import_service import detect_import_format, iter_import_rows, import_tasks
+from bot.handlers.callbacks import forget_recent_task
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -28,28 +40,30 @@ async def handle_new_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
     
     # Check for special tags to determine category
-    # Special tags can be !now or !soon at the start or end of the message
-    category = "someday"
-    if content.lower().startswith("!now") or content.lower().endswith("!now"):
-        category = "now"
-        content = content.replace("!now", "").strip()
-    elif content.lower().startswith("!soon") or content.lower().endswith("!soon"):
-        category = "soon"
-        content = content.replace("!soon", "").strip()
-    
-    # Get or create user
-    user = get_or_create_user(telegram_id)
-    
-    # Create task
-    create_task(
-        user_id=user["id"],
+    content, category = parse_category_tag(content)
+    
+    # Create task (for the user with this Telegram ID)
+    task = await asyncio.to_thread(
+        capture_task,
+        telegram_id=telegram_id,
         content=content,
         telegram_message_id=message_id,
-        category=category
+        category=category,
+        task_id=str(uuid.uuid4()),
     )
     
-    # Get updated counts
-    counts = get_task_counts(user["id"])
+    # Journaled while the database is unavailable, added once it is back
+    if task is None:
+        await update.message.reply_text(f"✓ Saved for {category} (syncing when the connection is back)")
+        return
+    
+    # Get updated counts (the user row is cached by now)
+    try:
+        user = await asyncio.to_thread(get_or_create_user, telegram_id)
+        counts = await asyncio.to_thread(get_task_counts, user["id"])
+    except DatabaseUnavailable:
+        await update.message.reply_text(f"✓ Added to {category}")
+        return
     
     # Send confirmation
     task_text = "task" if counts[category] == 1 else "tasks"
@@ -72,29 +86,23 @@ async def handle_edited_message(update: Update, context: ContextTypes.DEFAULT_TY
         return
     
     # Check for special tags to determine category
-    # Special tags can be !now or !soon at the start or end of the message
-    category = "someday"
-    if new_content.lower().startswith("!now") or new_content.lower().endswith("!now"):
-        category = "now"
-        new_content = new_content.replace("!now", "").strip()
-    elif new_content.lower().startswith("!soon") or new_content.lower().endswith("!soon"):
-        category = "soon"
-        new_content = new_content.replace("!soon", "").strip()
+    new_content, category = parse_category_tag(new_content)
 
     # Get user
-    user = get_or_create_user(telegram_id)
+    user = await asyncio.to_thread(get_or_create_user, telegram_id)
     
     # Find task by message ID
-    task = get_task_by_message_id(user["id"], message_id)
+    task = await asyncio.to_thread(get_task_by_message_id, user["id"], message_id)
     
     if task:
         # Task exists and is active - update it
-        update_task_content(task["id"], new_content)
+        await asyncio.to_thread(update_task_content, user["id"], task["id"], new_content)
+        forget_recent_task(user["id"], task["id"])
         
         # Determine if task needs to be moved to a different category
         if task["category"] != category:
             # Move task to appropriate category if needed
-            update_task_category(task["id"], category)
+            await asyncio.to_thread(update_task_category, user["id"], task["id"], category)
 
             await update.edited_message.reply_text(
                 f"✓ Task updated and moved to {category}",
@@ -115,6 +123,87 @@ async def handle_edited_message(update: Update, context: ContextTypes.DEFAULT_TY
         )
 
 
+async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle uploaded files - import every line/row as a task."""
+    if not update.message or not update.message.document:
+        return
+    
+    document = update.message.document
+    file_format = detect_import_format(document.file_name, document.mime_type)
+    if not file_format:
+        await update.message.reply_text("To import tasks, send a .txt, .csv or .json file.")
+        return
+    
+    if document.file_size and document.file_size > settings.IMPORT_MAX_FILE_SIZE:
+        max_size = settings.IMPORT_MAX_FILE_SIZE // (1024 * 1024)
+        await update.message.reply_text(f"That file is too large to import (max {max_size} MB).")
+        return
+    
+    # An optional !now / !soon caption sets the category for untagged rows
+    caption = (update.message.caption or "").strip()
+    default_category = parse_category_tag(caption)[1] if caption else "someday"
+    
+    user = await asyncio.to_thread(get_or_create_user, update.effective_user.id)
+    status_message = await update.message.reply_text("⏳ Importing tasks...")
+    
+    progress = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "import")
+            telegram_file = await document.get_file()
+            await telegram_file.download_to_drive(path)
+            
+            rows = iter_import_rows(path, file_format, default_category=default_category)
+            batches = import_tasks(user["id"], rows, settings.IMPORT_BATCH_SIZE)
+            last_edit = time.monotonic()
+            # Parsing and inserting block, run each batch in a worker thread.
+            # A big file outlasts the update's budget, each batch gets one of its own.
+            while True:
+                with deadline(settings.UPDATE_DEADLINE_MS / 1000):
+                    batch_progress = await asyncio.to_thread(next, batches, None)
+                if batch_progress is None:
+                    break
+                progress = batch_progress
+                # Throttle progress edits to stay within Telegram's edit rate limits
+                if time.monotonic() - last_edit >= 1:
+                    await _edit_status(status_message, f"⏳ Importing tasks... {progress['imported']} added")
+                    last_edit = time.monotonic()
+    except Exception:
+        logger.exception("Import failed")
+        text = "⚠️ Import failed, please try again."
+        if progress and progress["imported"]:
+            text += f" {progress['imported']} tasks were added before the error."
+        await _edit_status(status_message, text)
+        return
+    
+    await _edit_status(status_message, _format_import_summary(progress))
+
+
+async def _edit_status(status_message, text: str) -> None:
+    """Edit the import status message, ignoring "message is not modified" errors."""
+    try:
+        await status_message.edit_text(text)
+    except BadRequest as e:
+        logger.debug("Could not edit import status: %s", e)
+
+
+def _format_import_summary(progress: dict) -> str:
+    """Format the final import report, listing the first few malformed rows."""
+    imported = progress["imported"]
+    task_text = "task" if imported == 1 else "tasks"
+    lines = [f"✓ Imported {imported} {task_text}"]
+    
+    if progress["failed"]:
+        lines.append(f"⚠️ Skipped {progress['failed']} rows:")
+        for row_number, error in progress["errors"]:
+            lines.append(f"• Row {row_number}: {error}" if row_number else f"• {error}")
+        hidden = progress["error_count"] - len(progress["errors"])
+        if hidden > 0:
+            lines.append(f"• ...and {hidden} more")
+    
+    return "\n".join(lines)
+
+
 def register_message_handlers(application) -> None:
     """Register message handlers."""
     # Handle new text messages (not commands)
@@ -133,3 +222,11 @@ def register_message_handlers(application) -> None:
             handle_edited_message
         )
     )
+    
+    # Handle uploaded files as task imports
+    application.add_handler(
+        MessageHandler(
+            filters.Document.ALL & ~filters.UpdateType.EDITED_MESSAGE,
+            handle_document
+        )
+    )
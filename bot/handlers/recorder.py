@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from telegram import Update
+from telegram.ext import ContextTypes, TypeHandler
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Objects describing a person or chat, by the key they appear under
+_PEOPLE_KEYS = {"from", "chat", "user", "sender_chat"}
+
+# Personal fields dropped from those objects
+_PERSONAL_FIELDS = {"first_name", "last_name", "username", "title", "language_code", "is_premium"}
+
+# Kept as-is so replays take the same code paths
+_KEPT_WORD = re.compile(r"^(/\w+(@\w+)?|!now|!soon)$", re.IGNORECASE)
+
+# Random per process: pseudonyms are stable within one log but not linkable across logs
+_salt = os.urandom(16)
+_started = time.monotonic()
+
+
+def _pseudonym(value: int) -> int:
+    digest = hashlib.blake2b(str(value).encode(), key=_salt, digest_size=4).digest()
+    return 10_000_000 + int.from_bytes(digest, "big") % 90_000_000
+
+
+def anonymize_text(text: str) -> str:
+    """Mask every word except commands and category tags, keeping lengths (entity offsets stay valid)."""
+    return re.sub(r"\S+", lambda word: word.group() if _KEPT_WORD.match(word.group()) else "x" * len(word.group()), text)
+
+
+def anonymize_update(data, key: str = None):
+    """
+    Strip personal data from an update dict (Update.to_dict()).
+
+    User and chat IDs become pseudonyms, names are dropped, texts are masked
+    and file names replaced. Callback data, entities and message IDs are kept.
+    """
+    if isinstance(data, list):
+        return [anonymize_update(item, key) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    result = {}
+    for field, value in data.items():
+        if key in _PEOPLE_KEYS and field in _PERSONAL_FIELDS:
+            continue
+        if key in _PEOPLE_KEYS and field == "id" and isinstance(value, int):
+            result[field] = _pseudonym(value) if value > 0 else -_pseudonym(-value)
+        elif field == "chat_instance":
+            result[field] = str(_pseudonym(value))
+        elif field in ("text", "caption") and isinstance(value, str):
+            result[field] = anonymize_text(value)
+        elif field == "file_name" and isinstance(value, str):
+            result[field] = "file" + os.path.splitext(value)[1]
+        else:
+            result[field] = anonymize_update(value, field)
+    if key in _PEOPLE_KEYS and "first_name" in data:
+        result["first_name"] = "User"
+    return result
+
+
+async def record_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Append the anonymized update to the update log."""
+    line = json.dumps({"t": round(time.monotonic() - _started, 3), "update": anonymize_update(update.to_dict())})
+    try:
+        with open(settings.UPDATE_LOG, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+    except OSError:
+        logger.exception("Writing the update log failed")
+
+
+def register_recorder_handler(application) -> None:
+    """Record every incoming update (before dedup) when UPDATE_LOG is set."""
+    if settings.UPDATE_LOG:
+        logger.info("Recording anonymized updates to %s", settings.UPDATE_LOG)
+        application.add_handler(TypeHandler(Update, record_update), group=-2)
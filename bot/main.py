@@ -1,8 +1,15 @@
+import asyncio
 import logging
 from telegram.ext import Application
 
 from config.settings import settings
 from bot.handlers import register_all_handlers
+from bot.utils.background import create_executor
+from bot.utils.metrics import enable_metrics
+from bot.utils.rate_limit import RateLimiter
+from bot.utils.scheduler import PriorityUpdateProcessor
+from bot.utils.screens import warm_settings_screens
+from bot.utils.tracing import TracedApplication, TracingRequest, configure_tracing
 
 # Configure logging
 logging.basicConfig(
@@ -11,17 +18,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Referenced so the background tasks aren't garbage collected
+_warmup_task = None
+_replay_task = None
+
 
 def create_application() -> Application:
     """Create and configure the bot application."""
     settings.validate()
     
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .application_class(TracedApplication)
+        .request(TracingRequest())
+        .post_init(post_init)
+        .concurrent_updates(create_update_processor())
+        .build()
+    )
     register_all_handlers(application)
     
+    # Every update is traced, export the spans if a destination is configured
+    if configure_tracing(settings.TRACE_FILE, settings.TRACE_OTLP_ENDPOINT):
+        logger.info("Exporting traces to %s", settings.TRACE_FILE or settings.TRACE_OTLP_ENDPOINT)
+    
+    # Settings screens never change, render them all before the first tap
+    logger.info("Prepared %d settings screens", warm_settings_screens())
+    
     return application
 
 
+def create_update_processor() -> PriorityUpdateProcessor:
+    """Create the update scheduler with the per-user rate limits from settings."""
+    message_limit = callback_limit = None
+    if settings.RATE_MESSAGES_PER_MINUTE > 0:
+        message_limit = RateLimiter(
+            "messages",
+            settings.RATE_MESSAGES_PER_MINUTE / 60,
+            settings.RATE_MESSAGES_BURST,
+            max_delay=settings.RATE_MESSAGES_MAX_DELAY_SECONDS,
+            max_users=settings.RATE_LIMIT_USERS,
+        )
+    if settings.RATE_CALLBACKS_PER_MINUTE > 0:
+        callback_limit = RateLimiter(
+            "callbacks",
+            settings.RATE_CALLBACKS_PER_MINUTE / 60,
+            settings.RATE_CALLBACKS_BURST,
+            max_users=settings.RATE_LIMIT_USERS,
+        )
+    
+    return PriorityUpdateProcessor(
+        settings.UPDATE_WORKERS,
+        settings.UPDATE_QUEUE_LIMIT,
+        settings.CALLBACK_QUEUE_TIMEOUT_MS / 1000,
+        message_limit=message_limit,
+        callback_limit=callback_limit,
+        update_deadline=settings.UPDATE_DEADLINE_MS / 1000,
+    )
+
+
+async def post_init(application: Application) -> None:
+    """Start the background work once the bot is up, without delaying readiness."""
+    global _warmup_task, _replay_task
+    asyncio.get_running_loop().set_default_executor(create_executor(settings.UPDATE_WORKERS))
+    if settings.WARMUP_USERS > 0:
+        from bot.services.warmup_service import warm_caches
+        _warmup_task = asyncio.create_task(asyncio.to_thread(warm_caches, settings.WARMUP_USERS, settings.WARMUP_SECONDS))
+    _replay_task = asyncio.create_task(replay_journal_forever())
+
+
+async def replay_journal_forever() -> None:
+    """Replay writes journaled while the database was unavailable, in order."""
+    from bot.db.journal import get_journal, replay_journal
+    
+    journal = get_journal()
+    while True:
+        # Keep going while batches succeed, then check again later
+        while len(journal) and await asyncio.to_thread(replay_journal):
+            pass
+        await asyncio.sleep(settings.JOURNAL_REPLAY_SECONDS)
+
+
 def run_polling():
     """Run the bot in polling mode (for local development)."""
     logger.info("Starting bot in polling mode...")
@@ -35,31 +112,21 @@ def run_polling():
 async def run_webhook():
     """Run the bot in webhook mode (for production)."""
     import uvicorn
-    from telegram.ext import ApplicationBuilder
+    from bot.webhook_server import create_webhook_app
     
-    logger.info("Starting bot in webhook mode...")
+    logger.info("Starting bot in webhook mode on port %d...", settings.PORT)
     
     application = create_application()
+    enable_metrics(application)
     
-    # Set up webhook
-    await application.bot.set_webhook(
-        url=f"{settings.WEBHOOK_URL}",
-        allowed_updates=["message", "edited_message", "callback_query"]
-    )
-    
-    # Create ASGI app for uvicorn
-    # Note: python-telegram-bot v21 has built-in webhook support
-    await application.start()
-    
-    # Keep running
-    import asyncio
-    await asyncio.Event().wait()
+    # The ASGI app starts the application and sets the webhook in its lifespan
+    config = uvicorn.Config(create_webhook_app(application), host="0.0.0.0", port=settings.PORT, lifespan="on")
+    await uvicorn.Server(config).serve()
 
 
 def main():
     """Main entry point."""
     if settings.is_production:
-        import asyncio
         asyncio.run(run_webhook())
     else:
         run_polling()
@@ -0,0 +1,65 @@
+import csv
+import json
+from typing import Iterator
+
+from bot.services.task_service import iter_tasks_keyset
+
+EXPORT_FORMATS = ("csv", "json")
+
+# Columns written to the export, in order
+EXPORT_FIELDS = ("content", "category", "status", "created_at", "completed_at", "id")
+EXPORT_COLUMNS = "id,content,category,created_at,completed_at"
+
+
+def iter_export_rows(user_id: str, page_size: int) -> Iterator[dict]:
+    """Yield export rows for all active tasks, then all completed tasks."""
+    for completed in (False, True):
+        status = "completed" if completed else "active"
+        for task in iter_tasks_keyset(user_id, completed, columns=EXPORT_COLUMNS, page_size=page_size):
+            yield {
+                "content": task["content"],
+                "category": task["category"],
+                "status": status,
+                "created_at": task.get("created_at"),
+                "completed_at": task.get("completed_at"),
+                "id": task["id"],
+            }
+
+
+def export_tasks(path: str, user_id: str, export_format: str, page_size: int) -> int:
+    """Write all of a user's tasks to a file. Blocking, run it in a worker thread.
+
+    Returns:
+        int: Number of tasks written
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        return write_export(f, iter_export_rows(user_id, page_size), export_format)
+
+
+def write_export(f, rows: Iterator[dict], export_format: str) -> int:
+    """
+    Stream export rows into an open text file.
+
+    Rows are written as they arrive, so only one page of tasks is held in memory.
+
+    Returns:
+        int: Number of tasks written
+    """
+    count = 0
+
+    if export_format == "json":
+        # Write the array by hand so the whole list never has to exist at once
+        f.write("[")
+        for row in rows:
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(row, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    else:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+
+    return count
@@ -0,0 +1,363 @@
+import csv
+import json
+import logging
+from typing import Iterator, Optional
+
+from bot.services.task_service import create_tasks, parse_category_tag
+
+logger = logging.getLogger(__name__)
+
+# Supported import formats, keyed by file extension
+IMPORT_FORMATS = {
+    "txt": "txt",
+    "md": "txt",
+    "csv": "csv",
+    "json": "json",
+    "jsonl": "jsonl",
+    "ndjson": "jsonl",
+}
+
+# Column / key names recognised as the task text (first match wins)
+CONTENT_FIELDS = ("content", "task", "title", "text", "name")
+CATEGORY_FIELDS = ("category", "list")
+
+VALID_CATEGORIES = ("now", "soon", "someday")
+
+# Telegram messages are capped at 4096 characters, keep imported tasks in line
+MAX_CONTENT_LENGTH = 4096
+
+# Largest single JSON value we buffer while streaming an array
+MAX_JSON_ITEM_SIZE = 1024 * 1024
+JSON_CHUNK_SIZE = 64 * 1024
+
+# Only the first few problems are kept for the summary, the rest are counted
+MAX_REPORTED_ERRORS = 10
+
+
+def detect_import_format(file_name: Optional[str], mime_type: Optional[str] = None) -> Optional[str]:
+    """Get the import format for an uploaded document, or None if unsupported."""
+    if file_name and "." in file_name:
+        extension = file_name.rsplit(".", 1)[1].lower()
+        if extension in IMPORT_FORMATS:
+            return IMPORT_FORMATS[extension]
+
+    if mime_type == "text/csv":
+        return "csv"
+    if mime_type == "application/json":
+        return "json"
+    if mime_type == "text/plain":
+        return "txt"
+    return None
+
+
+def iter_import_rows(path: str, file_format: str, default_category: str = "someday") -> Iterator[tuple]:
+    """
+    Stream task rows out of an import file.
+
+    The file is read incrementally, so memory use does not depend on its size.
+    Blank rows are skipped silently.
+
+    Args:
+        path: Path of the downloaded file
+        file_format: One of "txt", "csv", "json", "jsonl"
+        default_category: Category for rows without an explicit category or tag
+
+    Yields:
+        tuple: (row_number, row, error) - row is {"content", "category"} or None when
+        the row is malformed, in which case error describes the problem
+    """
+    parsers = {
+        "txt": _iter_txt,
+        "csv": _iter_csv,
+        "json": _iter_json,
+        "jsonl": _iter_jsonl,
+    }
+    parser = parsers[file_format]
+
+    # utf-8-sig strips the BOM that spreadsheet exports like to add
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        try:
+            for row_number, content, category, error in parser(f):
+                if error:
+                    yield row_number, None, error
+                    continue
+                row, error = _build_row(content, category, default_category)
+                if error:
+                    yield row_number, None, error
+                elif row:
+                    yield row_number, row, None
+        except UnicodeDecodeError:
+            yield 0, None, "File is not valid UTF-8 text, import stopped"
+
+
+def import_tasks(user_id: str, rows: Iterator[tuple], batch_size: int) -> Iterator[dict]:
+    """
+    Insert streamed rows in fixed-size batches.
+
+    Malformed rows and failed batches are recorded and skipped, the rest of the
+    import carries on.
+
+    Yields:
+        dict: Progress after every batch - imported and failed row counts, plus
+        errors (row, message) for the first few problems and error_count for all
+    """
+    progress = {"imported": 0, "failed": 0, "errors": [], "error_count": 0}
+    batch = []
+    first_row = None
+
+    for row_number, row, error in rows:
+        if error:
+            progress["failed"] += 1
+            _record_error(progress, row_number, error)
+            continue
+
+        if not batch:
+            first_row = row_number
+        batch.append(row)
+
+        if len(batch) >= batch_size:
+            _insert_batch(user_id, batch, first_row, row_number, progress)
+            batch = []
+            yield progress
+
+    if batch:
+        _insert_batch(user_id, batch, first_row, row_number, progress)
+    yield progress
+
+
+def _insert_batch(user_id: str, batch: list, first_row: int, last_row: int, progress: dict) -> None:
+    """Insert one batch, recording it as failed instead of raising."""
+    try:
+        create_tasks(user_id, batch)
+        progress["imported"] += len(batch)
+    except Exception:
+        logger.exception("Import batch failed for user %s (rows %s-%s)", user_id, first_row, last_row)
+        progress["failed"] += len(batch)
+        _record_error(progress, first_row, f"Rows {first_row}-{last_row} could not be saved")
+
+
+def _record_error(progress: dict, row_number: int, error: str) -> None:
+    """Remember an import problem without letting the report grow with the file."""
+    progress["error_count"] += 1
+    if len(progress["errors"]) < MAX_REPORTED_ERRORS:
+        progress["errors"].append((row_number, error))
+
+
+def _build_row(content, category, default_category: str) -> tuple[Optional[dict], Optional[str]]:
+    """Validate a parsed row. Returns (row, error); both are None for blank rows."""
+    if content is None:
+        return None, None
+    if not isinstance(content, str):
+        content = str(content)
+
+    content = content.strip()
+    if not content:
+        return None, None
+
+    if category:
+        category = str(category).strip().lower()
+        if category not in VALID_CATEGORIES:
+            return None, f"Unknown category '{category}'"
+    else:
+        content, category = parse_category_tag(content)
+        if category == "someday":
+            category = default_category
+        if not content:
+            return None, None
+
+    if len(content) > MAX_CONTENT_LENGTH:
+        return None, f"Task is longer than {MAX_CONTENT_LENGTH} characters"
+
+    return {"content": content, "category": category}, None
+
+
+def _pick_field(item: dict, fields: tuple):
+    """Get the first present value among several possible keys (case-insensitive)."""
+    lowered = {str(key).strip().lower(): value for key, value in item.items()}
+    for field in fields:
+        if field in lowered:
+            return lowered[field]
+    return None
+
+
+# =============================================================================
+# FORMAT PARSERS
+# Each yields (row_number, content, category, error)
+# =============================================================================
+
+def _iter_txt(f) -> Iterator[tuple]:
+    """One task per line, !now / !soon tags allowed."""
+    for line_number, line in enumerate(f, 1):
+        # Tolerate common list markers from other apps ("- [ ] task", "* task")
+        line = line.strip()
+        if line.lower().startswith("- [x] "):
+            # Already done in the other app
+            continue
+        for marker in ("- [ ] ", "- ", "* ", "• "):
+            if line.startswith(marker):
+                line = line[len(marker):]
+                break
+        yield line_number, line, None, None
+
+
+def _iter_csv(f) -> Iterator[tuple]:
+    """CSV with a header naming the task column, or plain rows using the first column."""
+    reader = csv.reader(f, strict=True)
+    content_index = 0
+    category_index = None
+    completed_index = None
+    header_checked = False
+
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, None, None, f"Malformed CSV row: {e}"
+            continue
+
+        row_number = reader.line_num
+        if not values:
+            continue
+
+        # The first non-empty row may be a header naming the columns
+        if not header_checked:
+            header_checked = True
+            header = [value.strip().lower() for value in values]
+            content_field = next((field for field in CONTENT_FIELDS if field in header), None)
+            if content_field:
+                content_index = header.index(content_field)
+                category_field = next((field for field in CATEGORY_FIELDS if field in header), None)
+                category_index = header.index(category_field) if category_field else None
+                completed_index = header.index("completed_at") if "completed_at" in header else None
+                continue
+
+        if content_index >= len(values):
+            yield row_number, None, None, "Missing task column"
+            continue
+
+        if completed_index is not None and completed_index < len(values) and values[completed_index]:
+            # Completed tasks from an export are not brought back as active tasks
+            continue
+
+        category = None
+        if category_index is not None and category_index < len(values):
+            category = values[category_index] or None
+        yield row_number, values[content_index], category, None
+
+
+def _iter_jsonl(f) -> Iterator[tuple]:
+    """JSON Lines - one string or object per line."""
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, None, f"Invalid JSON: {e.msg}"
+            continue
+        yield _json_item_to_row(line_number, item)
+
+
+def _iter_json(f) -> Iterator[tuple]:
+    """A top-level JSON array of strings or objects, decoded one item at a time."""
+    item_number = 0
+    try:
+        for item in _stream_json_array(f):
+            item_number += 1
+            yield _json_item_to_row(item_number, item)
+    except ValueError as e:
+        # The array itself is broken, there is no reliable way to resync
+        yield item_number + 1, None, None, f"Invalid JSON, import stopped: {e}"
+
+
+def _json_item_to_row(row_number: int, item) -> tuple:
+    """Map a decoded JSON item onto (row_number, content, category, error)."""
+    if isinstance(item, str):
+        return row_number, item, None, None
+    if isinstance(item, dict):
+        content = _pick_field(item, CONTENT_FIELDS)
+        if content is None:
+            return row_number, None, None, "Missing task text"
+        if _pick_field(item, ("completed_at",)):
+            # Completed tasks from an export are not brought back as active tasks
+            return row_number, None, None, None
+        return row_number, content, _pick_field(item, CATEGORY_FIELDS), None
+    return row_number, None, None, f"Unsupported item type {type(item).__name__}"
+
+
+def _stream_json_array(f) -> Iterator:
+    """Incrementally decode the items of a top-level JSON array from a text file."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill(keep_from: int) -> bool:
+        nonlocal buffer, pos, eof
+        chunk = f.read(JSON_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[keep_from:] + chunk
+        pos -= keep_from
+        return True
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof or not fill(pos):
+                return ""
+
+    if next_char() != "[":
+        raise ValueError("expected a list of tasks")
+    pos += 1
+
+    expect_value = True
+    first = True
+    while True:
+        char = next_char()
+        if not char:
+            raise ValueError("unexpected end of file")
+
+        if char == "]" and (first or not expect_value):
+            return
+
+        if not expect_value:
+            if char != ",":
+                raise ValueError("expected ',' between items")
+            pos += 1
+            expect_value = True
+            continue
+
+        # Decode the next value, reading more data while it is truncated
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(e.msg) from None
+                if len(buffer) - pos > MAX_JSON_ITEM_SIZE:
+                    raise ValueError("item too large") from None
+                fill(pos)
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(buffer) and not eof and fill(pos):
+                continue
+            break
+
+        pos = end
+        expect_value = False
+        first = False
+        yield item
+
+        # Drop consumed data so the buffer stays bounded
+        if pos > JSON_CHUNK_SIZE:
+            buffer = buffer[pos:]
+            pos = 0
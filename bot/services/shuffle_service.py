@@ -1,164 +1,202 @@
+import hashlib
+import heapq
 import random
 from datetime import datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
+from typing import Optional
 
+# Score weights (shown_count, days since shown, randomness) - lower score wins.
+# Large pools (> 2x the free slots) get a rotation bias with some randomness,
+# small pools lean harder on recency and randomness to maximize diversity.
+LARGE_POOL_WEIGHTS = (100, 2, 10)
+SMALL_POOL_WEIGHTS = (50, 5, 20)
 
-def get_shuffled_tasks(tasks: list, limit: int, currently_displayed: list = None) -> list:
+SECONDS_PER_DAY = 86400
+
+
+def get_shuffled_tasks(
+    tasks: list,
+    limit: int,
+    currently_displayed: list = None,
+    rng: Optional[random.Random] = None,
+    now: Optional[datetime] = None,
+) -> list:
     """
     Enhanced shuffle that prioritizes not-currently-shown tasks.
-    
+
     Algorithm:
     1. Exclude currently displayed tasks if possible (highest priority)
     2. Prioritize never-shown tasks from remaining pool
     3. For large pools (> 2x limit): implement semi-random cycling with rotation bias
     4. For small pools: maximize diversity, allow minimal repeats when necessary
     5. Fallback: include currently displayed tasks only when no other options
-    
+
+    Runs in one pass over the tasks plus a partial top-k selection, the pool
+    is never sorted.
+
     Args:
         tasks: All available tasks in the category
         limit: Number of tasks to display
         currently_displayed: List of task IDs currently on screen
+        rng: Random source, pass a seeded random.Random for reproducible picks
+        now: Reference time for recency (defaults to the current time)
     """
-    if not tasks:
+    if not tasks or limit <= 0:
         return []
-    
-    # Convert currently_displayed to set for faster lookup
+
+    rng = rng or random
+    now_ts = (now or datetime.now(timezone.utc)).timestamp()
     current_display_ids = set(currently_displayed or [])
-    total_tasks = len(tasks)
-    
-    # Step 1: Separate tasks by priority
-    not_currently_shown = [t for t in tasks if t["id"] not in current_display_ids]
-    currently_shown = [t for t in tasks if t["id"] in current_display_ids]
-    
-    # Step 2: Further categorize not-currently-shown tasks
-    never_shown = [t for t in not_currently_shown if (t.get("shown_count") or 0) == 0]
-    shown_before = [t for t in not_currently_shown if (t.get("shown_count") or 0) > 0]
-    
-    result = []
-    
-    # Step 3: Try to fill with not-currently-shown tasks first
-    if not_currently_shown:
-        # Shuffle each category for randomness
-        if never_shown:
-            random.shuffle(never_shown)
-            result.extend(never_shown)
+
+    # Step 1: Split tasks by priority in a single pass
+    never_shown = []
+    shown_before = []
+    currently_shown = []
+    for task in tasks:
+        if task["id"] in current_display_ids:
+            currently_shown.append(task)
+        elif (task.get("shown_count") or 0) > 0:
+            shown_before.append(task)
+        else:
+            never_shown.append(task)
+
+    # Step 2: Never-shown tasks first, in random order
+    if len(never_shown) >= limit:
+        result = rng.sample(never_shown, limit)
+    else:
+        result = never_shown
+
+        # Step 3: Fill the free slots with the best scoring shown tasks
         if shown_before:
-            # Apply cycling logic for shown tasks
-            cycled_shown = _apply_cycling_logic(shown_before, limit - len(result), total_tasks)
-            result.extend(cycled_shown)
-        
-        # Limit to requested number
-        result = result[:limit]
-    
-    # Step 4: If we don't have enough tasks, include currently displayed ones
+            free_slots = limit - len(result)
+            is_large_pool = len(tasks) > free_slots * 2
+            weights = LARGE_POOL_WEIGHTS if is_large_pool else SMALL_POOL_WEIGHTS
+            result.extend(_pick_lowest_scores(shown_before, free_slots, weights, now_ts, rng))
+
+    # Step 4: If we don't have enough tasks, include currently displayed ones,
+    # least recently shown first
     if len(result) < limit and currently_shown:
-        remaining_slots = limit - len(result)
-        
-        # Prioritize currently shown tasks that were shown least recently
-        currently_shown_sorted = _sort_by_recency(currently_shown)
-        result.extend(currently_shown_sorted[:remaining_slots])
-    
-    # Step 5: Final limit and shuffle for randomness
-    result = result[:limit]
-    random.shuffle(result)
-    
+        result.extend(heapq.nsmallest(limit - len(result), currently_shown, key=_last_shown_timestamp))
+
+    # Step 5: Shuffle for randomness
+    rng.shuffle(result)
+
     return result
 
-def _apply_cycling_logic(tasks: list, limit: int, total_pool_size: int) -> list:
-    """
-    Apply semi-random cycling logic for task selection.
-    
-    For large pools (> 2x limit): implement rotation bias
-    For small pools: maximize diversity
-    """
-    if not tasks:
-        return []
-    
-    # Determine if we're dealing with a large pool
-    is_large_pool = total_pool_size > (limit * 2)
-    
-    if is_large_pool:
-        return _apply_large_pool_cycling(tasks, limit, total_pool_size)
-    else:
-        return _apply_small_pool_diversity(tasks, limit)
-def _apply_large_pool_cycling(tasks: list, limit: int, total_pool_size: int) -> list:
-    """
-    Semi-random cycling for large task pools with rotation bias.
-    """
-    now = datetime.now(timezone.utc).timestamp()
-    
-    def score(task):
-        shown_count = task.get("shown_count", 0) or 0
-        last_shown = task.get("last_shown_at")
-        
-        if last_shown:
-            # Parse ISO format timestamp
-            if isinstance(last_shown, str):
-                last_shown_dt = datetime.fromisoformat(last_shown.replace("Z", "+00:00"))
-                last_shown_ts = last_shown_dt.timestamp()
-            else:
-                last_shown_ts = 0
-        else:
-            last_shown_ts = 0
-        
-        # Days since shown (higher = shown longer ago)
-        days_since_shown = (now - last_shown_ts) / 86400
-        
-        # Scoring for large pools:
-        # - Reduce shown_count weight from 1000 to 100 for more variety
-        # - Increase recency weight for rotation bias
-        # - Add stronger randomization for semi-random behavior
-        return (shown_count * 100) - (days_since_shown * 2) + (random.random() * 10)
-    
-    # Sort by score and take top tasks
-    sorted_tasks = sorted(tasks, key=score)
-    return sorted_tasks[:limit]
-def _apply_small_pool_diversity(tasks: list, limit: int) -> list:
+
+def get_rotation_tasks(tasks: list, limit: int, seed: str, cursor: Optional[dict] = None) -> tuple[list, dict]:
     """
-    Maximize diversity for small task pools.
+    Deterministic rotation: walk a per-user pseudo-random permutation of the tasks.
+
+    Every task is shown once per epoch (one walk through the permutation),
+    without tracking shown stats. The permutation is never stored - a task's
+    position is a hash of (seed, epoch, task id) - so tasks added or removed
+    midway simply join or leave the walk. When the walk reaches the end, the
+    screen is filled from the start of the next epoch, whose permutation has
+    the tasks just shown moved to its very end and the rest of the last screen
+    just before them: a screen never repeats a task, the new epoch still shows
+    every task once, and a task is not shown on two screens in a row (pools of
+    at least 2x limit).
+
+    Args:
+        tasks: All available tasks in the category
+        limit: Number of tasks to display
+        seed: Per-user seed (e.g. the user ID)
+        cursor: Cursor returned by the previous call, None to start a new rotation
+
+    Returns:
+        tuple: (tasks to display, new cursor) - the cursor is a small JSON-friendly
+        dict, its "epoch" changes when the rotation wraps
     """
-    now = datetime.now(timezone.utc).timestamp()
-    
-    def score(task):
-        shown_count = task.get("shown_count", 0) or 0
-        last_shown = task.get("last_shown_at")
-        
-        if last_shown:
-            # Parse ISO format timestamp
-            if isinstance(last_shown, str):
-                last_shown_dt = datetime.fromisoformat(last_shown.replace("Z", "+00:00"))
-                last_shown_ts = last_shown_dt.timestamp()
-            else:
-                last_shown_ts = 0
-        else:
-            last_shown_ts = 0
-        
-        # Days since shown (higher = shown longer ago)
-        days_since_shown = (now - last_shown_ts) / 86400
-        
-        # Scoring for small pools:
-        # - Heavily prioritize tasks not shown recently
-        # - Strong randomization to avoid patterns
-        return (shown_count * 50) - (days_since_shown * 5) + (random.random() * 20)
-    
-    # Sort by score and take top tasks
-    sorted_tasks = sorted(tasks, key=score)
-    return sorted_tasks[:limit]
-def _sort_by_recency(tasks: list) -> list:
+    cursor = cursor or {"epoch": 0, "after": None, "defer": [], "tail": [], "last": []}
+    if not tasks or limit <= 0:
+        return [], cursor
+    if len(tasks) <= limit:
+        # Everything fits on screen, nothing to rotate
+        return list(tasks), cursor
+
+    epoch = cursor["epoch"]
+    defer = set(cursor.get("defer") or ())
+    tail = set(cursor.get("tail") or ())
+    picked = _next_in_epoch(tasks, limit, seed, epoch, defer, tail, cursor.get("after"))
+
+    if len(picked) < limit:
+        # End of the permutation: fill the screen from the next epoch. The
+        # tasks shown just now go to its very end, where the fill can't reach
+        # them (there are more than limit tasks), and the rest of the last
+        # screen just before them
+        epoch += 1
+        tail = {task["id"] for _, task in picked}
+        defer = set(cursor.get("last") or ()) - tail
+        picked.extend(_next_in_epoch(tasks, limit - len(picked), seed, epoch, defer, tail, None))
+
+    display_tasks = [task for _, task in picked]
+    return display_tasks, {
+        "epoch": epoch,
+        "after": list(picked[-1][0]),
+        "defer": sorted(defer),
+        "tail": sorted(tail),
+        "last": [task["id"] for task in display_tasks],
+    }
+
+
+def _next_in_epoch(tasks: list, count: int, seed: str, epoch: int, defer: set, tail: set, after: Optional[list]) -> list:
+    """Get the next count (position, task) pairs of an epoch after a position."""
+    after = tuple(after) if after else None
+    upcoming = []
+    for task in tasks:
+        # Deferred tasks come after the others, the tail after those
+        rank = 2 if task["id"] in tail else 1 if task["id"] in defer else 0
+        position = (rank, _rotation_key(seed, epoch, task["id"]))
+        if after is None or position > after:
+            upcoming.append((position, task))
+    return heapq.nsmallest(count, upcoming, key=itemgetter(0))
+
+
+def _rotation_key(seed: str, epoch: int, task_id: str) -> int:
+    """Position of a task in the permutation of an epoch."""
+    digest = hashlib.blake2b(f"{seed}:{epoch}:{task_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _pick_lowest_scores(tasks: list, count: int, weights: tuple, now_ts: float, rng) -> list:
     """
-    Sort tasks by how recently they were shown (oldest first).
+    Pick the count tasks with the lowest score without sorting the pool.
+
+    score = shown_count * w_count - days_since_shown * w_days + random * w_random
     """
-    now = datetime.now(timezone.utc).timestamp()
-    
-    def get_last_shown_timestamp(task):
-        last_shown = task.get("last_shown_at")
-        if not last_shown:
-            return 0
-        
-        if isinstance(last_shown, str):
-            last_shown_dt = datetime.fromisoformat(last_shown.replace("Z", "+00:00"))
-            return last_shown_dt.timestamp()
-        else:
-            return 0
-    
-    # Sort by last shown time (oldest first)
-    return sorted(tasks, key=get_last_shown_timestamp)
\ No newline at end of file
+    if count >= len(tasks):
+        return list(tasks)
+
+    count_weight, days_weight, random_weight = weights
+    recency_weight = days_weight / SECONDS_PER_DAY
+
+    random_value = rng.random
+    scores = [
+        (task.get("shown_count") or 0) * count_weight
+        - (now_ts - _last_shown_timestamp(task)) * recency_weight
+        + random_value() * random_weight
+        for task in tasks
+    ]
+    picked = heapq.nsmallest(count, range(len(tasks)), key=scores.__getitem__)
+    return [tasks[i] for i in picked]
+
+
+def _last_shown_timestamp(task: dict) -> float:
+    """Get when a task was last shown as a Unix timestamp, 0 if never."""
+    last_shown = task.get("last_shown_at")
+    if not last_shown:
+        return 0
+
+    if isinstance(last_shown, str):
+        return _parse_timestamp(last_shown)
+    if isinstance(last_shown, datetime):
+        return last_shown.timestamp()
+    return 0
+
+
+@lru_cache(maxsize=65536)
+def _parse_timestamp(value: str) -> float:
+    """Parse an ISO format timestamp. Cached, only shown tasks get new values between shuffles."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
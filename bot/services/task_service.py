@@ -1,9 +1,59 @@
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+from bot.db.circuit_breaker import DatabaseUnavailable
+from bot.db.journal import add_journal_listener, journaled
+from bot.db.retries import hedged, idempotent
 from bot.db.supabase_client import get_client
+from bot.services.version_service import bump_data_version, get_data_version
+from bot.utils.cache import TTLCache, register_cache
 
+CATEGORIES = ("now", "soon", "someday")
 
-def create_task(user_id: str, content: str, telegram_message_id: int, category: str = "someday") -> dict:
-    """Create a new task."""
+# Read-through caches keyed by the data version they were read at, a write
+# bumps the version and makes the old entries unreachable. Filled on demand
+# and by the startup warm-up (warmup_service).
+_task_counts = TTLCache(maxsize=5000, ttl=600)  # (user_id, version) -> counts
+_category_lists = TTLCache(maxsize=2000, ttl=600)  # (user_id, version, category) -> active tasks
+_completed_counts = TTLCache(maxsize=5000, ttl=600)  # (user_id, version) -> completed tasks
+register_cache("task_counts", _task_counts)
+register_cache("category_lists", _category_lists)
+register_cache("completed_counts", _completed_counts)
+
+# The same data regardless of version, served when the database is
+# unavailable: stale beats an error screen. Keys: ("counts", user_id),
+# ("list", user_id, category), ("completed_count", user_id), ("task", task_id)
+_last_known = TTLCache(maxsize=20000, ttl=86400)
+register_cache("last_known_tasks", _last_known)
+
+
+def parse_category_tag(content: str) -> tuple[str, str]:
+    """Extract a !now or !soon tag from task text.
+    
+    Special tags can be !now or !soon at the start or end of the message.
+    
+    Returns:
+        tuple: (content without the tag, category) - category is "someday" when untagged
+    """
+    category = "someday"
+    if content.lower().startswith("!now") or content.lower().endswith("!now"):
+        category = "now"
+        content = content.replace("!now", "").strip()
+    elif content.lower().startswith("!soon") or content.lower().endswith("!soon"):
+        category = "soon"
+        content = content.replace("!soon", "").strip()
+    return content, category
+
+
+@idempotent()
+def create_task(user_id: str, content: str, telegram_message_id: int, category: str = "someday", task_id: Optional[str] = None) -> dict:
+    """Create a new task.
+    
+    Idempotent per (user_id, telegram_message_id): a redelivered message returns
+    the existing task instead of inserting a duplicate.
+    
+    Args:
+        task_id: ID for the new row (UUID), generated by the database if None
+    """
     client = get_client()
     task = {
         "user_id": user_id,
@@ -11,12 +61,71 @@ def create_task(user_id: str, content: str, telegram_message_id: int, category:
         "telegram_message_id": telegram_message_id,
         "category": category,
     }
-    response = client.table("tasks").insert(task).execute()
-    return response.data[0]
+    if task_id:
+        task["id"] = task_id
+    response = (
+        client.table("tasks")
+        .upsert(task, on_conflict="user_id,telegram_message_id", ignore_duplicates=True)
+        .execute()
+    )
+    if response.data:
+        bump_data_version(user_id)
+        return response.data[0]
+    
+    # Already created by an earlier delivery of the same message, nothing changed
+    response = (
+        client.table("tasks")
+        .select("*")
+        .eq("user_id", user_id)
+        .eq("telegram_message_id", telegram_message_id)
+        .execute()
+    )
+    return response.data[0] if response.data else {}
+
+
+@journaled
+def capture_task(telegram_id: int, content: str, telegram_message_id: int, category: str = "someday", task_id: Optional[str] = None) -> dict:
+    """Create a task sent by a Telegram user, journaled while the database is unavailable.
+    
+    Takes the Telegram ID rather than the user row, so capturing needs no read.
+    Pass a task_id so a journaled task can be shown, and changed, before it
+    reaches the database.
+    """
+    from bot.services.user_service import get_or_create_user
+    
+    user = get_or_create_user(telegram_id)
+    return create_task(user["id"], content, telegram_message_id, category, task_id)
+
+
+def create_tasks(user_id: str, tasks: list) -> list:
+    """Create several tasks with a single insert (used by file imports).
+    
+    Args:
+        user_id: Owner of the tasks
+        tasks: List of dicts with "content" and "category" keys
+    """
+    client = get_client()
+    rows = [
+        {"user_id": user_id, "content": task["content"], "category": task["category"]}
+        for task in tasks
+    ]
+    response = client.table("tasks").insert(rows).execute()
+    bump_data_version(user_id)
+    return response.data
 
 
 def get_tasks_by_category(user_id: str, category: str, limit: Optional[int] = None, offset: int = 0) -> list:
-    """Get active tasks for a user in a specific category with optional pagination."""
+    """Get active tasks for a user in a specific category with optional pagination.
+    
+    Whole categories (no limit or offset) are cached until the user's next write,
+    pages are cut from a cached whole category when there is one.
+    """
+    whole_category = limit is None and offset == 0
+    version = get_data_version(user_id)
+    cached = _category_lists.get((user_id, version, category))
+    if cached is not None:
+        return _page(cached, limit, offset)
+    
     client = get_client()
     query = (
         client.table("tasks")
@@ -33,107 +142,394 @@ def get_tasks_by_category(user_id: str, category: str, limit: Optional[int] = No
     if limit is not None:
         query = query.limit(limit)
     
-    response = query.execute()
+    # Every list screen waits on this read, a slow one is sent twice
+    try:
+        with hedged():
+            response = query.execute()
+    except DatabaseUnavailable:
+        stale = _last_known.get(("list", user_id, category))
+        if stale is None:
+            raise
+        return _page(stale, limit, offset)
+    if whole_category:
+        prime_tasks_by_category(user_id, version, category, response.data)
     return response.data
 
 
+def _page(tasks: list, limit: Optional[int], offset: int) -> list:
+    return list(tasks[offset:] if limit is None else tasks[offset:offset + limit])
+
+
+def prime_tasks_by_category(user_id: str, version: int, category: str, tasks: list) -> None:
+    """Cache a user's whole category, read at the given data version."""
+    _category_lists.set((user_id, version, category), list(tasks))
+    _last_known.set(("list", user_id, category), list(tasks))
+    for task in tasks:
+        _last_known.set(("task", task["id"]), task)
+
+
+def iter_tasks_keyset(user_id: str, completed: bool, columns: str = "*", page_size: int = 500) -> Iterator[dict]:
+    """Yield all active or completed tasks of a user, oldest first.
+    
+    Pages with keyset queries on (created_at, id) rather than offsets, so every
+    page costs the same no matter how deep into the history it is.
+    
+    Args:
+        user_id: Owner of the tasks
+        completed: Whether to page through completed tasks instead of active ones
+        columns: Columns to select (must include created_at and id)
+        page_size: Rows fetched per query
+    """
+    client = get_client()
+    last_task = None
+    
+    while True:
+        query = client.table("tasks").select(columns).eq("user_id", user_id)
+        if completed:
+            query = query.not_.is_("completed_at", "null")
+        else:
+            query = query.is_("completed_at", "null")
+        
+        if last_task:
+            created_at = last_task["created_at"]
+            query = query.or_(
+                f'created_at.gt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.gt.{last_task["id"]})'
+            )
+        
+        response = query.order("created_at").order("id").limit(page_size).execute()
+        yield from response.data
+        
+        if len(response.data) < page_size:
+            return
+        last_task = response.data[-1]
+
+
 def get_task_counts(user_id: str) -> dict:
-    """Get count of active tasks in each category."""
+    """Get count of active tasks in each category (cached until the user's next write)."""
+    version = get_data_version(user_id)
+    cached = _task_counts.get((user_id, version))
+    if cached is not None:
+        return dict(cached)
+    
     client = get_client()
     
     counts = {"now": 0, "soon": 0, "someday": 0}
     
-    for category in counts.keys():
-        response = (
-            client.table("tasks")
-            .select("id", count="exact")
-            .eq("user_id", user_id)
-            .eq("category", category)
-            .is_("completed_at", "null")
-            .execute()
-        )
-        counts[category] = response.count or 0
+    try:
+        for category in counts.keys():
+            with hedged():
+                response = (
+                    client.table("tasks")
+                    .select("id", count="exact")
+                    .eq("user_id", user_id)
+                    .eq("category", category)
+                    .is_("completed_at", "null")
+                    .execute()
+                )
+            counts[category] = response.count or 0
+    except DatabaseUnavailable:
+        stale = _last_known.get(("counts", user_id))
+        if stale is None:
+            raise
+        return dict(stale)
     
+    prime_task_counts(user_id, version, counts)
     return counts
 
 
+def prime_task_counts(user_id: str, version: int, counts: dict) -> None:
+    """Cache a user's task counts, read at the given data version."""
+    _task_counts.set((user_id, version), dict(counts))
+    _last_known.set(("counts", user_id), dict(counts))
+
+
 def get_task_by_id(task_id: str) -> Optional[dict]:
-    """Get a task by its ID."""
+    """Get a task by its ID (the last known row while the database is unavailable)."""
     client = get_client()
-    response = client.table("tasks").select("*").eq("id", task_id).execute()
-    return response.data[0] if response.data else None
+    try:
+        response = client.table("tasks").select("*").eq("id", task_id).execute()
+    except DatabaseUnavailable:
+        stale = _last_known.get(("task", task_id))
+        if stale is None:
+            raise
+        return stale
+    if not response.data:
+        return None
+    _last_known.set(("task", task_id), response.data[0])
+    return response.data[0]
 
 
 def get_task_by_message_id(user_id: str, telegram_message_id: int) -> Optional[dict]:
     """Get an active task by its original Telegram message ID."""
     client = get_client()
-    response = (
-        client.table("tasks")
-        .select("*")
-        .eq("user_id", user_id)
-        .eq("telegram_message_id", telegram_message_id)
-        .is_("completed_at", "null")
-        .execute()
-    )
+    try:
+        response = (
+            client.table("tasks")
+            .select("*")
+            .eq("user_id", user_id)
+            .eq("telegram_message_id", telegram_message_id)
+            .is_("completed_at", "null")
+            .execute()
+        )
+    except DatabaseUnavailable:
+        for category in CATEGORIES:
+            for task in _last_known.get(("list", user_id, category)) or []:
+                if task.get("telegram_message_id") == telegram_message_id:
+                    return task
+        raise
     return response.data[0] if response.data else None
 
 
-def update_task_content(task_id: str, content: str) -> dict:
+@journaled
+@idempotent()
+def update_task_content(user_id: str, task_id: str, content: str) -> dict:
     """Update task content (for edit detection)."""
     client = get_client()
-    response = client.table("tasks").update({"content": content}).eq("id", task_id).execute()
+    response = client.table("tasks").update({"content": content}).eq("user_id", user_id).eq("id", task_id).execute()
+    bump_data_version(user_id)
     return response.data[0]
 
 
-def update_task_category(task_id: str, category: str) -> dict:
+@journaled
+@idempotent()
+def update_task_category(user_id: str, task_id: str, category: str) -> dict:
     """Move task to a different category (promote/demote)."""
     client = get_client()
-    response = client.table("tasks").update({"category": category}).eq("id", task_id).execute()
+    response = client.table("tasks").update({"category": category}).eq("user_id", user_id).eq("id", task_id).execute()
+    bump_data_version(user_id)
     return response.data[0]
 
 
-def complete_task(task_id: str) -> dict:
-    """Mark a task as completed."""
+@journaled
+@idempotent()
+def complete_task(user_id: str, task_id: str) -> dict:
+    """Mark a task as completed (a no-op if it already is)."""
     client = get_client()
-    from datetime import datetime, timezone
-    
     response = (
         client.table("tasks")
         .update({"completed_at": datetime.now(timezone.utc).isoformat()})
+        .eq("user_id", user_id)
         .eq("id", task_id)
+        .is_("completed_at", "null")
         .execute()
     )
-    return response.data[0]
+    bump_data_version(user_id)
+    return response.data[0] if response.data else {}
 
 
-def delete_task(task_id: str) -> None:
+@journaled
+@idempotent()
+def delete_task(user_id: str, task_id: str) -> None:
     """Permanently delete a task."""
     client = get_client()
-    client.table("tasks").delete().eq("id", task_id).execute()
+    client.table("tasks").delete().eq("user_id", user_id).eq("id", task_id).execute()
+    bump_data_version(user_id)
 
 
-def update_task_shown(task_id: str) -> dict:
-    """Update shown_count and last_shown_at when task is displayed."""
+@journaled
+@idempotent()
+def update_tasks_category(user_id: str, task_ids: list, category: str) -> list:
+    """Move several tasks to a category with a single update."""
     client = get_client()
-    from datetime import datetime, timezone
-    
-    # Get current task to increment shown_count
-    task = get_task_by_id(task_id)
-    if not task:
-        return {}
-    
     response = (
         client.table("tasks")
-        .update({
-            "shown_count": (task.get("shown_count", 0) or 0) + 1,
-            "last_shown_at": datetime.now(timezone.utc).isoformat()
-        })
-        .eq("id", task_id)
+        .update({"category": category})
+        .eq("user_id", user_id)
+        .in_("id", task_ids)
+        .execute()
+    )
+    bump_data_version(user_id)
+    return response.data
+
+
+@journaled
+@idempotent()
+def complete_tasks(user_id: str, task_ids: list) -> list:
+    """Mark several tasks as completed with a single update."""
+    client = get_client()
+    response = (
+        client.table("tasks")
+        .update({"completed_at": datetime.now(timezone.utc).isoformat()})
+        .eq("user_id", user_id)
+        .in_("id", task_ids)
+        .is_("completed_at", "null")
         .execute()
     )
+    bump_data_version(user_id)
+    return response.data
+
+
+@journaled
+@idempotent()
+def delete_tasks(user_id: str, task_ids: list) -> None:
+    """Permanently delete several tasks with a single delete."""
+    client = get_client()
+    client.table("tasks").delete().eq("user_id", user_id).in_("id", task_ids).execute()
+    bump_data_version(user_id)
+
+
+def update_task_shown(task_id: str) -> dict:
+    """Update shown_count and last_shown_at when task is displayed.
+    
+    Best effort: skipped while the database is unavailable.
+    """
+    client = get_client()
+    try:
+        # Get current task to increment shown_count
+        task = get_task_by_id(task_id)
+        if not task:
+            return {}
+        
+        response = (
+            client.table("tasks")
+            .update({
+                "shown_count": (task.get("shown_count", 0) or 0) + 1,
+                "last_shown_at": datetime.now(timezone.utc).isoformat()
+            })
+            .eq("id", task_id)
+            .execute()
+        )
+    except DatabaseUnavailable:
+        return {}
+    # Shown stats are no write of the user's data (no version bump), patch the
+    # cached list so the next shuffle sees them
+    _refresh_cached_task(response.data[0])
     return response.data[0]
 
 
+def _refresh_cached_task(task: dict) -> None:
+    _last_known.set(("task", task["id"]), task)
+    key = (task["user_id"], get_data_version(task["user_id"]), task["category"])
+    cached = _category_lists.get(key)
+    if cached is not None:
+        _category_lists.set(key, [task if cached_task["id"] == task["id"] else cached_task for cached_task in cached])
+
+
+# Journaled writes _show_journaled_write knows how to apply
+_SHOWN_OPERATIONS = {
+    "capture_task",
+    "update_task_content",
+    "update_task_category",
+    "complete_task",
+    "delete_task",
+    "update_tasks_category",
+    "complete_tasks",
+    "delete_tasks",
+}
+
+
+def _show_journaled_write(operation: str, arguments: dict) -> None:
+    """Apply a journaled write to the cached views, so the user sees it before replay.
+    
+    Patches the user's cached lists and counts, current or last known, then
+    bumps the data version and caches the patched views under the new one.
+    A view that can't be patched exactly (the task isn't in it) is dropped.
+    """
+    if operation not in _SHOWN_OPERATIONS:
+        return
+    if operation == "capture_task":
+        from bot.services.user_service import get_cached_user
+        
+        user = get_cached_user(arguments["telegram_id"])
+        if user is None:
+            return
+        user_id = user["id"]
+    else:
+        user_id = arguments["user_id"]
+    task_ids = arguments.get("task_ids") or [arguments.get("task_id")]
+    
+    version = get_data_version(user_id)
+    lists = {}
+    for category in CATEGORIES:
+        tasks = _category_lists.get((user_id, version, category))
+        lists[category] = list(tasks if tasks is not None else _last_known.get(("list", user_id, category)) or [])
+    known = {task["id"]: (category, task) for category, tasks in lists.items() for task in tasks}
+    counts = _task_counts.get((user_id, version)) or _last_known.get(("counts", user_id))
+    counts = dict(counts) if counts is not None else None
+    completed = _completed_counts.get((user_id, version))
+    if completed is None:
+        completed = _last_known.get(("completed_count", user_id))
+    
+    if operation == "capture_task":
+        if not arguments.get("task_id"):
+            counts = None
+        else:
+            category = arguments.get("category", "someday")
+            lists[category].append({
+                "id": arguments["task_id"],
+                "user_id": user_id,
+                "content": arguments["content"],
+                "telegram_message_id": arguments["telegram_message_id"],
+                "category": category,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "completed_at": None,
+                "shown_count": 0,
+                "last_shown_at": None,
+            })
+            if counts is not None:
+                counts[category] += 1
+    else:
+        if not all(task_id in known for task_id in task_ids):
+            # Moved or removed from a view we don't have, the counts can't be trusted
+            counts = None
+            if operation in ("complete_task", "complete_tasks"):
+                completed = None
+        for task_id in task_ids:
+            if task_id not in known:
+                continue
+            category, task = known[task_id]
+            lists[category] = [other for other in lists[category] if other["id"] != task_id]
+            if operation == "update_task_content":
+                lists[category].append({**task, "content": arguments["content"]})
+            elif operation in ("update_task_category", "update_tasks_category"):
+                lists[arguments["category"]].append({**task, "category": arguments["category"]})
+                if counts is not None:
+                    counts[category] -= 1
+                    counts[arguments["category"]] += 1
+            else:
+                if counts is not None:
+                    counts[category] -= 1
+                if operation in ("complete_task", "complete_tasks") and completed is not None:
+                    completed += 1
+    
+    bump_data_version(user_id)
+    version = get_data_version(user_id)
+    for category, tasks in lists.items():
+        tasks.sort(key=lambda task: task.get("created_at") or "")
+        prime_tasks_by_category(user_id, version, category, tasks)
+    if counts is not None:
+        prime_task_counts(user_id, version, counts)
+    if completed is not None:
+        _completed_counts.set((user_id, version), completed)
+        _last_known.set(("completed_count", user_id), completed)
+
+
+add_journal_listener(_show_journaled_write)
+
+
+def shuffle_now_tasks(user_id: str, limit: int, exclude: Optional[list] = None, record_shown: bool = True) -> list:
+    """Pick NOW tasks to display with the shuffle_now_tasks database function.
+    
+    Same rules as shuffle_service.get_shuffled_tasks, but only the picked rows
+    are transferred, and their shown stats are updated in the same statement.
+    
+    Args:
+        user_id: Owner of the tasks
+        limit: Number of tasks to display
+        exclude: IDs of the tasks currently on screen, picked only as a last resort
+        record_shown: Whether to bump shown_count / last_shown_at of the picked tasks
+    """
+    client = get_client()
+    response = client.rpc("shuffle_now_tasks", {
+        "p_user_id": user_id,
+        "p_limit": limit,
+        "p_exclude": list(exclude or []),
+        "p_record_shown": record_shown,
+    }).execute()
+    return response.data
+
+
 def get_completed_tasks(user_id: str, limit: int = 10, offset: int = 0) -> list:
     """Get completed tasks for a user, sorted by most recently completed."""
     client = get_client()
@@ -153,13 +549,26 @@ def get_completed_tasks(user_id: str, limit: int = 10, offset: int = 0) -> list:
 
 
 def get_completed_task_count(user_id: str) -> int:
-    """Get count of completed tasks for a user."""
+    """Get count of completed tasks for a user (cached until the user's next write)."""
+    version = get_data_version(user_id)
+    cached = _completed_counts.get((user_id, version))
+    if cached is not None:
+        return cached
+    
     client = get_client()
-    response = (
-        client.table("tasks")
-        .select("id", count="exact")
-        .eq("user_id", user_id)
-        .not_.is_("completed_at", "null")
-        .execute()
-    )
+    try:
+        response = (
+            client.table("tasks")
+            .select("id", count="exact")
+            .eq("user_id", user_id)
+            .not_.is_("completed_at", "null")
+            .execute()
+        )
+    except DatabaseUnavailable:
+        stale = _last_known.get(("completed_count", user_id))
+        if stale is None:
+            raise
+        return stale
+    _completed_counts.set((user_id, version), response.count or 0)
+    _last_known.set(("completed_count", user_id), response.count or 0)
     return response.count or 0
@@ -1,34 +1,88 @@
 from typing import Optional
+from bot.db.circuit_breaker import DatabaseUnavailable
 from bot.db.supabase_client import get_client
+from bot.services.version_service import bump_data_version
+from bot.utils.cache import TTLCache, register_cache
+
+# User rows are read on every update but only change through
+# update_user_settings, which refreshes the cached row. Rows are shared
+# between updates: copy settings before changing them.
+_users = TTLCache(maxsize=5000, ttl=300)  # telegram_id -> user row
+register_cache("users", _users)
+
+# Served when the database is unavailable, long after _users expired
+_last_known_users = TTLCache(maxsize=20000, ttl=86400)  # telegram_id -> user row
+register_cache("last_known_users", _last_known_users)
 
 
 def get_or_create_user(telegram_id: int) -> dict:
     """Get existing user or create a new one."""
+    cached = _users.get(telegram_id)
+    if cached is not None:
+        return cached
+    
     client = get_client()
     
     # Try to get existing user
-    response = client.table("users").select("*").eq("telegram_id", telegram_id).execute()
+    try:
+        response = client.table("users").select("*").eq("telegram_id", telegram_id).execute()
+    except DatabaseUnavailable:
+        stale = _last_known_users.get(telegram_id)
+        if stale is None:
+            raise
+        return stale
     
     if response.data:
+        prime_user(response.data[0])
         return response.data[0]
     
     # Create new user
     new_user = {"telegram_id": telegram_id}
     response = client.table("users").insert(new_user).execute()
+    prime_user(response.data[0])
     return response.data[0]
 
 
 def get_user_by_telegram_id(telegram_id: int) -> Optional[dict]:
     """Get user by Telegram ID."""
+    cached = _users.get(telegram_id)
+    if cached is not None:
+        return cached
+    
     client = get_client()
-    response = client.table("users").select("*").eq("telegram_id", telegram_id).execute()
-    return response.data[0] if response.data else None
+    try:
+        response = client.table("users").select("*").eq("telegram_id", telegram_id).execute()
+    except DatabaseUnavailable:
+        stale = _last_known_users.get(telegram_id)
+        if stale is None:
+            raise
+        return stale
+    if not response.data:
+        return None
+    prime_user(response.data[0])
+    return response.data[0]
+
+
+def get_cached_user(telegram_id: int) -> Optional[dict]:
+    """Get the last known user row without reading the database, None if there is none."""
+    cached = _users.get(telegram_id)
+    if cached is not None:
+        return cached
+    return _last_known_users.get(telegram_id)
+
+
+def prime_user(user: dict) -> None:
+    """Cache a user row."""
+    _users.set(user["telegram_id"], user)
+    _last_known_users.set(user["telegram_id"], user)
 
 
 def update_user_settings(user_id: str, settings: dict) -> dict:
     """Update user settings."""
     client = get_client()
     response = client.table("users").update({"settings": settings}).eq("id", user_id).execute()
+    bump_data_version(user_id)
+    prime_user(response.data[0])
     return response.data[0]
 
 
@@ -0,0 +1,32 @@
+import itertools
+from typing import Optional
+
+from bot.utils.cache import register_cache
+
+# Per-user data version, bumped after every write to the user's tasks or
+# settings. Anything derived from the data can be cached under the version
+# it was read at, a bump makes those entries unreachable.
+#
+# Versions come from one process-wide counter, so a user's version only ever
+# grows. Entries are never evicted: an evicted user would restart at 0 and
+# could hit entries cached before the eviction.
+_versions = {}  # user_id -> version
+_counter = itertools.count(1)
+
+register_cache("data_versions", _versions)
+
+
+def get_data_version(user_id: str) -> int:
+    """Get the current data version of a user (0 until their first write)."""
+    return _versions.get(user_id, 0)
+
+
+def bump_data_version(user_id: Optional[str]) -> None:
+    """Mark a user's data as changed.
+
+    Call this after the write has been sent, never before: a read that starts
+    between an early bump and the write would cache stale data under the new
+    version.
+    """
+    if user_id:
+        _versions[user_id] = next(_counter)
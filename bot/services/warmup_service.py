@@ -0,0 +1,119 @@
+import logging
+import time
+from typing import Optional
+
+from bot.db.supabase_client import get_client
+from bot.services.task_service import prime_task_counts, prime_tasks_by_category
+from bot.services.user_service import prime_user
+from bot.services.version_service import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Users per bulk query (bounds the length of the in.(...) filter)
+BATCH_SIZE = 100
+
+# PostgREST returns at most this many rows per request by default
+PAGE_SIZE = 1000
+
+
+def get_recently_active_user_ids(limit: int) -> list:
+    """
+    Get the IDs of the users active most recently, newest first.
+
+    There is no activity column: a user is as recent as the last task they
+    added or were shown. Two queries, whatever the number of users.
+    """
+    client = get_client()
+    last_active = {}
+    for column in ("last_shown_at", "created_at"):
+        response = (
+            client.table("tasks")
+            .select(f"user_id,{column}")
+            .order(column, desc=True, nullsfirst=False)
+            .limit(limit * 10)
+            .execute()
+        )
+        for row in response.data:
+            if row[column] and row[column] > last_active.get(row["user_id"], ""):
+                last_active[row["user_id"]] = row[column]
+    return sorted(last_active, key=last_active.get, reverse=True)[:limit]
+
+
+def _select_all(build_query, deadline: float) -> Optional[list]:
+    """Page through a query. None if the deadline (monotonic time) passed before the last page."""
+    rows = []
+    while time.monotonic() < deadline:
+        response = build_query().range(len(rows), len(rows) + PAGE_SIZE - 1).execute()
+        rows.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            return rows
+    return None
+
+
+def _warm_batch(user_ids: list, deadline: float) -> int:
+    """Preload user rows, task counts and NOW lists of some users. Returns the users warmed."""
+    client = get_client()
+
+    # Read before the queries: a write meanwhile bumps the version, and what we
+    # cache under the old one is never served
+    versions = {user_id: get_data_version(user_id) for user_id in user_ids}
+
+    users = _select_all(lambda: client.table("users").select("*").in_("id", user_ids).order("id"), deadline)
+    # Only the category of every active task, to count them
+    active = _select_all(
+        lambda: client.table("tasks").select("id,user_id,category")
+        .in_("user_id", user_ids).is_("completed_at", "null").order("id"),
+        deadline,
+    )
+    now_tasks = _select_all(
+        lambda: client.table("tasks").select("*")
+        .in_("user_id", user_ids).eq("category", "now").is_("completed_at", "null")
+        .order("created_at").order("id"),
+        deadline,
+    )
+    if users is None or active is None or now_tasks is None:
+        return 0
+
+    counts = {user_id: {"now": 0, "soon": 0, "someday": 0} for user_id in user_ids}
+    for task in active:
+        counts[task["user_id"]][task["category"]] += 1
+    now_lists = {user_id: [] for user_id in user_ids}
+    for task in now_tasks:
+        now_lists[task["user_id"]].append(task)
+
+    for user in users:
+        prime_user(user)
+    for user_id in user_ids:
+        prime_task_counts(user_id, versions[user_id], counts[user_id])
+        prime_tasks_by_category(user_id, versions[user_id], "now", now_lists[user_id])
+    return len(users)
+
+
+def warm_caches(max_users: int, max_seconds: float) -> dict:
+    """
+    Preload the caches for the most recently active users, in bulk.
+
+    Bounded by the number of users and by time: whatever is not loaded when
+    the time is up stays cold. Blocking, run it in a worker thread.
+
+    Returns:
+        dict: users warmed, elapsed ms, whether everything was loaded in time
+    """
+    start = time.monotonic()
+    deadline = start + max_seconds
+    warmed = 0
+    complete = False
+    try:
+        user_ids = get_recently_active_user_ids(max_users)
+        for index in range(0, len(user_ids), BATCH_SIZE):
+            if time.monotonic() >= deadline:
+                break
+            warmed += _warm_batch(user_ids[index:index + BATCH_SIZE], deadline)
+        else:
+            complete = time.monotonic() < deadline
+    except Exception:
+        logger.exception("Warming the caches failed")
+
+    stats = {"users": warmed, "ms": round((time.monotonic() - start) * 1000), "complete": complete}
+    logger.info("Warmed caches for %d recently active users in %d ms%s", warmed, stats["ms"], "" if complete else " (incomplete)")
+    return stats
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Latest background write per key (user), so one user's writes run in order
+_pending = {}
+
+
+def create_executor(workers: int) -> ThreadPoolExecutor:
+    """
+    Thread pool for the event loop's default executor (asyncio.to_thread).
+    
+    Handlers make their database calls there: a thread per update worker,
+    plus room for background writes, prefetches and the journal replay.
+    """
+    return ThreadPoolExecutor(max_workers=2 * workers + 4, thread_name_prefix="db")
+
+
+def run_in_background(key, func: Callable, *args, on_error: Optional[Callable[[], Awaitable]] = None) -> asyncio.Task:
+    """
+    Run a blocking write in a worker thread without waiting for it.
+    
+    Writes sharing a key run one after another in submission order.
+    
+    Args:
+        key: Ordering key, usually the user ID
+        func: Blocking function to call
+        *args: Arguments for func
+        on_error: Coroutine function awaited when the write fails, to reconcile the UI
+    
+    Returns:
+        asyncio.Task: Resolves to True if the write succeeded, False otherwise
+    """
+    previous = _pending.get(key)
+    task = asyncio.create_task(_run_after(previous, func, args, on_error))
+    _pending[key] = task
+    task.add_done_callback(lambda done: _forget(key, done))
+    return task
+
+
+async def wait_for_pending(key) -> None:
+    """Wait until every background write for a key has finished."""
+    task = _pending.get(key)
+    if task:
+        # Shield so a cancelled reader doesn't cancel the write itself
+        await asyncio.shield(task)
+
+
+def _forget(key, task: asyncio.Task) -> None:
+    if _pending.get(key) is task:
+        del _pending[key]
+
+
+async def _run_after(previous: Optional[asyncio.Task], func: Callable, args: tuple, on_error) -> bool:
+    if previous:
+        await asyncio.shield(previous)
+    
+    try:
+        await asyncio.to_thread(func, *args)
+        return True
+    except Exception:
+        logger.exception("Background write %s%s failed", func.__name__, args)
+    
+    if on_error:
+        try:
+            await on_error()
+        except Exception:
+            logger.exception("Reconciling failed write %s failed", func.__name__)
+    return False
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+_MISSING = object()
+
+# Every in-process cache, by name, so diagnostics can report their sizes
+_registry = {}
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed time.
+    
+    Safe to share between the event loop and background worker threads.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, default=None) -> Any:
+        """Get a value, or default if it is missing or expired."""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value) -> None:
+        """Store a value, evicting the least recently used entries when full."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key, default=None) -> Any:
+        """Remove a value and return it."""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+    
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __len__(self) -> int:
+        """Number of live entries. Drops the expired ones first, so sizes in diagnostics aren't stale."""
+        with self._lock:
+            now = time.monotonic()
+            expired = [key for key, (_, expires_at) in self._data.items() if expires_at < now]
+            for key in expired:
+                del self._data[key]
+            return len(self._data)
+
+
+def register_cache(name: str, cache) -> None:
+    """Register an in-process cache (anything with a length) under a name."""
+    _registry[name] = cache
+
+
+def get_cache_sizes() -> dict:
+    """Get the current number of entries in every registered cache."""
+    return {name: len(cache) for name, cache in _registry.items()}
+
+
+def get_registered_caches() -> dict:
+    """Get every registered cache by name."""
+    return dict(_registry)
+
+
+def get_cache_stats() -> dict:
+    """Get (hits, misses) of every registered TTLCache."""
+    return {name: (cache.hits, cache.misses) for name, cache in _registry.items() if isinstance(cache, TTLCache)}
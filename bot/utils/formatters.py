@@ -96,11 +96,354 @@ DEFAULT_EMPTY = {
 }
 
 
+COMPLETED_EMPTY = {
+    "short": ("No completed tasks yet.", "Get to work!"),
+    "full": "No completed tasks yet. Get to work!",
+    "mono": ("No completed tasks yet.", "Get to work!")
+}
+
+
+# =============================================================================
+# BOX COMPONENTS
+# =============================================================================
+
+CLASSIC_BOX_WIDTH = 15
+
+# Rounded edges box components
+ROUND_CLASSIC_TOP = f"╭{'─' * CLASSIC_BOX_WIDTH}╮"
+ROUND_CLASSIC_MID = f"├{'─' * CLASSIC_BOX_WIDTH}┤"
+ROUND_CLASSIC_BOT = f"╰{'─' * CLASSIC_BOX_WIDTH}╯"
+
+# Square edges box components
+SQUARE_CLASSIC_TOP = f"┌{'─' * CLASSIC_BOX_WIDTH}┐"
+SQUARE_CLASSIC_MID = f"├{'─' * CLASSIC_BOX_WIDTH}┤"
+SQUARE_CLASSIC_BOT = f"└{'─' * CLASSIC_BOX_WIDTH}┘"
+
+CLASSIC_SIDE = "  "
+
+CLASSIC_TOP = SQUARE_CLASSIC_TOP
+CLASSIC_MID = SQUARE_CLASSIC_MID
+CLASSIC_BOT = SQUARE_CLASSIC_BOT
+
+MINIMAL_DIVIDER = "───────────────"
+
+MONO_BOX_WIDTH = 30
+
+MONO_TOP = f"┌{'─' * MONO_BOX_WIDTH}┐"
+MONO_MID = f"├{'─' * MONO_BOX_WIDTH}┤"
+MONO_BOT = f"└{'─' * MONO_BOX_WIDTH}┘"
+
+
+def _pad(text: str, width: int = MONO_BOX_WIDTH) -> str:
+    """Pad text to fixed width for monospace alignment."""
+    return text[:width].ljust(width)
+
+
+def _classic_line(text: str) -> str:
+    return f"{CLASSIC_SIDE} {text}"
+
+
+def _minimal_line(text: str) -> str:
+    return text
+
+
+def _mono_line(text: str = "") -> str:
+    return f"│{_pad(text)}│"
+
+
+def _mono_text_line(text: str) -> str:
+    return _mono_line(f"  {text}")
+
+
+# List items, the monospace box has no room for the double space
+
+def _spaced_task_item(number: int, content: str) -> str:
+    return f"[{number}]  {content}"
+
+
+def _compact_task_item(number: int, content: str) -> str:
+    return f"[{number}] {content}"
+
+
+def _spaced_completed_item(number: str, age: str, content: str) -> str:
+    return f"{number}[{age}]  {content}"
+
+
+def _compact_completed_item(number: str, age: str, content: str) -> str:
+    return f"{number}[{age}] {content}"
+
+
+# =============================================================================
+# THEMES
+# Everything that differs between themes lives in this table, the views below
+# are written once against it.
+# =============================================================================
+
+THEMES = {
+    THEME_CLASSIC: {
+        "parse_mode": None,
+        "open": (CLASSIC_TOP,),
+        "divider": (CLASSIC_MID,),
+        "close": (CLASSIC_BOT,),
+        "line": _classic_line,           # Frames one line of content
+        "blank": CLASSIC_SIDE,           # Empty line inside the frame
+        "boxed": True,                   # Pad content with blank lines inside the frame
+        "icons": {"task": ICON_TASK, "settings": ICON_SETTINGS, "theme": ICON_THEME, "completed": ICON_COMPLETED},
+        "category_icons": CATEGORY_EMOJI,
+        "category_fallback": "📋",
+        "meta_separator": " · ",
+        "empty": "short",                # Key into EMPTY_MESSAGES / COMPLETED_EMPTY
+        "description": "lines",          # Two short lines or one full sentence
+        "hint_outside": False,           # "Select tasks below." after the frame
+        "task_item": _spaced_task_item,
+        "task_max": None,
+        "completed_item": _spaced_completed_item,
+        "completed_max": 25,
+        "ellipsis": "...",
+        "wrap": None,                    # Word wrap width for the task detail
+    },
+    THEME_MINIMAL: {
+        "parse_mode": None,
+        "open": (),
+        "divider": (MINIMAL_DIVIDER, ""),
+        "close": (),
+        "line": _minimal_line,
+        "blank": "",
+        "boxed": False,
+        "icons": {"task": ICON_TASK, "settings": ICON_SETTINGS, "theme": ICON_THEME, "completed": ICON_COMPLETED},
+        "category_icons": CATEGORY_EMOJI,
+        "category_fallback": "📋",
+        "meta_separator": " · ",
+        "empty": "full",
+        "description": "full",
+        "hint_outside": False,
+        "task_item": _spaced_task_item,
+        "task_max": None,
+        "completed_item": _spaced_completed_item,
+        "completed_max": 30,
+        "ellipsis": "...",
+        "wrap": None,
+    },
+    THEME_MONOSPACE: {
+        "parse_mode": "Markdown",
+        "open": ("```", MONO_TOP),
+        "divider": (MONO_MID,),
+        "close": (MONO_BOT, "```"),
+        "line": _mono_text_line,
+        "blank": _mono_line(),
+        "boxed": True,
+        "icons": {"task": SYMBOL_TASK, "settings": SYMBOL_SETTINGS, "theme": SYMBOL_THEME, "completed": SYMBOL_COMPLETED},
+        "category_icons": CATEGORY_SYMBOL,
+        "category_fallback": "[?]",
+        "meta_separator": " - ",
+        "empty": "mono",
+        "description": "lines",
+        "hint_outside": True,
+        "task_item": _compact_task_item,
+        "task_max": MONO_BOX_WIDTH - 8,
+        "completed_item": _compact_completed_item,
+        "completed_max": MONO_BOX_WIDTH - 4,
+        "ellipsis": "..",
+        "wrap": MONO_BOX_WIDTH - 4,
+    },
+}
+
+
+# =============================================================================
+# VIEW TEMPLATES
+# A template is a list of tokens, compiled per theme at import time into a
+# tuple of ready-made strings and slots that are filled in at render time.
+# =============================================================================
+
+OPEN = ("open",)
+DIVIDER = ("divider",)
+CLOSE = ("close",)
+PAD = ("pad",)        # Blank line, boxed themes only
+BLANK = ("blank",)    # Blank line in every theme
+
+
+def _text(text: str) -> tuple:
+    """Static line of content."""
+    return ("text", text)
+
+
+def _slot(name: str) -> tuple:
+    """Single line of content filled in at render time."""
+    return ("slot", name)
+
+
+def _lines(name: str) -> tuple:
+    """Lines of content filled in at render time, None renders a blank line."""
+    return ("lines", name)
+
+
+def _raw(name: str) -> tuple:
+    """Lines filled in at render time and placed as-is, outside the frame."""
+    return ("raw", name)
+
+
+def _settings_template(theme: dict) -> list:
+    return [
+        OPEN,
+        _text(f"{theme['icons']['settings']} {TEXT_SETTINGS}"),
+        DIVIDER,
+        PAD,
+        _text(TEXT_SELECT_CATEGORY),
+        PAD,
+        CLOSE,
+    ]
+
+
+def _value_template(icon: str, title: str, description_lines: tuple, description_full: str):
+    """Template for the settings views showing a current value and a description."""
+    def build(theme: dict) -> list:
+        if theme["description"] == "lines":
+            description = description_lines
+        else:
+            description = (description_full,)
+        return [
+            OPEN,
+            _text(f"{theme['icons'][icon]} {title}"),
+            DIVIDER,
+            PAD,
+            _slot("current"),
+            BLANK,
+            *[_text(line) for line in description],
+            PAD,
+            CLOSE,
+        ]
+    return build
+
+
+def _task_detail_template(theme: dict) -> list:
+    return [
+        OPEN,
+        _text(f"{theme['icons']['task']} {TEXT_TASK}"),
+        DIVIDER,
+        PAD,
+        _lines("content"),
+        BLANK,
+        _slot("meta"),
+        CLOSE,
+    ]
+
+
+def _task_list_template(theme: dict) -> list:
+    return [
+        OPEN,
+        _slot("title"),
+        _slot("shown"),
+        DIVIDER,
+        _lines("body"),
+        CLOSE,
+        _raw("after"),
+    ]
+
+
+def _completed_list_template(theme: dict) -> list:
+    return [
+        OPEN,
+        _text(f"{theme['icons']['completed']} {TEXT_COMPLETED}"),
+        _slot("shown"),
+        DIVIDER,
+        _lines("body"),
+        CLOSE,
+    ]
+
+
+VIEW_TEMPLATES = {
+    "settings": _settings_template,
+    "now_limit": _value_template(
+        "settings", TEXT_DISPLAY_LIMIT,
+        (TEXT_LIMIT_DESC_LINE1, TEXT_LIMIT_DESC_LINE2), TEXT_LIMIT_DESC_FULL,
+    ),
+    "theme": _value_template(
+        "theme", TEXT_THEME,
+        (TEXT_THEME_DESC_LINE1, TEXT_THEME_DESC_LINE2), TEXT_THEME_DESC_FULL,
+    ),
+    "show_completed": _value_template(
+        "completed", TEXT_SHOW_COMPLETED,
+        (TEXT_SHOW_COMPLETED_DESC_LINE1, TEXT_SHOW_COMPLETED_DESC_LINE2), TEXT_SHOW_COMPLETED_DESC_FULL,
+    ),
+    "task_detail": _task_detail_template,
+    "task_list": _task_list_template,
+    "completed_list": _completed_list_template,
+}
+
+
+def _compile(theme: dict, tokens: list) -> tuple:
+    """
+    Resolve a template against a theme.
+
+    Frames, blank lines and static text become plain strings, consecutive ones
+    are merged. Only the slots are left for render time.
+    """
+    parts = []
+    static = []
+
+    def flush():
+        if static:
+            parts.append("\n".join(static))
+            static.clear()
+
+    for token in tokens:
+        kind = token[0]
+        if kind in ("open", "divider", "close"):
+            static.extend(theme[kind])
+        elif kind == "pad":
+            if theme["boxed"]:
+                static.append(theme["blank"])
+        elif kind == "blank":
+            static.append(theme["blank"])
+        elif kind == "text":
+            static.append(theme["line"](token[1]))
+        else:
+            flush()
+            parts.append(token)
+    flush()
+    return tuple(parts)
+
+
+_COMPILED = {
+    name: {view: _compile(theme, build(theme)) for view, build in VIEW_TEMPLATES.items()}
+    for name, theme in THEMES.items()
+}
+
+
+def _get_theme(theme: str) -> tuple[dict, dict]:
+    """Get (theme spec, compiled templates), unknown themes fall back to classic."""
+    if theme not in THEMES:
+        theme = THEME_CLASSIC
+    return THEMES[theme], _COMPILED[theme]
+
+
+def _render(theme: dict, compiled: tuple, values: Optional[dict] = None) -> str:
+    """Fill a compiled template and join the output once."""
+    if len(compiled) == 1 and isinstance(compiled[0], str):
+        return compiled[0]
+
+    line = theme["line"]
+    blank = theme["blank"]
+    out = []
+    for part in compiled:
+        if isinstance(part, str):
+            out.append(part)
+            continue
+        kind, name = part
+        if kind == "slot":
+            out.append(line(values[name]))
+        elif kind == "lines":
+            out.extend([blank if text is None else line(text) for text in values[name]])
+        else:  # raw
+            out.extend(values[name])
+    return "\n".join(out)
+
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
-def _get_task_age(created_at) -> str:
+def _get_task_age(created_at, now: Optional[datetime] = None) -> str:
     """Get human-readable task age."""
     if not created_at:
         return ""
@@ -110,8 +453,7 @@ def _get_task_age(created_at) -> str:
     else:
         created_dt = created_at
     
-    now = datetime.now(timezone.utc)
-    delta = now - created_dt
+    delta = (now or datetime.now(timezone.utc)) - created_dt
     
     if delta.days == 0:
         return "today"
@@ -121,7 +463,7 @@ def _get_task_age(created_at) -> str:
         return f"{delta.days}d ago"
 
 
-def _get_completed_time_ago(completed_at) -> str:
+def _get_completed_time_ago(completed_at, now: Optional[datetime] = None) -> str:
     """Get human-readable time since task was completed."""
     if not completed_at:
         return ""
@@ -131,8 +473,7 @@ def _get_completed_time_ago(completed_at) -> str:
     else:
         completed_dt = completed_at
     
-    now = datetime.now(timezone.utc)
-    delta = now - completed_dt
+    delta = (now or datetime.now(timezone.utc)) - completed_dt
     
     if delta.days == 0:
         hours = delta.seconds // 3600
@@ -148,29 +489,60 @@ def _get_completed_time_ago(completed_at) -> str:
         return f"{delta.days}d ago"
 
 
-def _get_display_counts(tasks: list, counts: dict, category: str, limit: Optional[int]) -> tuple[int, int]:
-    """Get displayed and total task counts."""
-    total = counts.get(category, len(tasks))
-    displayed = min(len(tasks), limit) if limit else min(len(tasks), settings.DEFAULT_PAGE_SIZE)
-    return displayed, total
-
-
 def _get_display_tasks(tasks: list, limit: Optional[int]) -> list:
     """Get list of tasks to display."""
     return tasks[:limit] if limit else tasks[:settings.DEFAULT_PAGE_SIZE]
 
 
-def _build_task_meta(category: str, created_at, use_emoji: bool = True, separator: str = " · ") -> str:
+def _get_shown_range(page: int, displayed: int, total: int) -> str:
+    """Get the "start-end/total" range of a paginated view."""
+    start = page * settings.DEFAULT_PAGE_SIZE + 1
+    end = min(start + displayed - 1, total)
+    return f"{start}-{end}/{total}"
+
+
+def _truncate(content: str, max_len: Optional[int], ellipsis: str) -> str:
+    """Shorten content to max_len characters, ellipsis included."""
+    if max_len and len(content) > max_len:
+        return content[:max_len - len(ellipsis)] + ellipsis
+    return content
+
+
+def _wrap(content: str, max_len: Optional[int]) -> list:
+    """Word wrap content into lines of at most max_len characters."""
+    if not max_len or len(content) <= max_len:
+        return [content]
+
+    lines = []
+    current_line = ""
+    for word in content.split():
+        if len(current_line) + len(word) + 1 <= max_len:
+            current_line = f"{current_line} {word}".strip()
+        else:
+            if current_line:
+                lines.append(current_line)
+            current_line = word
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+def _empty_lines(messages: dict, theme: dict) -> list:
+    """Get the empty state lines of a list view, padded for boxed themes."""
+    message = messages[theme["empty"]]
+    lines = list(message) if isinstance(message, tuple) else [message]
+    if theme["boxed"]:
+        return [None, *lines, None]
+    return lines
+
+
+def _build_task_meta(category: str, created_at, theme: dict, now: datetime) -> str:
     """Build task metadata string (category + age)."""
-    if use_emoji:
-        icon = CATEGORY_EMOJI.get(category, "📋")
-    else:
-        icon = CATEGORY_SYMBOL.get(category, "[?]")
-    
+    icon = theme["category_icons"].get(category, theme["category_fallback"])
     meta = f"{icon} {category.capitalize()}"
-    age = _get_task_age(created_at)
+    age = _get_task_age(created_at, now)
     if age:
-        meta += f"{separator}Added {age}"
+        meta += f"{theme['meta_separator']}Added {age}"
     return meta
 
 
@@ -193,12 +565,48 @@ def format_task_list(tasks: list, category: str, counts: dict, limit: Optional[i
     Returns:
         tuple: (message_text, parse_mode) - parse_mode is "Markdown" for monospace, None otherwise
     """
-    if theme == THEME_MINIMAL:
-        return _format_task_list_minimal(tasks, category, counts, limit, page), None
-    elif theme == THEME_MONOSPACE:
-        return _format_task_list_monospace(tasks, category, counts, limit, page), "Markdown"
-    else:  # classic
-        return _format_task_list_classic(tasks, category, counts, limit, page), None
+    spec, compiled = _get_theme(theme)
+    total = counts.get(category, len(tasks))
+    
+    # For paginated views (soon/someday), calculate what we're showing
+    if category in ("soon", "someday") and total > 0:
+        shown_text = _get_shown_range(page, len(tasks), total)
+    else:
+        shown_text = f"{len(tasks)}/{total}"
+    
+    after = []
+    if not tasks:
+        body = _empty_lines(EMPTY_MESSAGES.get(category, DEFAULT_EMPTY), spec)
+    else:
+        display_tasks = _get_display_tasks(tasks, limit) if limit else tasks
+        body = [None] if spec["boxed"] else []
+        task_item = spec["task_item"]
+        task_max = spec["task_max"]
+        for i, task in enumerate(display_tasks, 1):
+            content = task["content"]
+            if task_max:
+                content = _truncate(content, task_max, spec["ellipsis"])
+            body.append(task_item(i, content))
+        
+        # For NOW view, show remaining count
+        if category == "now" and limit:
+            remaining = total - len(display_tasks)
+            if remaining > 0:
+                body.extend([None, f"+{remaining} more"])
+        body.append(None)
+        
+        if spec["hint_outside"]:
+            after.append(TEXT_SELECT_TASKS)
+        else:
+            body.append(TEXT_SELECT_TASKS)
+    
+    icon = spec["category_icons"].get(category, spec["category_fallback"])
+    return _render(spec, compiled["task_list"], {
+        "title": f"{icon} {category.upper()}",
+        "shown": f"{TEXT_SHOWN}: {shown_text}",
+        "body": body,
+        "after": after,
+    }), spec["parse_mode"]
 
 
 def format_task_detail(task: dict, theme: str = THEME_CLASSIC) -> tuple[str, Optional[str]]:
@@ -208,12 +616,14 @@ def format_task_detail(task: dict, theme: str = THEME_CLASSIC) -> tuple[str, Opt
     Returns:
         tuple: (message_text, parse_mode)
     """
-    if theme == THEME_MINIMAL:
-        return _format_task_detail_minimal(task), None
-    elif theme == THEME_MONOSPACE:
-        return _format_task_detail_monospace(task), "Markdown"
-    else:  # classic
-        return _format_task_detail_classic(task), None
+    spec, compiled = _get_theme(theme)
+    now = datetime.now(timezone.utc)
+    category = task.get("category", "someday")
+    
+    return _render(spec, compiled["task_detail"], {
+        "content": _wrap(task["content"], spec["wrap"]),
+        "meta": _build_task_meta(category, task.get("created_at"), spec, now),
+    }), spec["parse_mode"]
 
 
 def format_settings(user: dict, theme: str = THEME_CLASSIC) -> tuple[str, Optional[str]]:
@@ -223,12 +633,8 @@ def format_settings(user: dict, theme: str = THEME_CLASSIC) -> tuple[str, Option
     Returns:
         tuple: (message_text, parse_mode)
     """
-    if theme == THEME_MINIMAL:
-        return _format_settings_minimal(), None
-    elif theme == THEME_MONOSPACE:
-        return _format_settings_monospace(), "Markdown"
-    else:  # classic
-        return _format_settings_classic(), None
+    spec, compiled = _get_theme(theme)
+    return _render(spec, compiled["settings"]), spec["parse_mode"]
 
 
 def format_settings_now_limit(user: dict, theme: str = THEME_CLASSIC) -> tuple[str, Optional[str]]:
@@ -236,25 +642,23 @@ def format_settings_now_limit(user: dict, theme: str = THEME_CLASSIC) -> tuple[s
     settings_data = user.get("settings", {}) or {}
     now_limit = settings_data.get("now_display_limit", 3)
     
-    if theme == THEME_MINIMAL:
-        return _format_now_limit_minimal(now_limit), None
-    elif theme == THEME_MONOSPACE:
-        return _format_now_limit_monospace(now_limit), "Markdown"
-    else:  # classic
-        return _format_now_limit_classic(now_limit), None
+    spec, compiled = _get_theme(theme)
+    return _render(spec, compiled["now_limit"], {
+        "current": f"{TEXT_CURRENT}: {now_limit}",
+    }), spec["parse_mode"]
 
 
 def format_settings_theme(current_theme: str, theme: str = THEME_CLASSIC) -> tuple[str, Optional[str]]:
     """Format theme settings view."""
-    if theme == THEME_MINIMAL:
-        return _format_theme_minimal(current_theme), None
-    elif theme == THEME_MONOSPACE:
-        return _format_theme_monospace(current_theme), "Markdown"
-    else:  # classic
-        return _format_theme_classic(current_theme), None
+    current_name = THEME_NAMES.get(current_theme, "Classic")
+    
+    spec, compiled = _get_theme(theme)
+    return _render(spec, compiled["theme"], {
+        "current": f"{TEXT_CURRENT}: {current_name}",
+    }), spec["parse_mode"]
 
 
-def format_completed_list(tasks: list, total_count: int, theme: str = THEME_CLASSIC, page: int = 0) -> tuple[str, Optional[str]]:
+def format_completed_list(tasks: list, total_count: int, theme: str = THEME_CLASSIC, page: int = 0, numbered: bool = False) -> tuple[str, Optional[str]]:
     """
     Format completed tasks list for display.
     
@@ -263,585 +667,53 @@ def format_completed_list(tasks: list, total_count: int, theme: str = THEME_CLAS
         total_count: Total number of completed tasks
         theme: Visual theme
         page: Current page number (0-indexed)
+        numbered: Prefix tasks with numbers matching the select mode buttons
     
     Returns:
         tuple: (message_text, parse_mode)
     """
-    if theme == THEME_MINIMAL:
-        return _format_completed_list_minimal(tasks, total_count, page), None
-    elif theme == THEME_MONOSPACE:
-        return _format_completed_list_monospace(tasks, total_count, page), "Markdown"
-    else:  # classic
-        return _format_completed_list_classic(tasks, total_count, page), None
-
-
-def format_settings_show_completed(is_enabled: bool, theme: str = THEME_CLASSIC) -> tuple[str, Optional[str]]:
-    """
-    Format show completed button settings view.
-    
-    Returns:
-        tuple: (message_text, parse_mode)
-    """
-    if theme == THEME_MINIMAL:
-        return _format_show_completed_minimal(is_enabled), None
-    elif theme == THEME_MONOSPACE:
-        return _format_show_completed_monospace(is_enabled), "Markdown"
-    else:  # classic
-        return _format_show_completed_classic(is_enabled), None
-
-
-# =============================================================================
-# CLASSIC THEME
-# =============================================================================
-
-CLASSIC_BOX_WIDTH = 15
-
-# Rounded edges box components
-ROUND_CLASSIC_TOP = f"╭{'─' * CLASSIC_BOX_WIDTH}╮"
-ROUND_CLASSIC_MID = f"├{'─' * CLASSIC_BOX_WIDTH}┤"
-ROUND_CLASSIC_BOT = f"╰{'─' * CLASSIC_BOX_WIDTH}╯"
-
-# Square edges box components
-SQUARE_CLASSIC_TOP = f"┌{'─' * CLASSIC_BOX_WIDTH}┐"
-SQUARE_CLASSIC_MID = f"├{'─' * CLASSIC_BOX_WIDTH}┤"
-SQUARE_CLASSIC_BOT = f"└{'─' * CLASSIC_BOX_WIDTH}┘"
-
-CLASSIC_SIDE = "  "
-
-CLASSIC_TOP = SQUARE_CLASSIC_TOP
-CLASSIC_MID = SQUARE_CLASSIC_MID
-CLASSIC_BOT = SQUARE_CLASSIC_BOT
-
-def _format_task_list_classic(tasks: list, category: str, counts: dict, limit: Optional[int] = None, page: int = 0) -> str:
-    emoji = CATEGORY_EMOJI.get(category, "📋")
-    total = counts.get(category, len(tasks))
-    
-    # For paginated views (soon/someday), calculate what we're showing
-    if category in ("soon", "someday") and total > 0:
-        start = page * settings.DEFAULT_PAGE_SIZE + 1
-        end = min(start + len(tasks) - 1, total)
-        shown_text = f"{start}-{end}/{total}"
-    else:
-        displayed = len(tasks)
-        shown_text = f"{displayed}/{total}"
-
-    lines = [
-        CLASSIC_TOP,
-        f"{CLASSIC_SIDE} {emoji} {category.upper()}",
-        f"{CLASSIC_SIDE} {TEXT_SHOWN}: {shown_text}",
-        CLASSIC_MID,
-    ]
-    
-    if not tasks:
-        msg = EMPTY_MESSAGES.get(category, DEFAULT_EMPTY)["short"]
-        lines.extend([
-            CLASSIC_SIDE,
-            f"{CLASSIC_SIDE} {msg[0]}",
-            f"{CLASSIC_SIDE} {msg[1]}",
-            CLASSIC_SIDE,
-        ])
-    else:
-        display_tasks = _get_display_tasks(tasks, limit) if limit else tasks
-        lines.append(CLASSIC_SIDE)
-        for i, task in enumerate(display_tasks, 1):
-            lines.append(f"{CLASSIC_SIDE} [{i}]  {task['content']}")
-        
-        # For NOW view, show remaining count
-        if category == "now" and limit:
-            remaining = total - len(display_tasks)
-            if remaining > 0:
-                lines.extend([CLASSIC_SIDE, f"{CLASSIC_SIDE} +{remaining} more"])
-        lines.append(CLASSIC_SIDE)
-        
-        if tasks:
-            lines.extend([CLASSIC_SIDE + " " + TEXT_SELECT_TASKS])
-    
-    lines.append(CLASSIC_BOT)
-    
-    return "\n".join(lines)
-
-
-def _format_task_detail_classic(task: dict) -> str:
-    content = task["content"]
-    category = task.get("category", "someday")
-    created_at = task.get("created_at")
-    meta = _build_task_meta(category, created_at)
-    
-    return "\n".join([
-        CLASSIC_TOP,
-        f"{CLASSIC_SIDE} {ICON_TASK} {TEXT_TASK}",
-        CLASSIC_MID,
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {content}",
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {meta}",
-        CLASSIC_BOT,
-    ])
-
-
-def _format_settings_classic() -> str:
-    return "\n".join([
-        CLASSIC_TOP,
-        f"{CLASSIC_SIDE} {ICON_SETTINGS} {TEXT_SETTINGS}",
-        CLASSIC_MID,
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {TEXT_SELECT_CATEGORY}",
-        CLASSIC_SIDE,
-        CLASSIC_BOT,
-    ])
-
-
-def _format_now_limit_classic(now_limit: int) -> str:
-    return "\n".join([
-        CLASSIC_TOP,
-        f"{CLASSIC_SIDE} {ICON_SETTINGS} {TEXT_DISPLAY_LIMIT}",
-        CLASSIC_MID,
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {TEXT_CURRENT}: {now_limit}",
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {TEXT_LIMIT_DESC_LINE1}",
-        f"{CLASSIC_SIDE} {TEXT_LIMIT_DESC_LINE2}",
-        CLASSIC_SIDE,
-        CLASSIC_BOT,
-    ])
-
-
-def _format_theme_classic(current_theme: str) -> str:
-    current_name = THEME_NAMES.get(current_theme, "Classic")
-    return "\n".join([
-        CLASSIC_TOP,
-        f"{CLASSIC_SIDE} {ICON_THEME} {TEXT_THEME}",
-        CLASSIC_MID,
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {TEXT_CURRENT}: {current_name}",
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {TEXT_THEME_DESC_LINE1}",
-        f"{CLASSIC_SIDE} {TEXT_THEME_DESC_LINE2}",
-        CLASSIC_SIDE,
-        CLASSIC_BOT,
-    ])
-
-
-def _format_completed_list_classic(tasks: list, total_count: int, page: int = 0) -> str:
+    spec, compiled = _get_theme(theme)
     displayed = len(tasks)
     
     # Calculate what we're showing for pagination
     if total_count > 0 and displayed > 0:
-        start = page * settings.DEFAULT_PAGE_SIZE + 1
-        end = min(start + displayed - 1, total_count)
-        shown_text = f"{start}-{end}/{total_count}"
+        shown_text = _get_shown_range(page, displayed, total_count)
     else:
         shown_text = f"{displayed}/{total_count}"
     
-    lines = [
-        CLASSIC_TOP,
-        f"{CLASSIC_SIDE} {ICON_COMPLETED} {TEXT_COMPLETED}",
-        f"{CLASSIC_SIDE} {TEXT_SHOWN}: {shown_text}",
-        CLASSIC_MID,
-    ]
-    
-    if not tasks:
-        lines.extend([
-            CLASSIC_SIDE,
-            f"{CLASSIC_SIDE} No completed tasks yet.",
-            f"{CLASSIC_SIDE} Get to work!",
-            CLASSIC_SIDE,
-        ])
-    else:
-        lines.append(CLASSIC_SIDE)
-        for task in tasks:
-            time_ago = _get_completed_time_ago(task.get("completed_at"))
-            content = task["content"]
-            # Truncate long content
-            if len(content) > 25:
-                content = content[:22] + "..."
-            lines.append(f"{CLASSIC_SIDE} [{time_ago}]  {content}")
-        lines.append(CLASSIC_SIDE)
-    
-    lines.append(CLASSIC_BOT)
-    
-    return "\n".join(lines)
-
-
-def _format_show_completed_classic(is_enabled: bool) -> str:
-    status = "On" if is_enabled else "Off"
-    return "\n".join([
-        CLASSIC_TOP,
-        f"{CLASSIC_SIDE} {ICON_COMPLETED} {TEXT_SHOW_COMPLETED}",
-        CLASSIC_MID,
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {TEXT_CURRENT}: {status}",
-        CLASSIC_SIDE,
-        f"{CLASSIC_SIDE} {TEXT_SHOW_COMPLETED_DESC_LINE1}",
-        f"{CLASSIC_SIDE} {TEXT_SHOW_COMPLETED_DESC_LINE2}",
-        CLASSIC_SIDE,
-        CLASSIC_BOT,
-    ])
-
-
-# =============================================================================
-# MINIMAL THEME
-# =============================================================================
-
-MINIMAL_DIVIDER = "───────────────"
-
-
-def _format_task_list_minimal(tasks: list, category: str, counts: dict, limit: Optional[int] = None, page: int = 0) -> str:
-    emoji = CATEGORY_EMOJI.get(category, "📋")
-    total = counts.get(category, len(tasks))
-    
-    # For paginated views (soon/someday), calculate what we're showing
-    if category in ("soon", "someday") and total > 0:
-        start = page * settings.DEFAULT_PAGE_SIZE + 1
-        end = min(start + len(tasks) - 1, total)
-        shown_text = f"{start}-{end}/{total}"
-    else:
-        displayed = len(tasks)
-        shown_text = f"{displayed}/{total}"
-    
-    lines = [
-        f"{emoji} {category.upper()}",
-        f"{TEXT_SHOWN}: {shown_text}",
-        MINIMAL_DIVIDER,
-        "",
-    ]
-    
     if not tasks:
-        lines.append(EMPTY_MESSAGES.get(category, DEFAULT_EMPTY)["full"])
+        body = _empty_lines(COMPLETED_EMPTY, spec)
     else:
-        display_tasks = _get_display_tasks(tasks, limit) if limit else tasks
-        for i, task in enumerate(display_tasks, 1):
-            lines.append(f"[{i}]  {task['content']}")
-        
-        # For NOW view, show remaining count
-        if category == "now" and limit:
-            remaining = total - len(display_tasks)
-            if remaining > 0:
-                lines.extend(["", f"+{remaining} more"])
-        
-        lines.extend(["", TEXT_SELECT_TASKS])
-    
-    return "\n".join(lines)
-
-
-def _format_task_detail_minimal(task: dict) -> str:
-    content = task["content"]
-    category = task.get("category", "someday")
-    created_at = task.get("created_at")
-    meta = _build_task_meta(category, created_at)
-    
-    return "\n".join([
-        f"{ICON_TASK} {TEXT_TASK}",
-        MINIMAL_DIVIDER,
-        "",
-        content,
-        "",
-        meta,
-    ])
-
-
-def _format_settings_minimal() -> str:
-    return "\n".join([
-        f"{ICON_SETTINGS} {TEXT_SETTINGS}",
-        MINIMAL_DIVIDER,
-        "",
-        TEXT_SELECT_CATEGORY,
-    ])
-
-
-def _format_now_limit_minimal(now_limit: int) -> str:
-    return "\n".join([
-        f"{ICON_SETTINGS} {TEXT_DISPLAY_LIMIT}",
-        MINIMAL_DIVIDER,
-        "",
-        f"{TEXT_CURRENT}: {now_limit}",
-        "",
-        TEXT_LIMIT_DESC_FULL,
-    ])
-
-
-def _format_theme_minimal(current_theme: str) -> str:
-    current_name = THEME_NAMES.get(current_theme, "Classic")
-    return "\n".join([
-        f"{ICON_THEME} {TEXT_THEME}",
-        MINIMAL_DIVIDER,
-        "",
-        f"{TEXT_CURRENT}: {current_name}",
-        "",
-        TEXT_THEME_DESC_FULL,
-    ])
+        now = datetime.now(timezone.utc)
+        pad = [None] if spec["boxed"] else []
+        completed_item = spec["completed_item"]
+        completed_max = spec["completed_max"]
+        ellipsis = spec["ellipsis"]
+        body = list(pad)
+        for i, task in enumerate(tasks, 1):
+            body.append(completed_item(
+                f"{i}. " if numbered else "",
+                _get_completed_time_ago(task.get("completed_at"), now),
+                _truncate(task["content"], completed_max, ellipsis),
+            ))
+        body.extend(pad)
+    
+    return _render(spec, compiled["completed_list"], {
+        "shown": f"{TEXT_SHOWN}: {shown_text}",
+        "body": body,
+    }), spec["parse_mode"]
 
 
-def _format_completed_list_minimal(tasks: list, total_count: int, page: int = 0) -> str:
-    displayed = len(tasks)
-    
-    # Calculate what we're showing for pagination
-    if total_count > 0 and displayed > 0:
-        start = page * settings.DEFAULT_PAGE_SIZE + 1
-        end = min(start + displayed - 1, total_count)
-        shown_text = f"{start}-{end}/{total_count}"
-    else:
-        shown_text = f"{displayed}/{total_count}"
-    
-    lines = [
-        f"{ICON_COMPLETED} {TEXT_COMPLETED}",
-        f"{TEXT_SHOWN}: {shown_text}",
-        MINIMAL_DIVIDER,
-        "",
-    ]
-    
-    if not tasks:
-        lines.append("No completed tasks yet. Get to work!")
-    else:
-        for task in tasks:
-            time_ago = _get_completed_time_ago(task.get("completed_at"))
-            content = task["content"]
-            if len(content) > 30:
-                content = content[:27] + "..."
-            lines.append(f"[{time_ago}]  {content}")
+def format_settings_show_completed(is_enabled: bool, theme: str = THEME_CLASSIC) -> tuple[str, Optional[str]]:
+    """
+    Format show completed button settings view.
     
-    return "\n".join(lines)
-
-
-def _format_show_completed_minimal(is_enabled: bool) -> str:
+    Returns:
+        tuple: (message_text, parse_mode)
+    """
     status = "On" if is_enabled else "Off"
-    return "\n".join([
-        f"{ICON_COMPLETED} {TEXT_SHOW_COMPLETED}",
-        MINIMAL_DIVIDER,
-        "",
-        f"{TEXT_CURRENT}: {status}",
-        "",
-        TEXT_SHOW_COMPLETED_DESC_FULL,
-    ])
-
-
-# =============================================================================
-# MONOSPACE THEME
-# =============================================================================
-
-MONO_BOX_WIDTH = 30
-
-
-def _pad(text: str, width: int = MONO_BOX_WIDTH) -> str:
-    """Pad text to fixed width for monospace alignment."""
-    return text[:width].ljust(width)
-
-
-def _mono_box_top() -> str:
-    return f"┌{'─' * MONO_BOX_WIDTH}┐"
-
-
-def _mono_box_mid() -> str:
-    return f"├{'─' * MONO_BOX_WIDTH}┤"
-
-
-def _mono_box_bot() -> str:
-    return f"└{'─' * MONO_BOX_WIDTH}┘"
-
-
-def _mono_line(text: str = "") -> str:
-    return f"│{_pad(text)}│"
-
-
-def _format_task_list_monospace(tasks: list, category: str, counts: dict, limit: Optional[int] = None, page: int = 0) -> str:
-    symbol = CATEGORY_SYMBOL.get(category, "[?]")
-    total = counts.get(category, len(tasks))
-    
-    # For paginated views (soon/someday), calculate what we're showing
-    if category in ("soon", "someday") and total > 0:
-        start = page * settings.DEFAULT_PAGE_SIZE + 1
-        end = min(start + len(tasks) - 1, total)
-        shown_text = f"{start}-{end}/{total}"
-    else:
-        displayed = len(tasks)
-        shown_text = f"{displayed}/{total}"
-    
-    lines = [
-        "```",
-        _mono_box_top(),
-        _mono_line(f"  {symbol} {category.upper()}"),
-        _mono_line(f"  {TEXT_SHOWN}: {shown_text}"),
-        _mono_box_mid(),
-    ]
     
-    if not tasks:
-        msg = EMPTY_MESSAGES.get(category, DEFAULT_EMPTY)["mono"]
-        lines.extend([
-            _mono_line(),
-            _mono_line(f"  {msg[0]}"),
-            _mono_line(f"  {msg[1]}"),
-            _mono_line(),
-        ])
-    else:
-        display_tasks = _get_display_tasks(tasks, limit) if limit else tasks
-        lines.append(_mono_line())
-        for i, task in enumerate(display_tasks, 1):
-            content = task["content"]
-            max_len = MONO_BOX_WIDTH - 8
-            if len(content) > max_len:
-                content = content[:max_len - 2] + ".."
-            lines.append(_mono_line(f"  [{i}] {content}"))
-        
-        # For NOW view, show remaining count
-        if category == "now" and limit:
-            remaining = total - len(display_tasks)
-            if remaining > 0:
-                lines.extend([_mono_line(), _mono_line(f"  +{remaining} more")])
-        lines.append(_mono_line())
-    
-    lines.extend([_mono_box_bot(), "```"])
-    
-    if tasks:
-        lines.extend([TEXT_SELECT_TASKS])
-    
-    return "\n".join(lines)
-
-
-def _format_task_detail_monospace(task: dict) -> str:
-    content = task["content"]
-    category = task.get("category", "someday")
-    created_at = task.get("created_at")
-    meta = _build_task_meta(category, created_at, use_emoji=False, separator=" - ")
-    
-    lines = [
-        "```",
-        _mono_box_top(),
-        _mono_line(f"  {SYMBOL_TASK} {TEXT_TASK}"),
-        _mono_box_mid(),
-        _mono_line(),
-    ]
-    
-    # Word wrap content
-    max_len = MONO_BOX_WIDTH - 4
-    if len(content) <= max_len:
-        lines.append(_mono_line(f"  {content}"))
-    else:
-        words = content.split()
-        current_line = ""
-        for word in words:
-            if len(current_line) + len(word) + 1 <= max_len:
-                current_line = f"{current_line} {word}".strip()
-            else:
-                if current_line:
-                    lines.append(_mono_line(f"  {current_line}"))
-                current_line = word
-        if current_line:
-            lines.append(_mono_line(f"  {current_line}"))
-    
-    lines.extend([
-        _mono_line(),
-        _mono_line(f"  {meta}"),
-        _mono_box_bot(),
-        "```",
-    ])
-    
-    return "\n".join(lines)
-
-
-def _format_settings_monospace() -> str:
-    return "\n".join([
-        "```",
-        _mono_box_top(),
-        _mono_line(f"  {SYMBOL_SETTINGS} {TEXT_SETTINGS}"),
-        _mono_box_mid(),
-        _mono_line(),
-        _mono_line(f"  {TEXT_SELECT_CATEGORY}"),
-        _mono_line(),
-        _mono_box_bot(),
-        "```",
-    ])
-
-
-def _format_now_limit_monospace(now_limit: int) -> str:
-    return "\n".join([
-        "```",
-        _mono_box_top(),
-        _mono_line(f"  {SYMBOL_SETTINGS} {TEXT_DISPLAY_LIMIT}"),
-        _mono_box_mid(),
-        _mono_line(),
-        _mono_line(f"  {TEXT_CURRENT}: {now_limit}"),
-        _mono_line(),
-        _mono_line(f"  {TEXT_LIMIT_DESC_LINE1}"),
-        _mono_line(f"  {TEXT_LIMIT_DESC_LINE2}"),
-        _mono_line(),
-        _mono_box_bot(),
-        "```",
-    ])
-
-
-def _format_theme_monospace(current_theme: str) -> str:
-    current_name = THEME_NAMES.get(current_theme, "Classic")
-    return "\n".join([
-        "```",
-        _mono_box_top(),
-        _mono_line(f"  {SYMBOL_THEME} {TEXT_THEME}"),
-        _mono_box_mid(),
-        _mono_line(),
-        _mono_line(f"  {TEXT_CURRENT}: {current_name}"),
-        _mono_line(),
-        _mono_line(f"  {TEXT_THEME_DESC_LINE1}"),
-        _mono_line(f"  {TEXT_THEME_DESC_LINE2}"),
-        _mono_line(),
-        _mono_box_bot(),
-        "```",
-    ])
-
-
-def _format_completed_list_monospace(tasks: list, total_count: int, page: int = 0) -> str:
-    displayed = len(tasks)
-    
-    # Calculate what we're showing for pagination
-    if total_count > 0 and displayed > 0:
-        start = page * settings.DEFAULT_PAGE_SIZE + 1
-        end = min(start + displayed - 1, total_count)
-        shown_text = f"{start}-{end}/{total_count}"
-    else:
-        shown_text = f"{displayed}/{total_count}"
-    
-    lines = [
-        "```",
-        _mono_box_top(),
-        _mono_line(f"  {SYMBOL_COMPLETED} {TEXT_COMPLETED}"),
-        _mono_line(f"  {TEXT_SHOWN}: {shown_text}"),
-        _mono_box_mid(),
-    ]
-    
-    if not tasks:
-        lines.extend([
-            _mono_line(),
-            _mono_line("  No completed tasks yet."),
-            _mono_line("  Get to work!"),
-            _mono_line(),
-        ])
-    else:
-        lines.append(_mono_line())
-        for task in tasks:
-            time_ago = _get_completed_time_ago(task.get("completed_at"))
-            content = task["content"]
-            max_len = MONO_BOX_WIDTH - 4
-            if len(content) > max_len:
-                content = content[:max_len - 2] + ".."
-            lines.append(_mono_line(f"  [{time_ago}] {content}"))
-        lines.append(_mono_line())
-    
-    lines.extend([_mono_box_bot(), "```"])
-    
-    return "\n".join(lines)
-
-
-def _format_show_completed_monospace(is_enabled: bool) -> str:
-    status = "On" if is_enabled else "Off"
-    return "\n".join([
-        "```",
-        _mono_box_top(),
-        _mono_line(f"  {SYMBOL_COMPLETED} {TEXT_SHOW_COMPLETED}"),
-        _mono_box_mid(),
-        _mono_line(),
-        _mono_line(f"  {TEXT_CURRENT}: {status}"),
-        _mono_line(),
-        _mono_line(f"  {TEXT_SHOW_COMPLETED_DESC_LINE1}"),
-        _mono_line(f"  {TEXT_SHOW_COMPLETED_DESC_LINE2}"),
-        _mono_line(),
-        _mono_box_bot(),
-        "```",
-    ])
+    spec, compiled = _get_theme(theme)
+    return _render(spec, compiled["show_completed"], {
+        "current": f"{TEXT_CURRENT}: {status}",
+    }), spec["parse_mode"]
@@ -106,6 +106,10 @@ def get_task_list_keyboard(
         # Split into rows of 5 buttons each
         for j in range(0, len(task_buttons), 5):
             buttons.append(task_buttons[j:j+5])
+        
+        # Multi-select mode for bulk triage of paginated lists
+        if category in ("soon", "someday"):
+            buttons.append([InlineKeyboardButton("☑️ Select", callback_data=f"select_{category}_{page}")])
     
     # Navigation buttons with counts
     if category == "now":
@@ -236,7 +240,8 @@ def get_settings_theme_keyboard(current_theme: str) -> InlineKeyboardMarkup:
 def get_completed_list_keyboard(
     page: int = 0,
     total_count: int = 0,
-    page_size: int = 10
+    page_size: int = 10,
+    selectable: bool = False
 ) -> InlineKeyboardMarkup:
     """Get keyboard for completed tasks list view with pagination.
     
@@ -244,9 +249,13 @@ def get_completed_list_keyboard(
         page: Current page (0-indexed)
         total_count: Total number of completed tasks
         page_size: Number of tasks per page
+        selectable: Whether to offer multi-select mode (page has tasks)
     """
     buttons = []
     
+    if selectable:
+        buttons.append([InlineKeyboardButton("☑️ Select", callback_data=f"select_completed_{page}")])
+    
     # Add pagination buttons if needed
     if total_count > page_size:
         pagination_row = _get_pagination_buttons(page, total_count, page_size, "page_completed")
@@ -257,6 +266,56 @@ def get_completed_list_keyboard(
     return InlineKeyboardMarkup(buttons)
 
 
+def get_selection_keyboard(task_ids: list, category: str, selected_ids: set, page: int = 0) -> InlineKeyboardMarkup:
+    """Get keyboard for multi-select mode on a task list.
+    
+    Numbered buttons toggle selection, the action rows apply to every selected task.
+    
+    Args:
+        task_ids: IDs of the tasks on the current page, in display order
+        category: List being triaged (soon, someday, completed)
+        selected_ids: IDs currently selected
+        page: Current page, used to return to the list on cancel
+    """
+    buttons = []
+    
+    task_buttons = []
+    for i, task_id in enumerate(task_ids[:10], 1):
+        label = f"✓{i}" if task_id in selected_ids else str(i)
+        task_buttons.append(InlineKeyboardButton(label, callback_data=f"sel_{task_id}"))
+    
+    # Split into rows of 5 buttons each
+    for j in range(0, len(task_buttons), 5):
+        buttons.append(task_buttons[j:j+5])
+    
+    all_selected = bool(task_ids) and len(selected_ids) == len(task_ids)
+    buttons.append([
+        InlineKeyboardButton("☐ Select None" if all_selected else "☑️ Select All", callback_data="sel_all")
+    ])
+    
+    count = len(selected_ids)
+    if category == "completed":
+        buttons.append([InlineKeyboardButton(f"🗑️ Delete ({count})", callback_data="bulk_delete")])
+    else:
+        buttons.append([
+            InlineKeyboardButton(f"✅ Done ({count})", callback_data="bulk_complete"),
+            InlineKeyboardButton(f"🗑️ Delete ({count})", callback_data="bulk_delete"),
+        ])
+        
+        move_row = []
+        if category == "soon":
+            move_row.append(InlineKeyboardButton("📤 Move to Now", callback_data="bulk_move_now"))
+            move_row.append(InlineKeyboardButton("📥 Move to Someday", callback_data="bulk_move_someday"))
+        elif category == "someday":
+            move_row.append(InlineKeyboardButton("📤 Move to Now", callback_data="bulk_move_now"))
+            move_row.append(InlineKeyboardButton("📤 Move to Soon", callback_data="bulk_move_soon"))
+        buttons.append(move_row)
+    
+    buttons.append([InlineKeyboardButton("✖ Cancel", callback_data=f"page_{category}_{page}")])
+    
+    return InlineKeyboardMarkup(buttons)
+
+
 def get_settings_show_completed_keyboard(is_enabled: bool) -> InlineKeyboardMarkup:
     """Get keyboard for show completed button toggle."""
     on_label = "[On]" if is_enabled else "On"
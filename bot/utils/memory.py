@@ -0,0 +1,190 @@
+import gc
+import os
+import sys
+import tracemalloc
+from typing import Optional
+
+from bot.utils.cache import TTLCache, get_registered_caches
+
+# Snapshot that /memory diff compares against
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+# Allocations made by the tracing machinery itself are noise
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_rss_bytes() -> Optional[int]:
+    """Get the resident set size of this process, None where /proc is not available."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def start_tracing(frames: int = 1) -> None:
+    """Start tracing allocations (slows allocations down, stop it when done)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def is_tracing() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def stop_tracing() -> None:
+    """Stop tracing allocations and drop the baseline snapshot."""
+    global _baseline
+    _baseline = None
+    tracemalloc.stop()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def take_baseline() -> None:
+    """Remember the current allocations for diff_since_baseline()."""
+    global _baseline
+    _baseline = _snapshot()
+
+
+def top_allocations(limit: int = 10) -> list:
+    """Get the source lines holding the most memory, as (location, size bytes, blocks)."""
+    stats = _snapshot().statistics("lineno")[:limit]
+    return [(_location(stat.traceback), stat.size, stat.count) for stat in stats]
+
+
+def diff_since_baseline(limit: int = 10) -> Optional[list]:
+    """Get the biggest growth since take_baseline() as (location, size diff, block diff), None without a baseline."""
+    if _baseline is None:
+        return None
+    stats = _snapshot().compare_to(_baseline, "lineno")[:limit]
+    return [(_location(stat.traceback), stat.size_diff, stat.count_diff) for stat in stats]
+
+
+def _location(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    path = os.path.relpath(frame.filename, _ROOT) if frame.filename.startswith(_ROOT) else _short_path(frame.filename)
+    return f"{path}:{frame.lineno}"
+
+
+def _short_path(path: str) -> str:
+    # site-packages/telegram/_bot.py is enough to place a third-party line
+    for marker in ("site-packages" + os.sep, "lib" + os.sep + "python"):
+        index = path.find(marker)
+        if index >= 0:
+            return path[index + len(marker):]
+    return path
+
+
+def count_objects() -> dict:
+    """
+    Count live objects, with tasks and users (dicts shaped like their rows) separately.
+
+    Walks every object the garbage collector tracks, only call this on demand.
+    """
+    counts = {"objects": 0, "dicts": 0, "lists": 0, "task dicts": 0, "user dicts": 0}
+    untracked = set()
+    for obj in gc.get_objects():
+        counts["objects"] += 1
+        if type(obj) is dict:
+            counts["dicts"] += 1
+            _count_row(obj, counts)
+        elif type(obj) is list:
+            counts["lists"] += 1
+        # Dicts holding only strings and numbers (most rows) are not tracked
+        # by the GC, find them through their containers
+        for referent in gc.get_referents(obj):
+            if type(referent) is dict and not gc.is_tracked(referent) and id(referent) not in untracked:
+                untracked.add(id(referent))
+                counts["objects"] += 1
+                counts["dicts"] += 1
+                _count_row(referent, counts)
+    return counts
+
+
+def _count_row(row: dict, counts: dict) -> None:
+    if "content" in row and "category" in row and "user_id" in row:
+        counts["task dicts"] += 1
+    elif "telegram_id" in row and "settings" in row:
+        counts["user dicts"] += 1
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Approximate bytes held by a container and everything in it (shared objects counted once)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, TTLCache):
+        obj = obj._data
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def memory_report(application=None) -> str:
+    """Plain text overview: RSS, GC, object counts, caches, and allocations when tracing."""
+    lines = []
+    rss = get_rss_bytes()
+    lines.append(f"RSS: {_format_size(rss)}" if rss is not None else "RSS: unavailable")
+    lines.append("GC generations: " + ", ".join(str(count) for count in gc.get_count())
+                 + f" (collections: {', '.join(str(stats['collections']) for stats in gc.get_stats())})")
+
+    lines.append("")
+    lines.append("Objects:")
+    for name, count in count_objects().items():
+        lines.append(f"  {name}: {count}")
+
+    lines.append("")
+    lines.append("Caches:")
+    caches = get_registered_caches()
+    if application is not None:
+        # Read-only mapping proxies over PTB's per-user and per-chat dicts
+        caches["ptb user_data"] = dict(application.user_data)
+        caches["ptb chat_data"] = dict(application.chat_data)
+    sizes = {name: (len(cache), deep_sizeof(cache)) for name, cache in caches.items()}
+    for name, (entries, size) in sorted(sizes.items(), key=lambda item: -item[1][1]):
+        lines.append(f"  {name}: {entries} entries, ~{_format_size(size)}")
+
+    lines.append("")
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"Traced: {_format_size(current)} (peak {_format_size(peak)})")
+        lines.append("Top allocations:")
+        for location, size, blocks in top_allocations():
+            lines.append(f"  {_format_size(size)} in {blocks} blocks - {location}")
+    else:
+        lines.append("Allocation tracing is off (/memory start)")
+    return "\n".join(lines)
+
+
+def format_diff(diff: list) -> str:
+    """Plain text of diff_since_baseline()."""
+    return "\n".join(
+        f"{'+' if size >= 0 else '-'}{_format_size(abs(size))} ({blocks:+d} blocks) - {location}"
+        for location, size, blocks in diff
+    ) or "No changes"
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
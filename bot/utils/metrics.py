@@ -0,0 +1,213 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from bot.db.circuit_breaker import breaker
+from bot.db.journal import get_journal
+from bot.utils.cache import get_cache_sizes, get_cache_stats
+from bot.utils.scheduler import PriorityUpdateProcessor
+from bot.utils.tracing import KIND_SERVER, Span, add_span_listener, updates_in_flight
+
+# Latency buckets in seconds, from a cache hit to a stuck request
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Every metric, in the order they are rendered
+_metrics = []
+
+
+class Metric:
+    """
+    Base for a named metric family with a fixed set of label names.
+
+    Args:
+        function: Called at scrape time instead of keeping values here, for
+            numbers tracked elsewhere. Returns {label values tuple: value}
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), function: Optional[Callable[[], dict]] = None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.function = function
+        self._values = {}  # label values -> value
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+    def collect(self) -> dict:
+        if self.function:
+            return self.function()
+        with self._lock:
+            return dict(self._values)
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *label_values) -> None:
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # Per-bucket counts (made cumulative when rendered), then sum and count
+                series = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+
+        for label_values, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels + ("le",), label_values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels + ("le",), label_values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# Updates
+UPDATES = Counter("someday_updates_total", "Updates handled, by type and callback route", ("type", "route"))
+UPDATE_DURATION = Histogram("someday_update_duration_seconds", "Time to handle an update", ("type", "route"))
+UPDATES_IN_FLIGHT = Gauge(
+    "someday_updates_in_flight", "Updates being handled right now",
+    function=lambda: {(): updates_in_flight()},
+)
+UPDATE_QUEUE_SIZE = Gauge("someday_update_queue_size", "Updates received but not picked up yet")
+UPDATES_WAITING = Gauge("someday_updates_waiting", "Updates waiting for a worker, by priority", ("priority",))
+UPDATES_SHED = Counter(
+    "someday_updates_shed_total", "Updates answered with a busy notice instead of handled", ("priority", "reason"),
+)
+
+# Database
+DB_QUERY_DURATION = Histogram("someday_db_query_duration_seconds", "Supabase round trip time", ("table", "operation"))
+DB_ERRORS = Counter("someday_db_errors_total", "Failed Supabase round trips", ("table", "operation"))
+DB_CIRCUIT_OPEN = Gauge(
+    "someday_db_circuit_open", "1 while the circuit breaker keeps requests from Supabase",
+    function=lambda: {(): int(breaker.is_open)},
+)
+JOURNAL_PENDING = Gauge(
+    "someday_journal_pending", "Writes journaled while Supabase was unavailable, waiting for replay",
+    function=lambda: {(): len(get_journal())},
+)
+
+# Telegram
+TELEGRAM_REQUEST_DURATION = Histogram("someday_telegram_request_duration_seconds", "Bot API call time", ("method",))
+TELEGRAM_RATE_LIMITED = Counter("someday_telegram_rate_limited_total", "Bot API calls answered with 429", ("method",))
+
+# In-process state
+CACHE_ENTRIES = Gauge(
+    "someday_cache_entries", "Entries in each in-process cache", ("cache",),
+    function=lambda: {(name,): size for name, size in get_cache_sizes().items()},
+)
+CACHE_HITS = Counter(
+    "someday_cache_hits_total", "Cache lookups that found a live entry", ("cache",),
+    function=lambda: {(name,): hits for name, (hits, _) in get_cache_stats().items()},
+)
+CACHE_MISSES = Counter(
+    "someday_cache_misses_total", "Cache lookups that found nothing", ("cache",),
+    function=lambda: {(name,): misses for name, (_, misses) in get_cache_stats().items()},
+)
+
+PROCESS_START_TIME = Gauge("someday_process_start_time_seconds", "Unix time the bot started")
+PROCESS_START_TIME.set(time.time())
+
+
+def observe_span(span: Span) -> None:
+    """Span listener feeding the update, database and Bot API metrics."""
+    attributes = span.attributes
+    seconds = span.duration_ns / 1e9
+
+    if span.kind == KIND_SERVER and "update.type" in attributes:
+        labels = (attributes["update.type"], attributes["update.route"])
+        UPDATES.inc(*labels)
+        UPDATE_DURATION.observe(seconds, *labels)
+    elif "db.table" in attributes:
+        labels = (attributes["db.table"], attributes["db.operation"])
+        DB_QUERY_DURATION.observe(seconds, *labels)
+        if span.error or attributes.get("http.status_code", 200) >= 400:
+            DB_ERRORS.inc(*labels)
+    elif "telegram.method" in attributes:
+        method = attributes["telegram.method"]
+        TELEGRAM_REQUEST_DURATION.observe(seconds, method)
+        if attributes.get("http.status_code") == 429:
+            TELEGRAM_RATE_LIMITED.inc(method)
+
+
+def enable_metrics(application=None) -> None:
+    """Start collecting metrics from spans, and the update queue and scheduler state of an application."""
+    add_span_listener(observe_span)
+    if application is not None:
+        UPDATE_QUEUE_SIZE.function = lambda: {(): application.update_queue.qsize()}
+        processor = application.update_processor
+        if isinstance(processor, PriorityUpdateProcessor):
+            UPDATES_WAITING.function = lambda: {(name,): size for name, size in processor.waiting_by_priority().items()}
+            UPDATES_SHED.function = lambda: dict(processor.shed_counts)
+
+
+def render_metrics() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two stack samples of a profiled update
+SAMPLE_INTERVAL = 0.005
+
+# Deepest stack kept per sample
+MAX_STACK_DEPTH = 64
+
+# Runtime profiling config, starts from the environment and can be changed
+# with the /profile admin command
+_config = {
+    "sample_rate": settings.PROFILE_SAMPLE_RATE,
+    "threshold_ms": settings.PROFILE_THRESHOLD_MS,
+    "directory": settings.PROFILE_DIR,
+}
+
+_stats = {"profiled": 0, "saved": 0}
+
+# code object -> "module:function" label
+_labels = {}
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a background thread.
+
+    Cheap for the profiled code: nothing is hooked into it, the sampler only
+    reads its current frame every SAMPLE_INTERVAL seconds. On the event loop
+    thread, time spent awaiting shows up as the loop's select() call.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # stack (outermost first) -> samples
+        self._stop = threading.Event()
+        self._on_done = None
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self, on_done=None) -> None:
+        """Stop sampling. on_done(sampler) is then called from the sampler thread."""
+        self._on_done = on_done
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_stack_of(frame)] += 1
+        if self._on_done:
+            try:
+                self._on_done(self)
+            except Exception:
+                logger.exception("Saving a profile failed")
+
+    def folded(self) -> list:
+        """Samples in the folded stack format ("a;b;c 12") of flamegraph tools and speedscope."""
+        return [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+
+
+def _stack_of(frame) -> tuple:
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        label = _labels.get(code)
+        if label is None:
+            module = frame.f_globals.get("__name__", "?")
+            label = _labels[code] = f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        stack.append(label)
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+@contextmanager
+def profile_update(update_type: str, route: str, update_id: int) -> Iterator[None]:
+    """Profile a sampled fraction of updates, saving those slower than the threshold."""
+    sample_rate = _config["sample_rate"]
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        yield
+        return
+
+    _stats["profiled"] += 1
+    sampler = StackSampler(threading.get_ident()).start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= _config["threshold_ms"]:
+            details = {
+                "update_id": update_id,
+                "update_type": update_type,
+                "route": route,
+                "duration_ms": round(elapsed_ms, 1),
+                "time": time.time(),
+            }
+            # The sampler thread writes the files, the update doesn't wait on disk
+            sampler.stop(lambda done: _save_profile(done, details, _config["directory"]))
+        else:
+            sampler.stop()
+
+
+def _save_profile(sampler: StackSampler, details: dict, directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}_{details['update_id']}_{details['update_type']}_{details['route']}_{details['duration_ms']:.0f}ms"
+    with open(os.path.join(directory, name + ".folded"), "w", encoding="utf-8") as file:
+        file.write("\n".join(sampler.folded()) + "\n")
+
+    details = {**details, "file": name + ".folded", "samples": sum(sampler.stacks.values()), "interval_ms": sampler.interval * 1000}
+    with open(os.path.join(directory, "index.jsonl"), "a", encoding="utf-8") as file:
+        file.write(json.dumps(details) + "\n")
+
+    _stats["saved"] += 1
+    logger.warning("Saved profile of slow update %s %s (%.0f ms) to %s", details["update_type"], details["route"], details["duration_ms"], name)
+
+
+def configure_profiling(sample_rate: Optional[float] = None, threshold_ms: Optional[int] = None) -> dict:
+    """Change the profiling config at runtime. Returns the new config."""
+    if sample_rate is not None:
+        _config["sample_rate"] = max(0.0, min(1.0, sample_rate))
+    if threshold_ms is not None:
+        _config["threshold_ms"] = max(0, threshold_ms)
+    return get_profiling_status()
+
+
+def get_profiling_status() -> dict:
+    """Get the profiling config plus how many updates were profiled and saved."""
+    return {**_config, **_stats}
@@ -0,0 +1,66 @@
+import time
+from typing import Optional
+
+from bot.utils.cache import TTLCache, register_cache
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at", "notified_at")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+        self.notified_at = None
+
+
+class RateLimiter:
+    """
+    Token bucket per user: burst updates at once, then rate per second.
+
+    An update over the limit may reserve a token up to max_delay seconds
+    ahead and wait for it. Buckets live in a bounded cache and expire once
+    they would have refilled anyway, so idle users cost nothing.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_delay: float = 0, max_users: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_delay = max_delay
+        # Longest a bucket takes to refill from the deepest reservation
+        self._buckets = TTLCache(maxsize=max_users, ttl=burst / rate + max_delay)
+        register_cache(f"rate_limit_{name}", self._buckets)
+
+    def reserve(self, user_id: int) -> Optional[float]:
+        """
+        Take a token for an update.
+
+        Returns:
+            float: Seconds to wait before handling the update (0 = now),
+                None if it is over the limit and should be turned away
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = _Bucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            bucket.updated_at = now
+
+        delay = max(0.0, (1 - bucket.tokens) / self.rate)
+        if delay > self.max_delay:
+            self._buckets.set(user_id, bucket)
+            return None
+        bucket.tokens -= 1
+        self._buckets.set(user_id, bucket)
+        return delay
+
+    def should_notify(self, user_id: int, interval: float) -> bool:
+        """Whether to tell the user they are over the limit, at most once per interval seconds."""
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            return True
+        now = time.monotonic()
+        if bucket.notified_at is not None and now - bucket.notified_at < interval:
+            return False
+        bucket.notified_at = now
+        return True
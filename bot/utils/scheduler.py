@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Optional
+
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import BaseUpdateProcessor
+
+from bot.db.retries import deadline
+from bot.utils.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first: someone is watching a button spinner, then new messages, then the rest
+PRIORITY_CALLBACK = 0
+PRIORITY_MESSAGE = 1
+PRIORITY_OTHER = 2
+
+PRIORITY_NAMES = ("callback_query", "message", "other")
+
+NOTICE_BUSY = "⏳ Busy right now, please try again in a moment."
+NOTICE_BUSY_MESSAGE = "⏳ Busy right now, this message wasn't saved. Please send it again in a minute."
+NOTICE_BUSY_EDIT = "⏳ Busy right now, this edit wasn't saved. Please edit it again in a minute."
+NOTICE_SLOW_DOWN = "🐢 Slow down a little, please try again in a moment."
+NOTICE_SLOW_DOWN_MESSAGE = "🐢 You're sending messages faster than I can save them, some weren't saved. Please send those again in a minute."
+
+# Seconds between over-the-limit replies to the same user
+RATE_LIMIT_NOTICE_SECONDS = 60
+
+
+def update_priority(update: object) -> int:
+    """Scheduling priority of an update."""
+    if not isinstance(update, Update):
+        return PRIORITY_OTHER
+    if update.callback_query:
+        return PRIORITY_CALLBACK
+    if update.message:
+        return PRIORITY_MESSAGE
+    return PRIORITY_OTHER
+
+
+def _user_id(update: object) -> Optional[int]:
+    return update.effective_user.id if isinstance(update, Update) and update.effective_user else None
+
+
+class PriorityUpdateProcessor(BaseUpdateProcessor):
+    """
+    Runs updates on a fixed number of workers, callback taps first.
+
+    Workers are slots on the event loop, not threads: they overlap because
+    handlers run their (blocking) database calls in worker threads, see
+    bot.utils.background.create_executor.
+
+    A user's updates run one at a time, so a brain dump is captured in order.
+    Waiting updates are capped at max_queued: past that a tap is answered with
+    a busy toast and a message with a busy reply, and a tap still waiting
+    after callback_timeout seconds gets the toast right then instead of a late
+    answer.
+
+    Optional per-user rate limits apply before an update takes a slot, so one
+    flooding user can't fill the queue: message_limit for messages and edits,
+    callback_limit for taps. A tap over its limit gets a toast, a message
+    waits for its token up to the limiter's max_delay and is dropped past
+    that, with a reply at most once every RATE_LIMIT_NOTICE_SECONDS. At most
+    max_queued updates wait for a token at once, past that they are turned
+    away like on a full queue.
+
+    Once running, an update's database calls share update_deadline seconds
+    (None for no limit), see bot.db.retries.deadline.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queued: int,
+        callback_timeout: float,
+        message_limit: Optional[RateLimiter] = None,
+        callback_limit: Optional[RateLimiter] = None,
+        update_deadline: Optional[float] = None,
+    ):
+        # The base class semaphore only bounds the number of tasks, with room
+        # for a full queue plus as many updates being turned away
+        super().__init__(workers + 2 * max_queued)
+        self.workers = workers
+        self.max_queued = max_queued
+        self.callback_timeout = callback_timeout
+        self.message_limit = message_limit
+        self.callback_limit = callback_limit
+        self.update_deadline = update_deadline
+        # Per priority: (user ID, future resolved when it may run)
+        self._waiting = [deque() for _ in PRIORITY_NAMES]
+        self._busy_users = set()
+        self._running = 0
+        # Updates sleeping until their rate limit token is due
+        self.deferred = 0
+        # Updates turned away, by (priority name, reason)
+        self.shed_counts = {}
+
+    @property
+    def waiting(self) -> int:
+        """Number of updates waiting for a worker."""
+        return sum(len(waiting) for waiting in self._waiting)
+
+    def waiting_by_priority(self) -> dict:
+        return {name: len(waiting) for name, waiting in zip(PRIORITY_NAMES, self._waiting)}
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        # Rate limits apply before the base class semaphore, so an update
+        # waiting for its token doesn't hold a slot while it sleeps
+        priority = update_priority(update)
+        user_id = _user_id(update)
+        limiter = self.callback_limit if priority == PRIORITY_CALLBACK else self.message_limit
+        if limiter is not None and user_id is not None:
+            delay = limiter.reserve(user_id)
+            if delay is None:
+                coroutine.close()
+                notify = priority == PRIORITY_CALLBACK or limiter.should_notify(user_id, RATE_LIMIT_NOTICE_SECONDS)
+                await self._shed(update, priority, "rate_limited", notify)
+                return
+            if delay:
+                if self.deferred >= self.max_queued:
+                    coroutine.close()
+                    await self._shed(update, priority, "queue_full")
+                    return
+                # Within the budget a little later: wait for the token outside the queue
+                self.deferred += 1
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    coroutine.close()
+                    raise
+                finally:
+                    self.deferred -= 1
+
+        await super().process_update(update, coroutine)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        priority = update_priority(update)
+        user_id = _user_id(update)
+
+        if self.waiting >= self.max_queued:
+            coroutine.close()
+            await self._shed(update, priority, "queue_full")
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (user_id, future)
+        self._waiting[priority].append(entry)
+        self._dispatch()
+        # A tap's spinner gives up after a while, so stop waiting for a worker by then
+        timeout = self.callback_timeout if priority == PRIORITY_CALLBACK else None
+        try:
+            await asyncio.wait((future,), timeout=timeout)
+        except asyncio.CancelledError:
+            if future.done():
+                # A worker was handed over just before the cancel, pass it on
+                self._finish(user_id)
+            elif entry in self._waiting[priority]:
+                self._waiting[priority].remove(entry)
+            coroutine.close()
+            raise
+
+        if not future.done():
+            self._waiting[priority].remove(entry)
+            coroutine.close()
+            await self._shed(update, priority, "timeout")
+            return
+
+        try:
+            with deadline(self.update_deadline):
+                await coroutine
+        finally:
+            self._finish(user_id)
+
+    def _start(self, user_id: Optional[int]) -> None:
+        self._running += 1
+        if user_id is not None:
+            self._busy_users.add(user_id)
+
+    def _finish(self, user_id: Optional[int]) -> None:
+        self._running -= 1
+        self._busy_users.discard(user_id)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free workers to the first waiting updates whose user isn't busy, callbacks first."""
+        for waiting in self._waiting:
+            index = 0
+            while index < len(waiting) and self._running < self.workers:
+                user_id, future = waiting[index]
+                if user_id is not None and user_id in self._busy_users:
+                    index += 1
+                    continue
+                del waiting[index]
+                self._start(user_id)
+                future.set_result(None)
+
+    async def _shed(self, update: object, priority: int, reason: str, notify: bool = True) -> None:
+        """Turn an update away with a cheap answer (if notify) instead of handling it."""
+        key = (PRIORITY_NAMES[priority], reason)
+        self.shed_counts[key] = self.shed_counts.get(key, 0) + 1
+        logger.warning("Shedding %s update (%s, %d waiting)", key[0], reason, self.waiting)
+        if not notify or not isinstance(update, Update):
+            return
+        rate_limited = reason == "rate_limited"
+        try:
+            if update.callback_query:
+                await update.callback_query.answer(NOTICE_SLOW_DOWN if rate_limited else NOTICE_BUSY)
+            elif rate_limited:
+                await update.effective_message.reply_text(NOTICE_SLOW_DOWN_MESSAGE)
+            elif update.message:
+                await update.message.reply_text(NOTICE_BUSY_MESSAGE)
+            elif update.edited_message:
+                await update.edited_message.reply_text(NOTICE_BUSY_EDIT)
+        except TelegramError as error:
+            logger.info("Couldn't send the busy notice: %s", error)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
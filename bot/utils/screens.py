@@ -0,0 +1,114 @@
+from typing import Optional
+
+from telegram import InlineKeyboardMarkup
+
+from bot.utils.cache import TTLCache, register_cache
+from bot.utils.formatters import (
+    THEME_CLASSIC,
+    THEME_NAMES,
+    format_settings,
+    format_settings_now_limit,
+    format_settings_theme,
+    format_settings_show_completed,
+)
+from bot.utils.keyboards import (
+    get_settings_keyboard,
+    get_settings_now_limit_keyboard,
+    get_settings_theme_keyboard,
+    get_settings_show_completed_keyboard,
+)
+
+# Settings screens only depend on (view, theme, current value), so every
+# combination is rendered once and shared. Keyboards are immutable, sharing
+# them between users is safe.
+_screens = {}  # (view, theme, value) -> (text, parse_mode, keyboard)
+register_cache("settings_screens", _screens)
+
+NOW_LIMIT_OPTIONS = (1, 2, 3, 4, 5)
+
+# Rendered task list pages, keyed by the data version they were read at.
+# A write bumps the user's version, which is all the invalidation needed.
+_rendered_views = TTLCache(maxsize=2000, ttl=600)  # (user_id, version, view, page, theme) -> view
+register_cache("rendered_views", _rendered_views)
+
+
+def _build_settings(theme: str, value) -> tuple:
+    message, parse_mode = format_settings({}, theme=theme)
+    return message, parse_mode, get_settings_keyboard()
+
+
+def _build_now_limit(theme: str, value: int) -> tuple:
+    message, parse_mode = format_settings_now_limit({"settings": {"now_display_limit": value}}, theme=theme)
+    return message, parse_mode, get_settings_now_limit_keyboard(value)
+
+
+def _build_theme(theme: str, value: str) -> tuple:
+    message, parse_mode = format_settings_theme(value, theme=theme)
+    return message, parse_mode, get_settings_theme_keyboard(value)
+
+
+def _build_show_completed(theme: str, value: bool) -> tuple:
+    message, parse_mode = format_settings_show_completed(value, theme=theme)
+    return message, parse_mode, get_settings_show_completed_keyboard(value)
+
+
+# View name -> (builder, possible values)
+SETTINGS_SCREENS = {
+    "settings": (_build_settings, (None,)),
+    "now_limit": (_build_now_limit, NOW_LIMIT_OPTIONS),
+    "theme": (_build_theme, tuple(THEME_NAMES)),
+    "show_completed": (_build_show_completed, (True, False)),
+}
+
+
+def normalize_theme(theme: Optional[str]) -> str:
+    """Map unknown themes onto classic, the same fallback the formatters use."""
+    return theme if theme in THEME_NAMES else THEME_CLASSIC
+
+
+def get_settings_screen(view: str, theme: str, value=None) -> tuple[str, Optional[str], InlineKeyboardMarkup]:
+    """
+    Get a settings screen, rendering it on first use.
+
+    Args:
+        view: One of SETTINGS_SCREENS
+        theme: Visual theme of the user
+        value: Current value of the setting (validated), None for the main menu
+
+    Returns:
+        tuple: (message_text, parse_mode, keyboard)
+    """
+    theme = normalize_theme(theme)
+    key = (view, theme, value)
+    screen = _screens.get(key)
+    if screen is None:
+        builder, _ = SETTINGS_SCREENS[view]
+        screen = builder(theme, value)
+        _screens[key] = screen
+    return screen
+
+
+def warm_settings_screens() -> int:
+    """Render every settings screen up front. Returns the number of screens."""
+    for view, (_, values) in SETTINGS_SCREENS.items():
+        for theme in THEME_NAMES:
+            for value in values:
+                get_settings_screen(view, theme, value)
+    return len(_screens)
+
+
+def get_rendered_view(user_id: str, version: int, view: str, page: int, theme: str) -> Optional[dict]:
+    """Get a rendered list page cached at the given data version, or None."""
+    return _rendered_views.get((user_id, version, view, page, theme))
+
+
+def set_rendered_view(user_id: str, version: int, view: str, page: int, theme: str, rendered: dict) -> None:
+    """
+    Cache a rendered list page.
+
+    Args:
+        version: Data version read BEFORE fetching the data that was rendered
+        rendered: Dict with message, parse_mode and keyboard, plus whatever the
+            caller needs to restore its own state on a hit
+    """
+    _rendered_views.set((user_id, version, view, page, theme), rendered)
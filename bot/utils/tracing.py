@@ -0,0 +1,343 @@
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+import httpx
+from telegram import Update
+from telegram.ext import Application, CommandHandler
+from telegram.request import HTTPXRequest
+
+from bot.utils.profiling import profile_update
+
+logger = logging.getLogger(__name__)
+
+# Span kinds, numbered like OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+SERVICE_NAME = "someday-bot"
+
+# Callback data parts that identify a record rather than a route
+_ID_PART = re.compile(r"^(\d+|[0-9a-f]{8}-[0-9a-f-]{27})$")
+
+# Commands registered with TracedApplication, the only command routes
+_commands = set()
+
+# HTTP method -> PostgREST operation
+_DB_OPERATIONS = {"GET": "select", "HEAD": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# Called with every finished span (exporters, metrics)
+_listeners = []
+
+# Root spans currently open, i.e. updates being handled
+_in_flight = 0
+
+
+class Span:
+    """One timed operation. Spans of one update share the root's trace_id."""
+
+    __slots__ = ("name", "kind", "attributes", "trace_id", "span_id", "parent", "root",
+                 "start_time_ns", "_start", "duration_ns", "error", "counts")
+
+    def __init__(self, name: str, kind: int, attributes: dict, parent: Optional["Span"]):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.parent = parent
+        self.root = parent.root if parent else self
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.start_time_ns = time.time_ns()
+        self._start = time.perf_counter_ns()
+        self.duration_ns = 0
+        self.error = None
+        # Root only: kind of child span ("db", "telegram") -> [count, total ns]
+        self.counts = {}
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_ns / 1_000_000
+
+    def to_dict(self) -> dict:
+        """Flat JSON-friendly form, one line of the trace file."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start": self.start_time_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, category: Optional[str] = None, **attributes) -> Iterator[Span]:
+    """
+    Time a block as a child of the current span (or a new trace if there is none).
+
+    Args:
+        name: Span name, e.g. "db select tasks"
+        kind: KIND_INTERNAL, KIND_SERVER or KIND_CLIENT
+        category: Round trip category counted on the root span ("db", "telegram")
+        **attributes: Span attributes, more can be set on the yielded span
+    """
+    current = Span(name, kind, attributes, _current_span.get())
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as error:
+        current.error = f"{type(error).__name__}: {error}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.duration_ns = time.perf_counter_ns() - current._start
+        if category and current.parent:
+            count = current.root.counts.setdefault(category, [0, 0])
+            count[0] += 1
+            count[1] += current.duration_ns
+        _finish(current)
+
+
+def current_span() -> Optional[Span]:
+    """Get the span the caller runs in, if any."""
+    return _current_span.get()
+
+
+def add_span_listener(listener: Callable[[Span], None]) -> None:
+    """Call listener with every finished span. Listeners must be quick and never raise."""
+    _listeners.append(listener)
+
+
+def _finish(finished: Span) -> None:
+    for listener in _listeners:
+        try:
+            listener(finished)
+        except Exception:
+            logger.exception("Span listener failed")
+
+
+def describe_update(update: Update) -> tuple[str, str]:
+    """
+    Classify an update for traces and metrics.
+
+    Returns:
+        tuple: (update type, route) - the route is a registered command
+        ("unknown" for anything else), or the callback data without record IDs
+        ("complete", "page_someday", "move_now"), so it has a small, fixed set
+        of values
+    """
+    if update.callback_query:
+        parts = (update.callback_query.data or "").split("_")
+        return "callback", "_".join(part for part in parts if not _ID_PART.match(part)) or "unknown"
+    if update.edited_message:
+        return "edited_message", "edit"
+    message = update.message
+    if message:
+        if message.document:
+            return "message", "document"
+        text = message.text or ""
+        if text.startswith("/"):
+            command = text.split()[0][1:].split("@")[0].lower()
+            return "command", command if command in _commands else "unknown"
+        return "message", "text"
+    return "other", "other"
+
+
+@contextmanager
+def update_span(update: Update) -> Iterator[Span]:
+    """Root span for handling one update, logs a breakdown when it is slow."""
+    from config.settings import settings
+
+    update_type, route = describe_update(update)
+    attributes = {"update.id": update.update_id, "update.type": update_type, "update.route": route}
+    if update.effective_user:
+        attributes["telegram.user_id"] = update.effective_user.id
+
+    global _in_flight
+    with span(f"update {update_type} {route}", KIND_SERVER, **attributes) as root:
+        _in_flight += 1
+        try:
+            yield root
+        finally:
+            _in_flight -= 1
+            # Duration is only final once the block is closed, approximate it here
+            elapsed_ms = (time.perf_counter_ns() - root._start) / 1_000_000
+            if elapsed_ms >= settings.SLOW_UPDATE_MS:
+                logger.warning("Slow update %s: %s", root.name, summarize(root, elapsed_ms))
+
+
+def updates_in_flight() -> int:
+    """Get the number of updates being handled right now."""
+    return _in_flight
+
+
+def summarize(root: Span, elapsed_ms: Optional[float] = None) -> str:
+    """One line breakdown of an update: total time and round trips by category."""
+    elapsed_ms = root.duration_ms if elapsed_ms is None else elapsed_ms
+    parts = [f"{elapsed_ms:.0f} ms"]
+    for category, (count, total_ns) in sorted(root.counts.items()):
+        parts.append(f"{count} {category} round trips ({total_ns / 1_000_000:.0f} ms)")
+    return ", ".join(parts)
+
+
+class TracedApplication(Application):
+    """Application that runs every update inside a root span, and profiles a sample of them."""
+
+    def add_handler(self, handler, group: int = 0) -> None:
+        # Commands become routes, anything else typed after a slash doesn't
+        if isinstance(handler, CommandHandler):
+            _commands.update(handler.commands)
+        super().add_handler(handler, group)
+
+    async def process_update(self, update: object) -> None:
+        if not isinstance(update, Update):
+            return await super().process_update(update)
+        with update_span(update) as root:
+            with profile_update(root.attributes["update.type"], root.attributes["update.route"], update.update_id):
+                await super().process_update(update)
+
+
+class TracingRequest(HTTPXRequest):
+    """Bot API request that records a span per call."""
+
+    async def do_request(self, url: str, method: str, request_data=None, **kwargs) -> tuple[int, bytes]:
+        endpoint = url.rsplit("/", 1)[-1]
+        with span(f"telegram {endpoint}", KIND_CLIENT, category="telegram", **{"telegram.method": endpoint}) as current:
+            status, payload = await super().do_request(url, method, request_data, **kwargs)
+            current.attributes["http.status_code"] = status
+            return status, payload
+
+
+class TracingTransport(httpx.BaseTransport):
+    """httpx transport wrapper that records a span per database round trip."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        table = path.rsplit("/", 1)[-1]
+        if "/rpc/" in path:
+            operation = "rpc"
+        elif "resolution=" in request.headers.get("prefer", ""):
+            operation = "upsert"
+        else:
+            operation = _DB_OPERATIONS.get(request.method, request.method.lower())
+
+        attributes = {"db.table": table, "db.operation": operation}
+        with span(f"db {operation} {table}", KIND_CLIENT, category="db", **attributes) as current:
+            response = self._transport.handle_request(request)
+            # Read the body here so the span covers the whole round trip
+            response.read()
+            current.attributes["http.status_code"] = response.status_code
+            return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class SpanExporter:
+    """Ships finished spans from a worker thread, so exporting never blocks updates."""
+
+    def __init__(self, file_path: str = "", otlp_endpoint: str = "", batch_size: int = 256, interval: float = 2.0):
+        self.file_path = file_path
+        self.otlp_endpoint = otlp_endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def __call__(self, finished: Span) -> None:
+        self._queue.put(finished)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self.export(batch)
+
+    def export(self, batch: list) -> None:
+        if self.file_path:
+            try:
+                with open(self.file_path, "a", encoding="utf-8") as file:
+                    file.writelines(json.dumps(item.to_dict(), default=str) + "\n" for item in batch)
+            except OSError:
+                logger.exception("Writing %d spans to %s failed", len(batch), self.file_path)
+        if self.otlp_endpoint:
+            try:
+                httpx.post(self.otlp_endpoint, json=to_otlp(batch), timeout=5).raise_for_status()
+            except httpx.HTTPError:
+                logger.exception("Exporting %d spans to %s failed", len(batch), self.otlp_endpoint)
+
+
+def to_otlp(batch: list) -> dict:
+    """Encode spans as an OTLP/HTTP JSON export request."""
+    spans = []
+    for item in batch:
+        encoded = {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": item.kind,
+            "startTimeUnixNano": str(item.start_time_ns),
+            "endTimeUnixNano": str(item.start_time_ns + item.duration_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in item.attributes.items()],
+        }
+        if item.parent:
+            encoded["parentSpanId"] = item.parent.span_id
+        if item.error:
+            encoded["status"] = {"code": 2, "message": item.error}
+        spans.append(encoded)
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+    }]}
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def configure_tracing(file_path: str = "", otlp_endpoint: str = "") -> Optional[SpanExporter]:
+    """
+    Start exporting spans to a JSONL file and/or an OTLP/HTTP collector.
+
+    Spans are recorded either way (slow update logs and metrics use them),
+    without a destination nothing is exported.
+    """
+    if not file_path and not otlp_endpoint:
+        return None
+    if file_path:
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    exporter = SpanExporter(file_path, otlp_endpoint)
+    add_span_listener(exporter)
+    return exporter
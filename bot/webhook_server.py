@@ -0,0 +1,116 @@
+import json
+import logging
+from urllib.parse import urlparse
+
+from telegram import Update
+from telegram.ext import Application
+
+from bot.utils.metrics import render_metrics
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Telegram updates are small, anything bigger is not from Telegram
+MAX_BODY_SIZE = 1024 * 1024
+
+ALLOWED_UPDATES = ["message", "edited_message", "callback_query"]
+
+SECRET_HEADER = b"x-telegram-bot-api-secret-token"
+
+
+def create_webhook_app(application: Application):
+    """
+    Create the ASGI app served by uvicorn in production.
+
+    Routes:
+        POST <webhook path>: Telegram updates, queued for the application
+        GET /health: Liveness check
+        GET /metrics: Prometheus metrics
+
+    The lifespan starts the application and registers the webhook.
+    """
+    webhook_path = urlparse(settings.WEBHOOK_URL).path or "/webhook"
+    secret = settings.WEBHOOK_SECRET.encode()
+
+    async def app(scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await _lifespan(application, receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path, method = scope["path"], scope["method"]
+        if path == webhook_path and method == "POST":
+            if secret and dict(scope["headers"]).get(SECRET_HEADER) != secret:
+                await _respond(send, 403, b"forbidden")
+                return
+            body = await _read_body(receive)
+            if body is None:
+                await _respond(send, 413, b"too large")
+                return
+            try:
+                update = Update.de_json(json.loads(body), application.bot)
+            except (ValueError, TypeError, KeyError):
+                logger.warning("Ignoring malformed webhook payload")
+                await _respond(send, 400, b"bad request")
+                return
+            # Answer Telegram right away, the update is handled from the queue
+            await application.update_queue.put(update)
+            await _respond(send, 200, b"ok")
+        elif path == "/health" and method == "GET":
+            await _respond(send, 200, b"ok")
+        elif path == "/metrics" and method == "GET":
+            await _respond(send, 200, render_metrics().encode(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            await _respond(send, 404, b"not found")
+
+    return app
+
+
+async def _lifespan(application: Application, receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await application.initialize()
+                # run_polling/run_webhook would call it, this server replaces them
+                if application.post_init:
+                    await application.post_init(application)
+                await application.start()
+                await application.bot.set_webhook(
+                    url=settings.WEBHOOK_URL,
+                    allowed_updates=ALLOWED_UPDATES,
+                    secret_token=settings.WEBHOOK_SECRET or None,
+                )
+            except Exception as error:
+                logger.exception("Starting the bot failed")
+                await send({"type": "lifespan.startup.failed", "message": str(error)})
+                return
+            logger.info("Webhook set to %s", settings.WEBHOOK_URL)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await application.stop()
+            await application.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def _read_body(receive):
+    """Read the request body, None if it is larger than MAX_BODY_SIZE."""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_SIZE:
+            return None
+        if not message.get("more_body"):
+            return body
+
+
+async def _respond(send, status: int, body: bytes, content_type: str = "text/plain; charset=utf-8") -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
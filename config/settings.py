@@ -16,6 +16,10 @@ class Settings:
     
     # Webhook (production)
     WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+    # Telegram sends this in a header with every update, requests without it are rejected
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    # Port of the webhook server, which also serves /health and /metrics
+    PORT: int = int(os.getenv("PORT", "8080"))
     
     # Environment
     ENV: str = os.getenv("ENV", "development")
@@ -24,6 +28,94 @@ class Settings:
     DEFAULT_NOW_LIMIT: int = 3
     DEFAULT_PAGE_SIZE: int = 10
     
+    # Updates handled at once (one per user, callback taps first, their
+    # database calls run in worker threads), updates allowed to wait beyond
+    # that, and how long a tap may wait (milliseconds) before it is answered
+    # with a busy toast instead
+    UPDATE_WORKERS: int = int(os.getenv("UPDATE_WORKERS", "8"))
+    UPDATE_QUEUE_LIMIT: int = int(os.getenv("UPDATE_QUEUE_LIMIT", "500"))
+    CALLBACK_QUEUE_TIMEOUT_MS: int = int(os.getenv("CALLBACK_QUEUE_TIMEOUT_MS", "5000"))
+    
+    # Per-user token buckets, per minute with a burst allowance: messages and
+    # edits (delayed up to RATE_MESSAGES_MAX_DELAY_SECONDS before being
+    # dropped), and button taps. State is kept for at most RATE_LIMIT_USERS users
+    RATE_MESSAGES_PER_MINUTE: float = float(os.getenv("RATE_MESSAGES_PER_MINUTE", "30"))
+    RATE_MESSAGES_BURST: int = int(os.getenv("RATE_MESSAGES_BURST", "50"))
+    RATE_MESSAGES_MAX_DELAY_SECONDS: float = float(os.getenv("RATE_MESSAGES_MAX_DELAY_SECONDS", "60"))
+    RATE_CALLBACKS_PER_MINUTE: float = float(os.getenv("RATE_CALLBACKS_PER_MINUTE", "120"))
+    RATE_CALLBACKS_BURST: int = int(os.getenv("RATE_CALLBACKS_BURST", "20"))
+    RATE_LIMIT_USERS: int = int(os.getenv("RATE_LIMIT_USERS", "10000"))
+    
+    # Number of recent update_ids remembered to drop webhook redeliveries
+    UPDATE_DEDUP_WINDOW: int = int(os.getenv("UPDATE_DEDUP_WINDOW", "10000"))
+    
+    # Update the screen before task writes finish (reconciled if a write fails)
+    OPTIMISTIC_UI: bool = os.getenv("OPTIMISTIC_UI", "true").lower() == "true"
+    
+    # Fetch the next page of a list while the current one is sent
+    PREFETCH_NEXT_PAGE: bool = os.getenv("PREFETCH_NEXT_PAGE", "true").lower() == "true"
+    
+    # Pick NOW tasks with the shuffle_now_tasks database function (see docs/IMPLEMENTATION.md)
+    SERVER_SIDE_SHUFFLE: bool = os.getenv("SERVER_SIDE_SHUFFLE", "false").lower() == "true"
+    
+    # File import
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "100"))
+    IMPORT_MAX_FILE_SIZE: int = 20 * 1024 * 1024  # Bot API download limit
+    
+    # Export
+    EXPORT_PAGE_SIZE: int = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+    # Time budget (milliseconds) for all the pages of one export, replaces the per-update budget
+    EXPORT_DEADLINE_MS: int = int(os.getenv("EXPORT_DEADLINE_MS", "120000"))
+    
+    # Tracing: spans go to a JSONL file and/or an OTLP/HTTP collector (empty = off)
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "")
+    TRACE_OTLP_ENDPOINT: str = os.getenv("TRACE_OTLP_ENDPOINT", "")
+    
+    # Append every incoming update, anonymized, to this JSONL file (for load replays, empty = off)
+    UPDATE_LOG: str = os.getenv("UPDATE_LOG", "")
+    
+    # Updates slower than this (milliseconds) are logged with a round trip breakdown
+    SLOW_UPDATE_MS: int = int(os.getenv("SLOW_UPDATE_MS", "1000"))
+    
+    # Telegram user IDs allowed to use admin commands (comma-separated)
+    ADMIN_TELEGRAM_IDS: set = {int(value) for value in os.getenv("ADMIN_TELEGRAM_IDS", "").split(",") if value.strip()}
+    
+    # Profiling: fraction of updates sampled, and those slower than the
+    # threshold (milliseconds) are saved to PROFILE_DIR. Adjustable with /profile
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_THRESHOLD_MS: int = int(os.getenv("PROFILE_THRESHOLD_MS", "1000"))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    
+    # Circuit breaker around Supabase: opens after this many failed (or slower
+    # than CIRCUIT_SLOW_MS) round trips in a row, probes again after CIRCUIT_RESET_SECONDS
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    CIRCUIT_SLOW_MS: int = int(os.getenv("CIRCUIT_SLOW_MS", "5000"))
+    
+    # Time budgets (milliseconds): all database calls of one update, one call
+    # with its retries, and each attempt. Failed safe-to-repeat calls are
+    # retried with jittered backoff.
+    UPDATE_DEADLINE_MS: int = int(os.getenv("UPDATE_DEADLINE_MS", "15000"))
+    DB_CALL_DEADLINE_MS: int = int(os.getenv("DB_CALL_DEADLINE_MS", "10000"))
+    DB_TIMEOUT_MS: int = int(os.getenv("DB_TIMEOUT_MS", "5000"))
+    DB_RETRIES: int = int(os.getenv("DB_RETRIES", "2"))
+    DB_RETRY_BACKOFF_MS: int = int(os.getenv("DB_RETRY_BACKOFF_MS", "50"))
+    DB_RETRY_MAX_BACKOFF_MS: int = int(os.getenv("DB_RETRY_MAX_BACKOFF_MS", "500"))
+    
+    # Send hot reads (counts, category lists) a second time when the first
+    # hasn't answered after this many milliseconds (0 disables)
+    HEDGE_AFTER_MS: int = int(os.getenv("HEDGE_AFTER_MS", "0"))
+    
+    # Writes the database can't take are kept in this SQLite file and replayed
+    # every JOURNAL_REPLAY_SECONDS (put it on a volume to survive redeploys)
+    JOURNAL_PATH: str = os.getenv("JOURNAL_PATH", "journal.sqlite3")
+    JOURNAL_REPLAY_SECONDS: float = float(os.getenv("JOURNAL_REPLAY_SECONDS", "5"))
+    
+    # Cache warm-up after startup: the most recently active users (0 disables),
+    # given at most this many seconds in the background
+    WARMUP_USERS: int = int(os.getenv("WARMUP_USERS", "200"))
+    WARMUP_SECONDS: float = float(os.getenv("WARMUP_SECONDS", "10"))
+    
     @property
     def is_production(self) -> bool:
         return self.ENV == "production"
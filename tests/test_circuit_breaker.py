@@ -0,0 +1,114 @@
+import httpx
+import pytest
+
+from bot.db import circuit_breaker
+from bot.db.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerTransport, CircuitOpen, DatabaseUnavailable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_opens_after_threshold_failures(clock):
+    circuit = CircuitBreaker(failure_threshold=3, reset_seconds=30, slow_seconds=5)
+    circuit.record_failure()
+    circuit.record_failure()
+    assert circuit.state == CLOSED
+    circuit.record_failure()
+    assert circuit.state == OPEN
+    assert not circuit.allow_request()
+
+
+def test_success_resets_the_failure_count(clock):
+    circuit = CircuitBreaker(failure_threshold=2, reset_seconds=30, slow_seconds=5)
+    circuit.record_failure()
+    circuit.record_success()
+    circuit.record_failure()
+    assert circuit.state == CLOSED
+
+
+def test_probes_after_reset_and_closes_on_success(clock):
+    circuit = CircuitBreaker(failure_threshold=1, reset_seconds=30, slow_seconds=5)
+    circuit.record_failure()
+    clock.now += 29
+    assert not circuit.allow_request()
+    clock.now += 1
+    assert circuit.allow_request()
+    assert circuit.state == HALF_OPEN
+    # Only one probe at a time
+    assert not circuit.allow_request()
+    circuit.record_success()
+    assert circuit.state == CLOSED
+    assert not circuit.is_open
+
+
+def test_failed_probe_reopens(clock):
+    circuit = CircuitBreaker(failure_threshold=3, reset_seconds=30, slow_seconds=5)
+    for _ in range(3):
+        circuit.record_failure()
+    clock.now += 30
+    assert circuit.allow_request()
+    circuit.record_failure()
+    assert circuit.state == OPEN
+    assert circuit.opened_at == clock.now
+
+
+def _client(circuit, handler) -> httpx.Client:
+    return httpx.Client(transport=CircuitBreakerTransport(httpx.MockTransport(handler), circuit))
+
+
+def test_transport_raises_database_unavailable_and_fails_fast(clock):
+    circuit = CircuitBreaker(failure_threshold=2, reset_seconds=30, slow_seconds=5)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    client = _client(circuit, handler)
+    for _ in range(2):
+        with pytest.raises(DatabaseUnavailable):
+            client.get("http://db/rest/v1/tasks")
+    with pytest.raises(CircuitOpen):
+        client.get("http://db/rest/v1/tasks")
+    assert len(calls) == 2
+
+
+def test_transport_wraps_connection_errors(clock):
+    circuit = CircuitBreaker(failure_threshold=5, reset_seconds=30, slow_seconds=5)
+
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    with pytest.raises(DatabaseUnavailable):
+        _client(circuit, handler).get("http://db/rest/v1/tasks")
+    assert circuit.failures == 1
+
+
+def test_transport_counts_slow_answers_but_returns_them(clock):
+    circuit = CircuitBreaker(failure_threshold=5, reset_seconds=30, slow_seconds=5)
+
+    def handler(request):
+        clock.now += 6
+        return httpx.Response(200, json=[])
+
+    assert _client(circuit, handler).get("http://db/rest/v1/tasks").status_code == 200
+    assert circuit.failures == 1
+
+
+def test_transport_passes_client_errors(clock):
+    circuit = CircuitBreaker(failure_threshold=1, reset_seconds=30, slow_seconds=5)
+    response = _client(circuit, lambda request: httpx.Response(409)).post("http://db/rest/v1/tasks")
+    assert response.status_code == 409
+    assert circuit.state == CLOSED
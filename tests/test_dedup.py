@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop
+
+from bot.handlers import dedup
+from bot.handlers.dedup import drop_duplicate_update, forget_update
+from bot.utils.cache import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def seen_updates(monkeypatch):
+    monkeypatch.setattr(dedup, "_seen_updates", TTLCache(maxsize=100, ttl=3600))
+
+
+def _update(update_id: int) -> Update:
+    return Update.de_json({"update_id": update_id}, None)
+
+
+def test_redelivery_is_dropped_while_handling_and_after():
+    asyncio.run(drop_duplicate_update(_update(1), None))
+    with pytest.raises(ApplicationHandlerStop):
+        asyncio.run(drop_duplicate_update(_update(1), None))
+    # Other updates go through
+    asyncio.run(drop_duplicate_update(_update(2), None))
+
+
+def test_redelivery_of_a_failed_update_is_handled_again():
+    asyncio.run(drop_duplicate_update(_update(1), None))
+    forget_update(_update(1))
+    asyncio.run(drop_duplicate_update(_update(1), None))
+    with pytest.raises(ApplicationHandlerStop):
+        asyncio.run(drop_duplicate_update(_update(1), None))
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+
+import pytest
+
+from benchmarks.fakes import FakeSupabase
+from bot.services import task_service
+from bot.services.export_service import export_tasks, iter_export_rows, write_export
+
+
+def _row(task_id: str, status: str = "active") -> dict:
+    return {"content": f"task {task_id}", "category": "someday", "status": status, "created_at": "2024-01-01", "completed_at": None, "id": task_id}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeSupabase()
+    monkeypatch.setattr(task_service, "get_client", lambda: db)
+    return db
+
+
+def _seed(db, task_id: str, created_at: str, completed_at=None, user_id: str = "user") -> None:
+    db.seed_row(
+        "tasks", id=task_id, user_id=user_id, content=f"task {task_id}", category="someday",
+        created_at=created_at, completed_at=completed_at,
+    )
+
+
+def test_csv_export_writes_header_and_rows():
+    f = io.StringIO()
+    count = write_export(f, iter([_row("a"), _row("b", "completed")]), "csv")
+
+    assert count == 2
+    rows = list(csv.DictReader(io.StringIO(f.getvalue())))
+    assert [(row["id"], row["status"]) for row in rows] == [("a", "active"), ("b", "completed")]
+    assert list(rows[0]) == ["content", "category", "status", "created_at", "completed_at", "id"]
+
+
+def test_json_export_is_a_valid_array():
+    f = io.StringIO()
+    count = write_export(f, iter([_row("a"), _row("b")]), "json")
+
+    assert count == 2
+    assert [row["id"] for row in json.loads(f.getvalue())] == ["a", "b"]
+
+
+@pytest.mark.parametrize("export_format, expected", [("json", []), ("csv", "content,category,status,created_at,completed_at,id\r\n")])
+def test_empty_export(export_format, expected):
+    f = io.StringIO()
+    assert write_export(f, iter([]), export_format) == 0
+    assert (json.loads(f.getvalue()) if export_format == "json" else f.getvalue()) == expected
+
+
+def test_keyset_pages_through_ties_on_created_at(db):
+    # Page boundaries fall inside runs of equal created_at; ids break the ties
+    for task_id, created_at in [("e", "2024-01-02"), ("a", "2024-01-01"), ("c", "2024-01-01"), ("b", "2024-01-01"), ("d", "2024-01-02"), ("f", "2024-01-03")]:
+        _seed(db, task_id, created_at)
+    _seed(db, "other", "2024-01-01", user_id="someone else")
+
+    tasks = list(task_service.iter_tasks_keyset("user", completed=False, page_size=2))
+
+    assert [task["id"] for task in tasks] == ["a", "b", "c", "d", "e", "f"]
+    # Four queries: three full pages and the empty one that ends the walk
+    assert db.calls[("tasks", "select")] == 4
+
+
+def test_keyset_splits_active_and_completed(db):
+    _seed(db, "a", "2024-01-01")
+    _seed(db, "b", "2024-01-02", completed_at="2024-02-01")
+    _seed(db, "c", "2024-01-03")
+
+    assert [task["id"] for task in task_service.iter_tasks_keyset("user", completed=False, page_size=10)] == ["a", "c"]
+    assert [task["id"] for task in task_service.iter_tasks_keyset("user", completed=True, page_size=10)] == ["b"]
+    assert [(row["id"], row["status"]) for row in iter_export_rows("user", page_size=1)] == [
+        ("a", "active"), ("c", "active"), ("b", "completed"),
+    ]
+
+
+def test_export_tasks_writes_file(db, tmp_path):
+    _seed(db, "a", "2024-01-01")
+    _seed(db, "b", "2024-01-02", completed_at="2024-02-01")
+    path = tmp_path / "export.json"
+
+    assert export_tasks(str(path), "user", "json", page_size=1) == 2
+    assert [row["id"] for row in json.loads(path.read_text(encoding="utf-8"))] == ["a", "b"]
@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+from bot.services import import_service
+from bot.services.import_service import detect_import_format, import_tasks, iter_import_rows
+
+
+def _rows(tmp_path, text: str, file_format: str, default_category: str = "someday") -> list:
+    path = tmp_path / f"import.{file_format}"
+    path.write_text(text, encoding="utf-8")
+    return list(iter_import_rows(str(path), file_format, default_category=default_category))
+
+
+@pytest.mark.parametrize("file_name, mime_type, expected", [
+    ("tasks.TXT", None, "txt"),
+    ("notes.md", None, "txt"),
+    ("export.ndjson", None, "jsonl"),
+    ("upload", "text/csv", "csv"),
+    ("upload", "application/json", "json"),
+    ("photo.png", "image/png", None),
+])
+def test_detect_import_format(file_name, mime_type, expected):
+    assert detect_import_format(file_name, mime_type) == expected
+
+
+def test_txt_strips_list_markers_and_tags(tmp_path):
+    rows = _rows(tmp_path, "- [ ] buy milk\n- [x] done already\n\n* call mom !now\n• !soon read\n", "txt")
+    assert rows == [
+        (1, {"content": "buy milk", "category": "someday"}, None),
+        (4, {"content": "call mom", "category": "now"}, None),
+        (5, {"content": "read", "category": "soon"}, None),
+    ]
+
+
+def test_txt_uses_default_category_for_untagged_rows(tmp_path):
+    rows = _rows(tmp_path, "plain\n!now tagged\n", "txt", default_category="soon")
+    assert [row["category"] for _, row, _ in rows] == ["soon", "now"]
+
+
+def test_csv_with_header(tmp_path):
+    text = "Title,List,completed_at\nwrite report,now,\nold thing,soon,2024-01-01\nno list,,\n"
+    rows = _rows(tmp_path, text, "csv")
+    assert rows == [
+        (2, {"content": "write report", "category": "now"}, None),
+        (4, {"content": "no list", "category": "someday"}, None),
+    ]
+
+
+def test_csv_without_header_uses_first_column(tmp_path):
+    rows = _rows(tmp_path, "first,ignored\nsecond\n", "csv")
+    assert [row["content"] for _, row, _ in rows] == ["first", "second"]
+
+
+def test_csv_reports_malformed_rows(tmp_path):
+    rows = _rows(tmp_path, 'task,category\nok,now\nbad,later\n"unterminated\n', "csv")
+    assert rows[0] == (2, {"content": "ok", "category": "now"}, None)
+    assert rows[1] == (3, None, "Unknown category 'later'")
+    assert rows[2][1] is None and rows[2][2].startswith("Malformed CSV row")
+
+
+def test_json_array_of_strings_and_objects(tmp_path):
+    items = ["one", {"Task": "two", "category": "NOW"}, {"content": "old", "completed_at": "2024-01-01"}, 3, {"note": "x"}]
+    rows = _rows(tmp_path, json.dumps(items), "json")
+    assert rows == [
+        (1, {"content": "one", "category": "someday"}, None),
+        (2, {"content": "two", "category": "now"}, None),
+        (4, None, "Unsupported item type int"),
+        (5, None, "Missing task text"),
+    ]
+
+
+def test_json_streams_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(import_service, "JSON_CHUNK_SIZE", 7)
+    items = [f"task number {i}" for i in range(50)]
+    rows = _rows(tmp_path, json.dumps(items, indent=2), "json")
+    assert [row["content"] for _, row, _ in rows] == items
+
+
+def test_json_stops_at_broken_array(tmp_path):
+    rows = _rows(tmp_path, '["one", "two" "three"]', "json")
+    assert rows[:2] == [
+        (1, {"content": "one", "category": "someday"}, None),
+        (2, {"content": "two", "category": "someday"}, None),
+    ]
+    assert rows[2][0] == 3 and rows[2][2].startswith("Invalid JSON, import stopped")
+
+
+def test_json_rejects_non_array(tmp_path):
+    rows = _rows(tmp_path, '{"content": "one"}', "json")
+    assert rows == [(1, None, "Invalid JSON, import stopped: expected a list of tasks")]
+
+
+def test_jsonl_reports_invalid_lines(tmp_path):
+    rows = _rows(tmp_path, '"one"\n{not json}\n\n{"text": "two", "list": "soon"}\n', "jsonl")
+    assert rows[0] == (1, {"content": "one", "category": "someday"}, None)
+    assert rows[1][0] == 2 and rows[1][2].startswith("Invalid JSON")
+    assert rows[2] == (4, {"content": "two", "category": "soon"}, None)
+
+
+def test_too_long_task_is_an_error(tmp_path):
+    rows = _rows(tmp_path, "x" * (import_service.MAX_CONTENT_LENGTH + 1), "txt")
+    assert rows == [(1, None, f"Task is longer than {import_service.MAX_CONTENT_LENGTH} characters")]
+
+
+def test_invalid_utf8_stops_the_import(tmp_path):
+    path = tmp_path / "import.txt"
+    path.write_bytes(b"ok\n\xff\xfe broken\n")
+    rows = list(iter_import_rows(str(path), "txt"))
+    assert rows[-1] == (0, None, "File is not valid UTF-8 text, import stopped")
+
+
+def test_import_tasks_batches_and_caps_reported_errors(monkeypatch):
+    batches = []
+    monkeypatch.setattr(import_service, "create_tasks", lambda user_id, batch: batches.append(list(batch)))
+    rows = [(n, {"content": f"task {n}", "category": "someday"}, None) for n in range(1, 6)]
+    rows += [(n, None, "bad row") for n in range(6, 6 + import_service.MAX_REPORTED_ERRORS + 5)]
+
+    progress = list(import_tasks("user", iter(rows), batch_size=2))[-1]
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert progress["imported"] == 5
+    assert progress["failed"] == import_service.MAX_REPORTED_ERRORS + 5
+    assert progress["error_count"] == import_service.MAX_REPORTED_ERRORS + 5
+    assert len(progress["errors"]) == import_service.MAX_REPORTED_ERRORS
+    assert progress["errors"][0] == (6, "bad row")
+
+
+def test_import_tasks_skips_a_failed_batch(monkeypatch):
+    def create_tasks(user_id, batch):
+        if batch[0]["content"] == "task 3":
+            raise RuntimeError("rejected")
+
+    monkeypatch.setattr(import_service, "create_tasks", create_tasks)
+    rows = [(n, {"content": f"task {n}", "category": "someday"}, None) for n in range(1, 6)]
+
+    progress = list(import_tasks("user", iter(rows), batch_size=2))[-1]
+
+    assert progress["imported"] == 3
+    assert progress["failed"] == 2
+    assert progress["errors"] == [(3, "Rows 3-4 could not be saved")]
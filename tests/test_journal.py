@@ -0,0 +1,111 @@
+import pytest
+
+from bot.db import journal
+from bot.db.circuit_breaker import DatabaseUnavailable
+from bot.db.journal import Journal, journaled, replay_journal
+
+database_down = False
+applied = []
+
+
+@journaled
+def journal_test_write(key: str, value: int = 0) -> str:
+    if database_down:
+        raise DatabaseUnavailable("down")
+    applied.append((key, value))
+    return key
+
+
+@journaled
+def journal_test_rejected_write(key: str) -> None:
+    if database_down:
+        raise DatabaseUnavailable("down")
+    raise ValueError("rejected")
+
+
+@pytest.fixture(autouse=True)
+def test_journal(tmp_path, monkeypatch):
+    global database_down
+    database_down = False
+    applied.clear()
+    monkeypatch.setattr(journal, "_journal", Journal(str(tmp_path / "journal.sqlite3")))
+    return journal._journal
+
+
+def test_write_goes_through_while_database_is_up(test_journal):
+    assert journal_test_write("a", value=1) == "a"
+    assert applied == [("a", 1)]
+    assert len(test_journal) == 0
+
+
+def test_write_is_journaled_while_database_is_down(test_journal):
+    global database_down
+    database_down = True
+    assert journal_test_write("a", value=1) is None
+    assert len(test_journal) == 1
+    assert test_journal.peek() == [(1, "journal_test_write", ["a"], {"value": 1})]
+
+
+def test_later_writes_wait_behind_journaled_ones(test_journal):
+    global database_down
+    database_down = True
+    journal_test_write("a")
+    database_down = False
+    # Earlier writes still wait, so this one must not overtake them
+    assert journal_test_write("b") is None
+    assert applied == []
+    assert len(test_journal) == 2
+
+
+def test_replay_applies_writes_in_order(test_journal):
+    global database_down
+    database_down = True
+    journal_test_write("a", value=1)
+    journal_test_write("b")
+    database_down = False
+
+    assert replay_journal() == 2
+    assert applied == [("a", 1), ("b", 0)]
+    assert len(test_journal) == 0
+
+
+def test_replay_stops_while_database_is_down(test_journal):
+    global database_down
+    database_down = True
+    journal_test_write("a")
+    assert replay_journal() is None
+    assert len(test_journal) == 1
+
+
+def test_replay_drops_rejected_writes(test_journal):
+    global database_down
+    database_down = True
+    journal_test_rejected_write("a")
+    journal_test_write("b")
+    database_down = False
+
+    assert replay_journal() == 2
+    assert applied == [("b", 0)]
+    assert len(test_journal) == 0
+
+
+def test_journal_survives_reopening(tmp_path):
+    path = str(tmp_path / "reopened.sqlite3")
+    Journal(path).append("journal_test_write", ["a"], {})
+    reopened = Journal(path)
+    assert len(reopened) == 1
+    assert reopened.peek()[0][1:] == ("journal_test_write", ["a"], {})
+
+
+def test_listeners_see_journaled_writes(monkeypatch):
+    global database_down
+    seen = []
+    monkeypatch.setattr(journal, "_listeners", [])
+    journal.add_journal_listener(lambda operation, arguments: seen.append((operation, dict(arguments))))
+    journal.add_journal_listener(lambda operation, arguments: 1 / 0)
+
+    journal_test_write("a")
+    database_down = True
+    journal_test_write("b", value=2)
+
+    assert seen == [("journal_test_write", {"key": "b", "value": 2})]
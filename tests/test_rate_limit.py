@@ -0,0 +1,76 @@
+import pytest
+
+from bot.utils import rate_limit
+from bot.utils.rate_limit import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_burst_then_turned_away(clock):
+    limiter = RateLimiter("test_burst", rate=1, burst=3)
+    assert [limiter.reserve(1) for _ in range(3)] == [0, 0, 0]
+    assert limiter.reserve(1) is None
+    # Other users have their own bucket
+    assert limiter.reserve(2) == 0
+
+
+def test_tokens_refill_at_rate_up_to_burst(clock):
+    limiter = RateLimiter("test_refill", rate=2, burst=2)
+    limiter.reserve(1)
+    limiter.reserve(1)
+    clock.now += 0.5
+    assert limiter.reserve(1) == 0
+    assert limiter.reserve(1) is None
+    clock.now += 100
+    assert [limiter.reserve(1) for _ in range(3)] == [0, 0, None]
+
+
+def test_reserves_ahead_up_to_max_delay(clock):
+    limiter = RateLimiter("test_delay", rate=1, burst=1, max_delay=2)
+    assert limiter.reserve(1) == 0
+    assert limiter.reserve(1) == pytest.approx(1)
+    assert limiter.reserve(1) == pytest.approx(2)
+    assert limiter.reserve(1) is None
+    clock.now += 1
+    assert limiter.reserve(1) == pytest.approx(2)
+
+
+def test_turned_away_updates_take_no_token(clock):
+    limiter = RateLimiter("test_no_token", rate=1, burst=1)
+    limiter.reserve(1)
+    for _ in range(5):
+        assert limiter.reserve(1) is None
+    clock.now += 1
+    assert limiter.reserve(1) == 0
+
+
+def test_notifies_at_most_once_per_interval(clock):
+    limiter = RateLimiter("test_notify", rate=1, burst=1)
+    limiter.reserve(1)
+    assert limiter.should_notify(1, 60)
+    assert not limiter.should_notify(1, 60)
+    clock.now += 60
+    assert limiter.should_notify(1, 60)
+
+
+def test_buckets_expire_once_refilled(clock):
+    limiter = RateLimiter("test_expire", rate=1, burst=2, max_delay=3)
+    limiter.reserve(1)
+    assert len(limiter._buckets) == 1
+    clock.now += 6
+    # Counted as gone before anything reads the bucket
+    assert len(limiter._buckets) == 0
+    assert limiter._buckets.get(1) is None
@@ -0,0 +1,234 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from bot.db import retries
+from bot.db.circuit_breaker import CircuitBreaker, CircuitBreakerTransport
+from bot.db.retries import DeadlineExceeded, RetryTransport, deadline, hedged, idempotent, remaining
+from config.settings import settings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retries.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(retries.time, "sleep", clock.sleep)
+    # Always the longest backoff, so the deadline math is predictable
+    monkeypatch.setattr(retries.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(settings, "DB_RETRIES", 2)
+    monkeypatch.setattr(settings, "DB_RETRY_BACKOFF_MS", 50)
+    monkeypatch.setattr(settings, "DB_RETRY_MAX_BACKOFF_MS", 500)
+    monkeypatch.setattr(settings, "DB_TIMEOUT_MS", 5000)
+    monkeypatch.setattr(settings, "DB_CALL_DEADLINE_MS", 10000)
+    monkeypatch.setattr(settings, "HEDGE_AFTER_MS", 0)
+    return clock
+
+
+def _client(answers: list, calls: list) -> httpx.Client:
+    """Client whose transport plays back answers (responses or exceptions to raise) in order."""
+
+    def handler(request):
+        calls.append(request)
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return httpx.Response(answer)
+
+    return httpx.Client(transport=RetryTransport(httpx.MockTransport(handler)))
+
+
+def test_read_is_retried_with_backoff(clock):
+    calls = []
+    response = _client([503, 503, 200], calls).get("http://db/tasks")
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert clock.sleeps == [0.05, 0.1]
+
+
+def test_read_returns_the_last_answer_when_retries_run_out(clock):
+    calls = []
+    response = _client([503, 502, 500], calls).get("http://db/tasks")
+    assert response.status_code == 500
+    assert len(calls) == 3
+
+
+def test_client_errors_are_not_retried(clock):
+    calls = []
+    assert _client([404], calls).get("http://db/tasks").status_code == 404
+    assert len(calls) == 1
+
+
+def test_write_is_not_retried_once_sent(clock):
+    calls = []
+    assert _client([503, 200], calls).patch("http://db/tasks").status_code == 503
+    with pytest.raises(httpx.ReadTimeout):
+        _client([httpx.ReadTimeout("slow"), 200], calls).post("http://db/tasks")
+    assert len(calls) == 2
+
+
+def test_write_is_retried_when_it_never_reached_the_server(clock):
+    calls = []
+    response = _client([httpx.ConnectError("refused"), 201], calls).post("http://db/tasks")
+    assert response.status_code == 201
+    assert len(calls) == 2
+
+
+def test_idempotent_write_is_retried(clock):
+    calls = []
+    with idempotent():
+        response = _client([503, httpx.ReadTimeout("slow"), 200], calls).patch("http://db/tasks")
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+def test_attempt_timeout_is_capped_by_the_call_deadline(clock, monkeypatch):
+    monkeypatch.setattr(settings, "DB_CALL_DEADLINE_MS", 7000)
+    timeouts = []
+
+    def handler(request):
+        timeouts.append(request.extensions["timeout"]["read"])
+        clock.now += 5
+        raise httpx.ReadTimeout("slow", request=request)
+
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler)))
+    with pytest.raises(httpx.ReadTimeout):
+        client.get("http://db/tasks")
+    assert timeouts == [5, pytest.approx(1.95)]
+
+
+def test_no_retry_past_the_deadline(clock, monkeypatch):
+    monkeypatch.setattr(settings, "DB_CALL_DEADLINE_MS", 1000)
+
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        clock.now += 0.98
+        return httpx.Response(503)
+
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler)))
+    assert client.get("http://db/tasks").status_code == 503
+    # The 50 ms backoff would end past the deadline
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_on_the_event_loop_only_unsent_requests_are_resent_without_sleeping(clock):
+    calls = []
+
+    async def on_loop():
+        assert _client([503, 200], calls).get("http://db/tasks").status_code == 503
+        return _client([httpx.ConnectError("refused"), 200], calls).get("http://db/tasks").status_code
+
+    assert asyncio.run(on_loop()) == 200
+    assert len(calls) == 3
+    assert clock.sleeps == []
+
+
+def test_slow_hedged_read_is_sent_twice_and_the_first_answer_wins(monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_AFTER_MS", 10)
+    release = threading.Event()
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            release.wait(5)
+            return httpx.Response(200, json={"copy": 1})
+        return httpx.Response(200, json={"copy": 2})
+
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler)))
+    try:
+        with hedged():
+            response = client.get("http://db/tasks")
+    finally:
+        release.set()
+    assert response.json() == {"copy": 2}
+    assert len(calls) == 2
+
+
+def test_unmarked_read_is_not_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_AFTER_MS", 10)
+    calls = []
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(lambda request: calls.append(request) or httpx.Response(200))))
+    client.get("http://db/tasks")
+    assert len(calls) == 1
+
+
+def test_update_budget_caps_the_call(clock):
+    timeouts = []
+
+    def handler(request):
+        timeouts.append(request.extensions["timeout"]["read"])
+        clock.now += 0.5
+        return httpx.Response(503)
+
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler)))
+    with deadline(3):
+        assert remaining() == 3
+        client.get("http://db/tasks")
+        assert timeouts == [3, pytest.approx(2.45), pytest.approx(1.85)]
+        clock.now += 2
+        with pytest.raises(DeadlineExceeded):
+            client.get("http://db/tasks")
+    assert len(timeouts) == 3
+    assert remaining() is None
+
+
+def test_timeout_cut_short_by_the_budget_is_deadline_exceeded(clock):
+    def handler(request):
+        clock.now += request.extensions["timeout"]["read"]
+        raise httpx.ReadTimeout("slow", request=request)
+
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler)))
+    with deadline(1), pytest.raises(DeadlineExceeded):
+        client.get("http://db/tasks")
+
+
+def test_a_scoped_budget_replaces_the_update_budget(clock):
+    calls = []
+    client = _client([200, 200], calls)
+    with deadline(1):
+        clock.now += 2
+        with deadline(None):
+            assert client.get("http://db/tasks").status_code == 200
+        with deadline(60):
+            assert client.get("http://db/tasks").status_code == 200
+        with pytest.raises(DeadlineExceeded):
+            client.get("http://db/tasks")
+
+
+def test_spent_budget_is_not_a_database_failure(clock):
+    circuit = CircuitBreaker(failure_threshold=1, reset_seconds=30, slow_seconds=5)
+    transport = CircuitBreakerTransport(RetryTransport(httpx.MockTransport(lambda request: httpx.Response(200))), circuit)
+    client = httpx.Client(transport=transport)
+    with deadline(0), pytest.raises(DeadlineExceeded):
+        client.get("http://db/tasks")
+    assert circuit.failures == 0
+
+
+def test_calls_from_worker_threads_get_backoff_retries(clock):
+    calls = []
+    client = _client([503, 200], calls)
+
+    async def handler():
+        return (await asyncio.to_thread(client.get, "http://db/tasks")).status_code
+
+    assert asyncio.run(handler()) == 200
+    assert len(calls) == 2
+    assert clock.sleeps == [0.05]
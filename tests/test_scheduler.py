@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from telegram import Update
+
+from benchmarks.fakes import FakeBot
+from bot.utils.rate_limit import RateLimiter
+from bot.utils.scheduler import PriorityUpdateProcessor
+
+
+@pytest.fixture
+def bot():
+    return FakeBot()
+
+
+def _message(bot, update_id: int, user_id: int) -> Update:
+    return Update.de_json({"update_id": update_id, "message": {
+        "message_id": update_id,
+        "date": 0,
+        "chat": {"id": user_id, "type": "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "User"},
+        "text": f"task {update_id}",
+    }}, bot)
+
+
+def _callback(bot, update_id: int, user_id: int) -> Update:
+    return Update.de_json({"update_id": update_id, "callback_query": {
+        "id": str(update_id),
+        "from": {"id": user_id, "is_bot": False, "first_name": "User"},
+        "chat_instance": "test",
+        "data": "shuffle",
+    }}, bot)
+
+
+class Handlers:
+    """Handler coroutines that record when they run, optionally until released."""
+
+    def __init__(self):
+        self.started = []
+        self.release = {}
+
+    async def handle(self, name: str, block: bool = False) -> None:
+        self.started.append(name)
+        if block:
+            self.release[name] = asyncio.Event()
+            await self.release[name].wait()
+
+
+async def _settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_callbacks_run_before_earlier_messages(bot):
+    async def run():
+        processor = PriorityUpdateProcessor(workers=1, max_queued=10, callback_timeout=10)
+        handlers = Handlers()
+        tasks = [asyncio.create_task(processor.process_update(_message(bot, 1, 1), handlers.handle("busy", block=True)))]
+        await _settle()
+        tasks.append(asyncio.create_task(processor.process_update(_message(bot, 2, 2), handlers.handle("message"))))
+        tasks.append(asyncio.create_task(processor.process_update(_callback(bot, 3, 3), handlers.handle("callback"))))
+        await _settle()
+        assert processor.waiting_by_priority() == {"callback_query": 1, "message": 1, "other": 0}
+
+        handlers.release["busy"].set()
+        await asyncio.gather(*tasks)
+        return handlers.started
+
+    assert asyncio.run(run()) == ["busy", "callback", "message"]
+
+
+def test_a_users_updates_run_one_at_a_time(bot):
+    async def run():
+        processor = PriorityUpdateProcessor(workers=2, max_queued=10, callback_timeout=10)
+        handlers = Handlers()
+        tasks = [
+            asyncio.create_task(processor.process_update(_message(bot, 1, 1), handlers.handle("first", block=True))),
+            asyncio.create_task(processor.process_update(_message(bot, 2, 1), handlers.handle("second"))),
+            asyncio.create_task(processor.process_update(_message(bot, 3, 2), handlers.handle("other user"))),
+        ]
+        await _settle()
+        # A worker is free, but the user's second message waits for the first
+        assert handlers.started == ["first", "other user"]
+        assert processor.waiting == 1
+
+        handlers.release["first"].set()
+        await asyncio.gather(*tasks)
+        return handlers.started
+
+    assert asyncio.run(run()) == ["first", "other user", "second"]
+
+
+def test_full_queue_sheds_with_a_busy_reply(bot):
+    async def run():
+        processor = PriorityUpdateProcessor(workers=1, max_queued=1, callback_timeout=10)
+        handlers = Handlers()
+        tasks = [asyncio.create_task(processor.process_update(_message(bot, 1, 1), handlers.handle("busy", block=True)))]
+        await _settle()
+        tasks.append(asyncio.create_task(processor.process_update(_message(bot, 2, 2), handlers.handle("queued"))))
+        await _settle()
+        await processor.process_update(_message(bot, 3, 3), handlers.handle("shed"))
+
+        handlers.release["busy"].set()
+        await asyncio.gather(*tasks)
+        return processor, handlers.started
+
+    processor, started = asyncio.run(run())
+    assert started == ["busy", "queued"]
+    assert processor.shed_counts == {("message", "queue_full"): 1}
+    assert bot.api_calls["sendMessage"] == 1
+
+
+def test_waiting_tap_gets_the_toast_when_it_times_out(bot):
+    async def run():
+        processor = PriorityUpdateProcessor(workers=1, max_queued=10, callback_timeout=0.05)
+        handlers = Handlers()
+        busy = asyncio.create_task(processor.process_update(_message(bot, 1, 1), handlers.handle("busy", block=True)))
+        await _settle()
+        # Answered while the worker is still busy, not once it frees up
+        await asyncio.wait_for(processor.process_update(_callback(bot, 2, 2), handlers.handle("tap")), timeout=1)
+        assert bot.api_calls["answerCallbackQuery"] == 1
+        assert processor.waiting == 0
+
+        handlers.release["busy"].set()
+        await busy
+        # The worker went back to the pool
+        await asyncio.wait_for(processor.process_update(_message(bot, 3, 3), handlers.handle("next")), timeout=1)
+        return processor, handlers.started
+
+    processor, started = asyncio.run(run())
+    assert started == ["busy", "next"]
+    assert processor.shed_counts == {("callback_query", "timeout"): 1}
+
+
+def test_deferred_messages_wait_without_a_slot(bot):
+    async def run():
+        limiter = RateLimiter("test_scheduler_defer", rate=20, burst=1, max_delay=1)
+        processor = PriorityUpdateProcessor(workers=1, max_queued=1, callback_timeout=10, message_limit=limiter)
+        handlers = Handlers()
+        await processor.process_update(_message(bot, 1, 1), handlers.handle("first"))
+        deferred = asyncio.create_task(processor.process_update(_message(bot, 2, 1), handlers.handle("deferred")))
+        await _settle()
+        assert processor.deferred == 1
+        assert processor.current_concurrent_updates == 0
+
+        # Sleeping updates are capped at max_queued, past that they are turned away
+        await processor.process_update(_message(bot, 3, 1), handlers.handle("shed"))
+        await deferred
+        return processor, handlers.started
+
+    processor, started = asyncio.run(run())
+    assert started == ["first", "deferred"]
+    assert processor.deferred == 0
+    assert processor.shed_counts == {("message", "queue_full"): 1}
+    assert bot.api_calls["sendMessage"] == 1
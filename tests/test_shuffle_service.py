@@ -0,0 +1,42 @@
+import pytest
+
+from bot.services.shuffle_service import get_rotation_tasks
+
+
+def _tasks(count: int) -> list:
+    return [{"id": f"task-{i}", "content": f"Task {i}"} for i in range(count)]
+
+
+def _screens(tasks: list, limit: int, count: int, seed: str = "user") -> list:
+    screens = []
+    cursor = None
+    for _ in range(count):
+        shown, cursor = get_rotation_tasks(tasks, limit, seed=seed, cursor=cursor)
+        screens.append([task["id"] for task in shown])
+    return screens
+
+
+@pytest.mark.parametrize("pool, limit", [(4, 3), (9, 5), (10, 5), (20, 3), (7, 2)])
+def test_rotation_shows_every_task_once_per_epoch(pool, limit):
+    screens = _screens(_tasks(pool), limit, 60)
+
+    # The screens walk one permutation of the pool after another
+    walk = [task_id for screen in screens for task_id in screen]
+    for start in range(0, len(walk) - pool + 1, pool):
+        assert sorted(walk[start:start + pool]) == sorted(task["id"] for task in _tasks(pool))
+    for screen in screens:
+        assert len(screen) == limit == len(set(screen))
+
+
+@pytest.mark.parametrize("pool, limit", [(6, 3), (10, 5), (20, 3)])
+def test_rotation_never_repeats_a_task_on_the_next_screen(pool, limit):
+    screens = _screens(_tasks(pool), limit, 60)
+    for previous, screen in zip(screens, screens[1:]):
+        assert not set(previous) & set(screen)
+
+
+def test_rotation_shows_small_pools_whole():
+    tasks = _tasks(3)
+    shown, cursor = get_rotation_tasks(tasks, 3, seed="user")
+    assert shown == tasks
+    assert cursor["epoch"] == 0
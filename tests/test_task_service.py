@@ -0,0 +1,70 @@
+import pytest
+
+from benchmarks.fakes import FakeSupabase
+from bot.db import journal
+from bot.db.circuit_breaker import CircuitOpen
+from bot.db.journal import Journal
+from bot.services import task_service, user_service
+from bot.services.version_service import get_data_version
+
+
+class DownClient:
+    """Supabase client while the circuit breaker is open."""
+
+    def table(self, name):
+        raise CircuitOpen("Circuit breaker is open")
+
+    def rpc(self, name, params):
+        raise CircuitOpen("Circuit breaker is open")
+
+
+def _task(task_id: str, category: str, created_at: str) -> dict:
+    return {"id": task_id, "user_id": "user", "category": category, "content": task_id, "created_at": created_at, "telegram_message_id": None}
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "_journal", Journal(str(tmp_path / "journal.sqlite3")))
+    user_service.prime_user({"id": "user", "telegram_id": 42, "settings": {}})
+    version = get_data_version("user")
+    task_service.prime_task_counts("user", version, {"now": 1, "soon": 0, "someday": 1})
+    task_service.prime_tasks_by_category("user", version, "now", [_task("a", "now", "2024-01-01")])
+    task_service.prime_tasks_by_category("user", version, "soon", [])
+    task_service.prime_tasks_by_category("user", version, "someday", [_task("b", "someday", "2024-01-02")])
+    monkeypatch.setattr(task_service, "get_client", DownClient)
+    monkeypatch.setattr(user_service, "get_client", DownClient)
+
+
+def test_journaled_writes_show_in_cached_views(offline):
+    task_service.capture_task(42, "c", 7, "now", task_id="c")
+    task_service.update_task_category("user", "b", "now")
+    task_service.complete_task("user", "a")
+
+    assert task_service.get_task_counts("user") == {"now": 2, "soon": 0, "someday": 0}
+    assert [task["id"] for task in task_service.get_tasks_by_category("user", "now")] == ["b", "c"]
+    assert [task["id"] for task in task_service.get_tasks_by_category("user", "now", limit=1, offset=1)] == ["c"]
+    assert task_service.get_task_by_message_id("user", 7)["id"] == "c"
+    assert len(journal._journal) == 3
+
+
+def test_reads_fall_back_to_last_known_data(offline):
+    # Nothing is cached for the new version
+    task_service.bump_data_version("user")
+    assert task_service.get_task_counts("user") == {"now": 1, "soon": 0, "someday": 1}
+    assert task_service.get_task_by_id("b")["content"] == "b"
+    with pytest.raises(CircuitOpen):
+        task_service.get_task_by_id("unknown")
+
+
+def test_redelivered_message_does_not_bump_the_data_version(monkeypatch):
+    db = FakeSupabase()
+    monkeypatch.setattr(task_service, "get_client", lambda: db)
+
+    first = task_service.create_task("user", "milk", 7)
+    version = get_data_version("user")
+    again = task_service.create_task("user", "milk", 7)
+
+    assert again["id"] == first["id"]
+    assert len(db.tables["tasks"]) == 1
+    # Cached views of the user stay valid, nothing changed
+    assert get_data_version("user") == version